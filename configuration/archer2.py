@@ -1,5 +1,8 @@
 """ARCHER2 settings"""
 
+import os
+import sys
+
 from reframe.core.backends import register_launcher
 from reframe.core.launchers import JobLauncher
 
@@ -12,6 +15,12 @@ class TorchRunLauncher(JobLauncher):
         return ["torchrun", "--nproc_per_node=4"]
 
 
+# Make the shared epcc_reframe package importable by this configuration and by the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import epcc_reframe.perflog  # noqa: E402,F401 pylint: disable=wrong-import-position,unused-import
+from epcc_reframe.packing import PACK_JOBS_ENV  # noqa: E402 pylint: disable=wrong-import-position
+
 site_configuration = {
     "systems": [
         {
@@ -30,7 +39,7 @@ site_configuration = {
                 {
                     "name": "compute",
                     "descr": "Compute nodes",
-                    "scheduler": "slurm",
+                    "scheduler": "slurm-packed" if os.environ.get(PACK_JOBS_ENV) else "slurm",
                     "launcher": "srun",
                     "access": [
                         "--hint=nomultithread",
@@ -207,6 +216,12 @@ site_configuration = {
                     ),
                     "append": True,
                 },
+                {
+                    "type": "sqlite",
+                    "basedir": "./perflogs",
+                    "name": "perflogs.db",
+                    "level": "info",
+                },
             ],
         }
     ],
@@ -1,5 +1,13 @@
 """ARCHER2 4 cabinet"""
 
+import os
+import sys
+
+# Make the shared epcc_reframe package importable by this configuration and by the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import epcc_reframe.perflog  # noqa: E402,F401 pylint: disable=wrong-import-position,unused-import
+
 site_configuration = {
     "systems": [
         {
@@ -110,7 +118,13 @@ site_configuration = {
                         "%(check_perf_unit)s"
                     ),
                     "append": True,
-                }
+                },
+                {
+                    "type": "sqlite",
+                    "basedir": "./perflogs",
+                    "name": "perflogs.db",
+                    "level": "info",
+                },
             ],
         }
     ],
@@ -1,5 +1,14 @@
 """Cirrus Settings"""
 
+import os
+import sys
+
+# Make the shared epcc_reframe package importable by this configuration and by the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import epcc_reframe.perflog  # noqa: E402,F401 pylint: disable=wrong-import-position,unused-import
+from epcc_reframe.packing import PACK_JOBS_ENV  # noqa: E402 pylint: disable=wrong-import-position
+
 site_configuration = {
     "systems": [
         {
@@ -18,7 +27,7 @@ site_configuration = {
                 {
                     "name": "compute",
                     "descr": "Compute nodes",
-                    "scheduler": "slurm",
+                    "scheduler": "slurm-packed" if os.environ.get(PACK_JOBS_ENV) else "slurm",
                     "launcher": "srun",
                     "access": [
                         "--hint=nomultithread",
@@ -176,6 +185,12 @@ site_configuration = {
                     ),
                     "append": True,
                 },
+                {
+                    "type": "sqlite",
+                    "basedir": "./perflogs",
+                    "name": "perflogs.db",
+                    "level": "info",
+                },
             ],
         }
     ],
@@ -1,6 +1,13 @@
 """EIDF settings"""
 
+import os
 import socket
+import sys
+
+# Make the shared epcc_reframe package importable by this configuration and by the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import epcc_reframe.perflog  # noqa: E402,F401 pylint: disable=wrong-import-position,unused-import
 
 site_configuration = {
     "systems": [
@@ -101,6 +108,12 @@ site_configuration = {
                     ),
                     "append": True,
                 },
+                {
+                    "type": "sqlite",
+                    "basedir": "./perflogs",
+                    "name": "perflogs.db",
+                    "level": "info",
+                },
             ],
         }
     ],
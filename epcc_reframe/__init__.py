@@ -0,0 +1 @@
+"""Shared utilities for the EPCC ReFrame configuration and test suite"""
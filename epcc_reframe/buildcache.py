@@ -0,0 +1,430 @@
+"""
+Content-addressed cache of the stage directories of compiled fixtures
+
+Build fixtures that inherit from BuildCacheMixin look up their stage directory
+in a cache on a shared filesystem before compiling. The cache key is a hash of
+
+  - the build name, partition and programming environment;
+  - the modules loaded in the build environment, with their versions;
+  - the source revision: the commit of a git sourcesdir, the contents of a
+    local sourcesdir and of the files listed in build_cache_inputs, such as
+    tarballs downloaded by a fetch fixture;
+  - the build options: build system settings, pre/post build commands and
+    environment variables.
+
+On a hit, the stage directory is restored by hard links to the cache, or by a
+copy across filesystems, and the build is replaced by a no-op. On a miss, the
+fixture is built as usual and its stage directory is stored once its sanity
+check has passed. Cached files are read-only, so a test cannot modify a cache
+entry through a hard link.
+
+The cache is enabled by setting the EPCC_REFRAME_BUILD_CACHE environment
+variable, or the build_cache_dir variable, to its directory. Entries are
+evicted by age of last use and by total size, after each store when
+build_cache_max_age/build_cache_max_size are set, or with:
+
+    python -m epcc_reframe.buildcache evict /path/to/cache --max-age-days 30 --max-size-gib 200
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+import reframe as rfm
+import reframe.core.runtime as rt
+import reframe.utility.typecheck as typ
+from reframe.core.builtins import run_after, run_before, variable
+from reframe.utility import osext
+
+# Environment variable giving the default cache directory
+CACHE_DIR_ENV = "EPCC_REFRAME_BUILD_CACHE"
+
+# Metadata of a cache entry; its modification time is the time of last use
+METADATA_FILE = "metadata.json"
+
+# Directory of a cache entry holding the restored stage directory contents
+FILES_DIR = "files"
+
+# Files of the stage directory written by ReFrame for each build, never cached
+STAGE_IGNORE_PATTERNS = (".rfm_mark", "rfm_build.sh", "rfm_build.out", "rfm_build.err")
+
+# Build system settings which do not change the result of the build
+IGNORED_BUILD_SETTINGS = {"max_concurrency"}
+
+
+def hash_file(path: str) -> str:
+    """Return the sha256 hex digest of the contents of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def hash_tree(path: str) -> str:
+    """Return a sha256 hex digest of the relative paths and contents of all files under path"""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for name in sorted(filenames):
+            filename = os.path.join(dirpath, name)
+            digest.update(os.path.relpath(filename, path).encode())
+            digest.update(hash_file(filename).encode())
+
+    return digest.hexdigest()
+
+
+def git_revision(url: str, ref: str = "HEAD") -> str:
+    """Return the commit of ref in a remote git repository, or None if it cannot be resolved"""
+    try:
+        completed = subprocess.run(
+            ["git", "ls-remote", url, ref], capture_output=True, text=True, timeout=60, check=False
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+    fields = completed.stdout.split()
+    return fields[0] if completed.returncode == 0 and fields else None
+
+
+class ModulesListError(Exception):
+    """The modules loaded in the build environment could not be listed"""
+
+
+def loaded_modules(load_cmds: list[str], nomod: bool = False) -> list[str]:
+    """
+    Return the modules loaded, with their versions, after running load_cmds in a new shell.
+    An empty list is returned on systems without environment modules, given by nomod.
+    """
+    if nomod:
+        return []
+
+    script = "\n".join([*load_cmds, "module -t list 2>&1"])
+    try:
+        completed = subprocess.run(["bash", "-c", script], capture_output=True, text=True, timeout=120, check=False)
+    except (OSError, subprocess.TimeoutExpired) as err:
+        raise ModulesListError(f"cannot list the loaded modules: {err}") from err
+
+    if completed.returncode != 0:
+        raise ModulesListError(f"cannot list the loaded modules: exit code {completed.returncode}")
+
+    return sorted(line.strip() for line in completed.stdout.splitlines() if line.strip() and ":" not in line)
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hard link src to dst, copying it if they are on different filesystems"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _make_read_only(path: str):
+    """Remove the write permissions of all files under path"""
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            filename = os.path.join(dirpath, name)
+            if not os.path.islink(filename):
+                mode = os.stat(filename).st_mode
+                os.chmod(filename, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def tree_size(path: str) -> int:
+    """Return the size in bytes of all files under path, counting hard links once"""
+    inodes = {}
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            st = os.lstat(os.path.join(dirpath, name))
+            inodes[(st.st_dev, st.st_ino)] = st.st_size
+
+    return sum(inodes.values())
+
+
+class BuildCache:
+    """Build cache in a directory, with one subdirectory per key"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        """Return the directory of the entry of key"""
+        return os.path.join(self.root, key)
+
+    def lookup(self, key: str) -> dict:
+        """Return the metadata of the entry of key and mark it as used, or None if there is no entry"""
+        metadata_file = os.path.join(self.path(key), METADATA_FILE)
+        try:
+            with open(metadata_file, encoding="utf-8") as fp:
+                metadata = json.load(fp)
+
+            os.utime(metadata_file)
+        except (OSError, ValueError):
+            return None
+
+        return metadata
+
+    def restore(self, key: str, dest: str):
+        """Restore the files of the entry of key into the directory dest"""
+        shutil.copytree(
+            os.path.join(self.path(key), FILES_DIR),
+            dest,
+            symlinks=True,
+            copy_function=_link_or_copy,
+            dirs_exist_ok=True,
+        )
+
+    def store(self, key: str, src: str, metadata: dict) -> bool:
+        """
+        Store a copy of the directory src as the entry of key.
+        Returns False if the entry already exists, e.g. stored concurrently by another session.
+        """
+        if os.path.exists(self.path(key)):
+            return False
+
+        os.makedirs(self.root, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(prefix=f".{key}.", dir=self.root)
+        try:
+            shutil.copytree(
+                src,
+                os.path.join(tmpdir, FILES_DIR),
+                symlinks=True,
+                ignore=shutil.ignore_patterns(*STAGE_IGNORE_PATTERNS),
+            )
+            _make_read_only(os.path.join(tmpdir, FILES_DIR))
+            metadata = dict(metadata, key=key, created=time.time(), size=tree_size(tmpdir))
+            with open(os.path.join(tmpdir, METADATA_FILE), "w", encoding="utf-8") as fp:
+                json.dump(metadata, fp, indent=2)
+
+            # The rename is atomic, so a concurrent lookup never finds a partial entry
+            os.rename(tmpdir, self.path(key))
+        except OSError:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            if os.path.exists(self.path(key)):
+                return False
+
+            raise
+
+        return True
+
+    def entries(self) -> list[dict]:
+        """Return the metadata of all entries, with their last_used time, least recently used first"""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+
+        for key in os.listdir(self.root):
+            metadata_file = os.path.join(self.path(key), METADATA_FILE)
+            try:
+                with open(metadata_file, encoding="utf-8") as fp:
+                    metadata = json.load(fp)
+
+                metadata["last_used"] = os.stat(metadata_file).st_mtime
+            except (OSError, ValueError):
+                continue
+
+            entries.append(metadata)
+
+        return sorted(entries, key=lambda entry: entry["last_used"])
+
+    def remove(self, key: str):
+        """Remove the entry of key"""
+        # Rename first so that the entry disappears for lookups before its files are removed
+        tmpdir = tempfile.mkdtemp(prefix=f".{key}.", dir=self.root)
+        os.rename(self.path(key), os.path.join(tmpdir, key))
+        shutil.rmtree(tmpdir)
+
+    def evict(self, max_age: float = None, max_size: float = None) -> list[dict]:
+        """
+        Remove the entries not used for more than max_age seconds, then the least recently used ones
+        until the total size is at most max_size bytes. Returns the removed entries.
+        """
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        now = time.time()
+        removed = []
+        for entry in entries:
+            expired = max_age is not None and now - entry["last_used"] > max_age
+            if not expired and (max_size is None or total <= max_size):
+                continue
+
+            self.remove(entry["key"])
+            total -= entry["size"]
+            removed.append(entry)
+
+        return removed
+
+
+class BuildCacheMixin(rfm.RegressionMixin):  # pylint: disable=too-many-instance-attributes
+    """Mixin restoring the stage directory of a build from the build cache instead of compiling"""
+
+    #: Directory of the build cache, caching is disabled if None
+    build_cache_dir = variable(str, type(None), value=os.environ.get(CACHE_DIR_ENV))
+
+    #: Name of the build in the cache key, by default the unique name of the test
+    build_cache_name = variable(str, type(None), value=None)
+
+    #: Source revision in the cache key, by default the commit of a git sourcesdir
+    build_cache_revision = variable(str, type(None), value=None)
+
+    #: Files whose contents are part of the cache key, e.g. source tarballs
+    build_cache_inputs = variable(typ.List[str], value=[])
+
+    #: If False, the build embeds absolute paths into the stage directory, which is then part of the key
+    build_cache_relocatable = variable(bool, value=True)
+
+    #: Evict entries not used for this number of days after storing a build
+    build_cache_max_age = variable(float, type(None), value=None)
+
+    #: Evict the least recently used entries beyond this total size in GiB after storing a build
+    build_cache_max_size = variable(float, type(None), value=None)
+
+    #: Key of the build, set before compiling
+    build_cache_key = variable(str, type(None), value=None)
+
+    #: Whether the stage directory was restored from the cache
+    build_cache_hit = variable(bool, value=False)
+
+    def _normalise_paths(self, value) -> str:
+        """Return value as a string with the stage paths of this session replaced, if the build is relocatable"""
+        text = json.dumps(value, sort_keys=True, default=str)
+        if not self.build_cache_relocatable:
+            return text
+
+        return text.replace(self.stagedir, "{stagedir}").replace(rt.runtime().stage_prefix, "{stage_prefix}")
+
+    def build_cache_components(self) -> dict:
+        """Return the components of the cache key of the build"""
+        modules_system = rt.runtime().modules_system
+        modules = [*self.current_partition.local_env.modules, *self.current_environ.modules, *self.modules]
+        load_cmds = [cmd for module in modules for cmd in modules_system.emit_load_commands(module)]
+
+        sources = {"revision": self.build_cache_revision}
+        if isinstance(self.sourcesdir, str) and osext.is_url(self.sourcesdir):
+            # The URL is left out of the key, so that a build from the artifact mirror is a hit
+            sources["revision"] = sources["revision"] or git_revision(self.sourcesdir)
+        elif self.sourcesdir and os.path.isdir(os.path.join(self.prefix, self.sourcesdir)):
+            sources["tree"] = hash_tree(os.path.join(self.prefix, self.sourcesdir))
+
+        sources["inputs"] = {os.path.basename(path): hash_file(path) for path in self.build_cache_inputs}
+
+        build_system = {}
+        if self.build_system:
+            build_system = {
+                name: value
+                for name, value in vars(self.build_system).items()
+                if not name.startswith("_") and name not in IGNORED_BUILD_SETTINGS
+            }
+            build_system["type"] = type(self.build_system).__name__
+
+        return {
+            "name": self.build_cache_name or self.unique_name,
+            "partition": self.current_partition.fullname,
+            "environ": self.current_environ.name,
+            "modules": loaded_modules(load_cmds, modules_system.name == "nomod"),
+            "sources": sources,
+            "build": self._normalise_paths(
+                {
+                    "build_system": build_system,
+                    "sourcepath": self.sourcepath,
+                    "prebuild_cmds": self.prebuild_cmds,
+                    "postbuild_cmds": self.postbuild_cmds,
+                    "env_vars": self.env_vars,
+                    "stagedir": self.stagedir,
+                }
+            ),
+        }
+
+    @run_before("compile", always_last=True)
+    def restore_from_build_cache(self):
+        """Restore the stage directory if the build is in the cache, and skip the build"""
+        if not self.build_cache_dir:
+            return
+
+        try:
+            components = self.build_cache_components()
+        except ModulesListError as err:
+            self.logger.debug(f"build cache: {err}, not caching")
+            return
+
+        if isinstance(self.sourcesdir, str) and osext.is_url(self.sourcesdir) and not components["sources"]["revision"]:
+            self.logger.debug(f"build cache: cannot resolve the revision of {self.sourcesdir}, not caching")
+            return
+
+        self.build_cache_key = hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+        self._build_cache_components = components
+        cache = BuildCache(self.build_cache_dir)
+        if cache.lookup(self.build_cache_key) is None:
+            self.logger.debug(f"build cache: miss for {self.build_cache_key}")
+            return
+
+        cache.restore(self.build_cache_key, self.stagedir)
+        self.build_cache_hit = True
+
+        # Keep the build directory, which the tests using this build read from its build system
+        builddir = getattr(self.build_system, "builddir", None)
+        self.sourcesdir = None
+        self.prebuild_cmds = []
+        self.postbuild_cmds = []
+        self.build_system = "CustomBuild"
+        self.build_system.commands = [f"echo 'Restored from build cache {self.build_cache_key}'"]
+        if builddir is not None:
+            self.build_system.builddir = builddir
+
+        self.build_locally = True
+
+    @run_after("sanity")
+    def store_in_build_cache(self):
+        """Store the stage directory of a successful build in the cache"""
+        if not self.build_cache_key or self.build_cache_hit:
+            return
+
+        cache = BuildCache(self.build_cache_dir)
+        metadata = {"name": self.build_cache_name or self.unique_name, "components": self._build_cache_components}
+        if cache.store(self.build_cache_key, self.stagedir, metadata):
+            self.logger.debug(f"build cache: stored {self.build_cache_key}")
+
+        if self.build_cache_max_age is not None or self.build_cache_max_size is not None:
+            cache.evict(
+                self.build_cache_max_age * 86400 if self.build_cache_max_age is not None else None,
+                self.build_cache_max_size * 2**30 if self.build_cache_max_size is not None else None,
+            )
+
+
+def main(argv=None):
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="list the entries, least recently used first")
+    list_parser.add_argument("cache_dir")
+    evict_parser = subparsers.add_parser("evict", help="evict entries by age and total size")
+    evict_parser.add_argument("cache_dir")
+    evict_parser.add_argument("--max-age-days", type=float, help="remove entries not used for N days")
+    evict_parser.add_argument("--max-size-gib", type=float, help="remove least recently used entries beyond N GiB")
+    args = parser.parse_args(argv)
+
+    cache = BuildCache(args.cache_dir)
+    if args.command == "list":
+        for entry in cache.entries():
+            last_used = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(entry["last_used"]))
+            print(f"{entry['key']}  {entry['size'] / 2**20:10.1f} MiB  {last_used}  {entry['name']}")
+    else:
+        removed = cache.evict(
+            args.max_age_days * 86400 if args.max_age_days is not None else None,
+            args.max_size_gib * 2**30 if args.max_size_gib is not None else None,
+        )
+        for entry in removed:
+            print(f"evicted {entry['key']} {entry['name']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,821 @@
+"""
+Runtime- and node-hour-aware scheduling of ReFrame campaigns
+
+ReFrame submits the test cases of a run in the order it loads them, as long as
+fewer than max_jobs jobs of their partition are in flight, so a long test that
+is loaded last extends the whole campaign by its runtime. Campaigns are
+instead planned from the runtimes and node counts of previous runs:
+
+  - each test case (a test or fixture on one partition and programming
+    environment) is estimated from the median elapsed time and node count of
+    its previous jobs in sacct. Without history, it is sized from its time
+    limit and number of tasks after a dry run of the selected tests, since
+    hooks set them for many tests; cases that fail the dry run or have a
+    flexible number of nodes are of unknown size;
+  - ReFrame runs a test with the cases it depends on, including its fixtures,
+    so the cases linked by dependencies form a group planned and run as one
+    ReFrame run, in which each of them runs once;
+  - with a node-hour budget, the groups of known size with the highest value
+    per node-hour are selected while they fit in it. The value of a test is
+    the weight in TAG_VALUES of its most important tag, increased with the
+    time since it last ran in a campaign;
+  - the selected groups are ordered longest first and the start times of
+    their cases are predicted by list scheduling them on the max_jobs slots
+    of their partitions, which gives the makespan of the campaign.
+
+The run command executes the plan, starting the ReFrame run of each group when
+a slot of each of its partitions is free, so that the planned order is kept.
+The cases of a group run one after the other with the serial execution policy,
+so that a group holds a single slot. The node-hours actually used by the jobs
+of each case, from sacct, are appended to the ledger of the campaign directory
+next to its estimate.
+
+The state of every case (pending, running with the pid and host of the ReFrame
+run of its group and its Slurm job ids, pass or fail) is saved to the state
+file of the campaign directory whenever it changes. The ReFrame runs are
+started in their own session and outlive an interrupted runner. Running the
+campaign again in the same directory resumes it: finished cases are kept, the
+runner waits again for the groups whose ReFrame run is still alive, and only
+the pending groups are started. The jobs of a group whose ReFrame run was
+killed with the runner are cancelled and the group is run again. A campaign
+with groups running on another host, such as another login node, is only
+resumed there. Any option not listed below selects the tests as it does for
+reframe. With --changed, only the tests whose dependencies changed since they
+last passed are planned, with the cases they depend on (see
+epcc_reframe.impact):
+
+    python -m epcc_reframe.campaign plan -C configuration/archer2.py --system archer2 -c tests -R -t performance
+    python -m epcc_reframe.campaign run -C configuration/archer2.py --system archer2 --budget 2000 -c tests -R
+    python -m epcc_reframe.campaign status -C configuration/archer2.py
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import runpy
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+
+from epcc_reframe.impact import ImpactRecords
+
+# Days of sacct history used to estimate runtimes
+HISTORY_DAYS = 60
+
+# Runtime of a test case with neither history nor time limit, in seconds
+DEFAULT_RUNTIME = 3600.0
+
+# Shortest runtime of a test case in seconds, covering job startup and jobs too short for sacct to time
+MIN_RUNTIME = 60.0
+
+# Maximum number of jobs of a partition that does not set max_jobs, as in ReFrame
+DEFAULT_MAX_JOBS = 8
+
+# Seconds between checks of the running cases
+POLL_INTERVAL = 10
+
+# Job states whose elapsed time is a runtime of the test
+HISTORY_STATES = ("COMPLETED", "TIMEOUT")
+
+# Value of a test case by tag, the most valuable tag of a case counts; other tags are worth 1
+TAG_VALUES = {"production": 4.0, "maintenance": 3.0, "performance": 2.0, "functionality": 2.0, "largescale": 1.0}
+
+# Days since a test case last ran after which its value doubles
+STALENESS_DAYS = 7.0
+
+# Days since a test case last ran beyond which its value no longer increases, also used if it never ran
+MAX_STALENESS_DAYS = 28.0
+
+# Schedulers whose job ids are not Slurm job ids
+LOCAL_SCHEDULERS = ("local", "ssh")
+
+# File of the campaign directory holding the state of every case
+STATE_FILE = "state.json"
+
+# States of the cases that are done; the others are "pending" and "running"
+FINISHED_STATES = ("pass", "fail")
+
+# Results of a test case in a ReFrame report that pass it
+PASSING_RESULTS = ("pass", "xfail", "skip")
+
+
+@dataclass
+class TestCase:  # pylint: disable=too-many-instance-attributes
+    """A test or fixture on one partition and programming environment, run as one job"""
+
+    name: str
+    hashcode: str
+    filename: str
+    partition: str
+    environ: str
+    job_name: str
+    nodes: int = 1
+    runtime: float = DEFAULT_RUNTIME
+    estimate: str = "default"
+    tags: list = field(default_factory=list)
+    value: float = 1.0
+    start: float = None
+    status: str = "pending"
+    pid: int = None
+    host: str = None
+    jobids: list = field(default_factory=list)
+    fixture: bool = False
+    dependencies: list = field(default_factory=list)
+    group: str = None
+
+    @property
+    def key(self) -> str:
+        """Unique name of the case, usable as a file name"""
+        return f"{self.hashcode}_{self.partition.replace(':', '_')}_{self.environ}"
+
+    @property
+    def workdir(self) -> str:
+        """Stage directory of the case, relative to the one of the campaign"""
+        return os.path.join(self.group, *self.partition.split(":"), self.environ, self.job_name[len("rfm_") :])
+
+    @property
+    def node_hours(self) -> float:
+        """Estimated cost of the case"""
+        return self.nodes * self.runtime / 3600
+
+
+@dataclass
+class CampaignPlan:
+    """Test cases selected in start order, the deferred ones and the predicted makespan in seconds"""
+
+    selected: list = field(default_factory=list)
+    deferred: list = field(default_factory=list)
+    makespan: float = 0.0
+
+    @property
+    def node_hours(self) -> float:
+        """Estimated cost of the selected cases of known size"""
+        return sum(case.node_hours for case in self.selected if case.estimate != "unknown")
+
+
+def _case_key(testcase: dict) -> str:
+    """Return the key of the case of a test case of a ReFrame report, as TestCase.key"""
+    return f"{testcase['hashcode']}_{testcase['system']}_{testcase['partition']}_{testcase['environ']}"
+
+
+def dry_run(config: str, system: str, select_args: list[str]) -> list[dict]:
+    """Return the test cases of the report of a dry run of the tests selected by the reframe options select_args"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report_file = os.path.join(tmpdir, "report.json")
+        cmd = [
+            "reframe",
+            "-C",
+            config,
+            *(["--system", system] if system else []),
+            *select_args,
+            "--stage",
+            os.path.join(tmpdir, "stage"),
+            "--output",
+            os.path.join(tmpdir, "output"),
+            "--report-file",
+            report_file,
+            "--dry-run",
+            "--nocolor",
+        ]
+        # Failing test cases make reframe fail, they are still in the report
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        if not os.path.exists(report_file) and completed.returncode == 0:
+            # No test was selected
+            return []
+
+        if not os.path.exists(report_file):
+            lines = [line for line in completed.stdout.splitlines() if line.strip() and "Log file(s)" not in line]
+            raise ValueError(f"reframe --dry-run failed: {lines[-1] if lines else completed.returncode}")
+
+        with open(report_file, encoding="utf-8") as fp:
+            return [testcase for run_info in json.load(fp)["runs"] for testcase in run_info["testcases"]]
+
+
+def discover(config: str, system: str, select_args: list[str]) -> list[TestCase]:
+    """
+    Return the test cases selected by the reframe options select_args and their fixtures, with their
+    dependencies, sized after their setup in a dry run; cases that fail it or whose number of nodes is
+    unknown are marked as unknown
+    """
+    testcases = dry_run(config, system, select_args)
+    # Dependencies name their cases by unique name, partition and environment
+    keys = {}
+    for testcase in testcases:
+        partition = f"{testcase['system']}:{testcase['partition']}"
+        keys[testcase["unique_name"], partition, testcase["environ"]] = _case_key(testcase)
+
+    cases = []
+    for testcase in testcases:
+        case = TestCase(
+            name=testcase["display_name"],
+            hashcode=testcase["hashcode"],
+            filename=testcase["filename"],
+            partition=f"{testcase['system']}:{testcase['partition']}",
+            environ=testcase["environ"],
+            job_name=f"rfm_{testcase['short_name']}",
+            tags=testcase["tags"],
+            fixture=testcase["fixture"],
+            dependencies=[keys[tuple(dep)] for dep in testcase["dependencies_actual"] if tuple(dep) in keys],
+        )
+        # Hooks set the size of many tests, so it is only known once they passed their dry run
+        num_tasks, per_node = testcase["num_tasks"], testcase["num_tasks_per_node"]
+        if testcase["local"] or testcase["scheduler"] in LOCAL_SCHEDULERS:
+            # Local tests, such as the downloads of fixtures, use no compute node
+            case.nodes = 0
+        elif testcase["job_stdout"] is None:
+            # Compile-only tests, such as the builds of fixtures, only have a build job
+            case.nodes = 0 if testcase["build_locally"] else 1
+        elif testcase["result"] != "pass" or not num_tasks or num_tasks < 0 or (num_tasks > 1 and not per_node):
+            case.estimate = "unknown"
+        else:
+            case.nodes = math.ceil(num_tasks / (per_node or 1))
+
+        if testcase["time_limit"] and case.estimate != "unknown":
+            case.runtime = max(MIN_RUNTIME, float(testcase["time_limit"]))
+            case.estimate = "time limit"
+
+        cases.append(case)
+
+    return cases
+
+
+def with_dependencies(selected: list[TestCase], cases: list[TestCase]) -> list[TestCase]:
+    """Return the selected cases and the cases they depend on, directly or not, in the order of cases"""
+    by_key = {case.key: case for case in cases}
+    keys, todo = set(), [case.key for case in selected]
+    while todo:
+        key = todo.pop()
+        if key not in keys:
+            keys.add(key)
+            todo += by_key[key].dependencies
+
+    return [case for case in cases if case.key in keys]
+
+
+def changed_cases(cases: list[TestCase]) -> list[TestCase]:
+    """
+    Return the tests whose fingerprint changed since they last passed, with the cases they depend on,
+    printing what changed
+    """
+    records = ImpactRecords()
+    tests = [case for case in cases if not case.fixture]
+    changed = []
+    for case in tests:
+        changes = records.changes(case.key, case.filename)
+        if changes:
+            print(f"Changed: {case.name} @{case.partition}+{case.environ}: {'; '.join(changes)}")
+            changed.append(case)
+
+    print(f"{len(changed)} of {len(tests)} test cases changed")
+    return with_dependencies(changed, cases)
+
+
+def run_selection(cases: list[TestCase]) -> tuple[str, set[str], set[str]]:
+    """Return the --system, hashcodes and environments with which one ReFrame run selects the tests of cases"""
+    tests = [case for case in cases if not case.fixture]
+    partitions = {case.partition for case in tests}
+    system = partitions.pop() if len(partitions) == 1 else tests[0].partition.split(":")[0]
+    return system, {case.hashcode for case in tests}, {case.environ for case in tests}
+
+
+def _root(parents: dict[str, str], key: str) -> str:
+    """Return the key of the group of a case in a union-find forest"""
+    while parents[key] != key:
+        key = parents[key]
+
+    return key
+
+
+def assign_groups(cases: list[TestCase]):
+    """
+    Set the group of the cases. ReFrame runs a test with the cases it depends on, including its fixtures, so
+    the cases linked by dependencies are run together, and the run of a group also selects its tests on all
+    the partitions and environments of the group, so the groups with such cases are merged.
+    """
+    parents = {case.key: case.key for case in cases}
+    for case in cases:
+        for dependency in case.dependencies:
+            parents[_root(parents, dependency)] = _root(parents, case.key)
+
+    merged = True
+    while merged:
+        merged = False
+        for case in cases:
+            case.group = _root(parents, case.key)
+
+        for members in groups(cases).values():
+            system, hashcodes, environs = run_selection(members)
+            for case in cases:
+                selected = case.hashcode in hashcodes and case.environ in environs and not case.fixture
+                if selected and system in (case.partition, case.partition.split(":")[0]):
+                    root, group = _root(parents, case.key), _root(parents, members[0].key)
+                    if root != group:
+                        parents[root] = group
+                        merged = True
+
+
+def groups(cases: list[TestCase]) -> dict[str, list[TestCase]]:
+    """Return the cases of every group, in the order of cases"""
+    members = {}
+    for case in cases:
+        members.setdefault(case.group, []).append(case)
+
+    return members
+
+
+def job_history(since_days: float = HISTORY_DAYS) -> dict[str, list[tuple[float, int]]]:
+    """Return the (elapsed seconds, nodes) of the recent ReFrame jobs in sacct, by job name"""
+    start = time.strftime("%Y-%m-%d", time.localtime(time.time() - since_days * 86400))
+    cmd = ["sacct", "-X", "-n", "-P", "-S", start, "-o", "JobName,ElapsedRaw,NNodes,State"]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as err:
+        print(f"warning: no job history from sacct: {err}", file=sys.stderr)
+        return {}
+
+    history = {}
+    for line in completed.stdout.splitlines():
+        fields = line.split("|")
+        if len(fields) != 4 or not fields[0].startswith("rfm_") or not fields[3].startswith(HISTORY_STATES):
+            continue
+
+        history.setdefault(fields[0], []).append((float(fields[1]), int(fields[2])))
+
+    return history
+
+
+def estimate(cases: list[TestCase], history: dict[str, list[tuple[float, int]]]):
+    """Set the runtime and node count of the cases with job history to their medians, at least MIN_RUNTIME"""
+    for case in cases:
+        jobs = history.get(case.job_name)
+        if not jobs:
+            continue
+
+        case.runtime = max(MIN_RUNTIME, statistics.median(elapsed for elapsed, _ in jobs))
+        case.nodes = max(1, round(statistics.median(nodes for _, nodes in jobs)))
+        case.estimate = f"median of {len(jobs)} jobs"
+
+
+def partition_max_jobs(config: str) -> dict[str, int]:
+    """Return the max_jobs of every system:partition in a configuration file"""
+    site_configuration = runpy.run_path(config)["site_configuration"]
+    return {
+        f"{sysconf['name']}:{part['name']}": part.get("max_jobs", DEFAULT_MAX_JOBS)
+        for sysconf in site_configuration["systems"]
+        for part in sysconf["partitions"]
+    }
+
+
+def read_ledger(path: str) -> list[dict]:
+    """Return the entries of a ledger, oldest first"""
+    if not os.path.exists(path):
+        return []
+
+    with open(path, encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+def assign_values(cases: list[TestCase], ledger: list[dict]):
+    """
+    Set the value of the tests from their tags and the last time they ran according to the ledger; fixtures are
+    only worth the tests that need them
+    """
+    last_run = {}
+    for entry in ledger:
+        last_run[entry["case"]] = max(last_run.get(entry["case"], 0.0), entry["end"])
+
+    for case in cases:
+        if case.fixture:
+            case.value = 0.0
+            continue
+
+        weight = max((TAG_VALUES.get(tag, 1.0) for tag in case.tags), default=1.0)
+        days = (time.time() - last_run[case.key]) / 86400 if case.key in last_run else MAX_STALENESS_DAYS
+        case.value = weight * (1 + min(days, MAX_STALENESS_DAYS) / STALENESS_DAYS)
+
+
+def _value_per_node_hour(cases: list[TestCase]) -> float:
+    """Return the value of a group of cases per estimated node-hour"""
+    node_hours = sum(case.node_hours for case in cases)
+    return sum(case.value for case in cases) / node_hours if node_hours else math.inf
+
+
+def plan(cases: list[TestCase], max_jobs: dict[str, int], budget: float = None) -> CampaignPlan:
+    """
+    Select the most valuable groups of cases per node-hour fitting in a budget, order them longest first and
+    predict the start of their cases, which run one after the other in a slot of each partition of their group.
+    With a budget, the groups with a case of unknown size are deferred.
+    Args:
+        cases (list[TestCase]): Estimated test cases, in groups.
+        max_jobs (dict): Number of jobs run at once on each partition.
+        budget (float, optional): Node-hours available to the campaign.
+    """
+    result = CampaignPlan()
+    selected = []
+    used = 0.0
+    for members in sorted(groups(cases).values(), key=_value_per_node_hour, reverse=True):
+        node_hours = sum(case.node_hours for case in members)
+        unknown = any(case.estimate == "unknown" for case in members)
+        if budget is not None and (unknown or used + node_hours > budget):
+            result.deferred += members
+            continue
+
+        used += node_hours
+        selected.append(members)
+
+    selected.sort(
+        key=lambda members: (sum(case.runtime for case in members), max(case.nodes for case in members)), reverse=True
+    )
+
+    # Each group starts when a slot of every one of its partitions has become free
+    slots = {}
+    for members in selected:
+        partitions = sorted({case.partition for case in members})
+        free = [slots.setdefault(part, [0.0] * max_jobs.get(part, DEFAULT_MAX_JOBS)) for part in partitions]
+        start = max(heapq.heappop(part_slots) for part_slots in free)
+        for case in members:
+            case.start, start = start, start + case.runtime
+
+        for part_slots in free:
+            heapq.heappush(part_slots, start)
+
+        result.makespan = max(result.makespan, start)
+        result.selected += members
+
+    return result
+
+
+def print_plan(campaign: CampaignPlan):
+    """Print the planned cases in start order and the predicted makespan"""
+    print(f"{'start (h)':>9} {'runtime (h)':>11} {'nodes':>5} {'node-h':>8} {'value':>6}  test case [estimate]")
+    for case in campaign.selected + campaign.deferred:
+        start = "deferred" if case.start is None else f"{case.start / 3600:.2f}"
+        nodes, node_hours = ("?", "?") if case.estimate == "unknown" else (case.nodes, f"{case.node_hours:.2f}")
+        print(
+            f"{start:>9} {case.runtime / 3600:11.2f} {nodes:>5} {node_hours:>8} {case.value:6.1f}  "
+            f"{case.name} @{case.partition}+{case.environ} [{case.estimate}]"
+        )
+
+    unknown = sum(1 for case in campaign.selected if case.estimate == "unknown")
+    print(
+        f"{len(campaign.selected)} test cases, {campaign.node_hours:.1f} node-hours"
+        f"{f' and {unknown} of unknown size' if unknown else ''}, "
+        f"predicted makespan {campaign.makespan / 3600:.2f} h, {len(campaign.deferred)} deferred"
+    )
+
+
+def start_group(config: str, cases: list[TestCase], campaign_dir: str) -> subprocess.Popen:
+    """
+    Start the ReFrame run of a group of cases, with its own stage directory and report. The cases run one
+    after the other, so that the group holds a single slot of each of its partitions.
+    """
+    system, hashcodes, environs = run_selection(cases)
+    group = cases[0].group
+    cmd = [
+        "reframe",
+        "-C",
+        config,
+        "--system",
+        system,
+        *[
+            arg
+            for filename in sorted({case.filename for case in cases if not case.fixture})
+            for arg in ("-c", filename)
+        ],
+        *[arg for hashcode in sorted(hashcodes) for arg in ("-n", f"/{hashcode}")],
+        "-p",
+        f"^({'|'.join(re.escape(environ) for environ in sorted(environs))})$",
+        "--exec-policy",
+        "serial",
+        "--stage",
+        os.path.join(campaign_dir, "stage", group),
+        "--output",
+        os.path.join(campaign_dir, "output"),
+        "--report-file",
+        os.path.join(campaign_dir, "reports", f"{group}.json"),
+        "-r",
+    ]
+    # A report left by an earlier campaign would be taken for the result of this run
+    report_file = os.path.join(campaign_dir, "reports", f"{group}.json")
+    if os.path.exists(report_file):
+        os.remove(report_file)
+
+    os.makedirs(os.path.join(campaign_dir, "logs"), exist_ok=True)
+    with open(os.path.join(campaign_dir, "logs", f"{group}.log"), "w", encoding="utf-8") as log:
+        # In its own session, the run is neither interrupted nor hung up with the runner
+        return subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def save_state(path: str, campaign_id: str, cases: list[TestCase]):
+    """Write the state of a campaign, replacing the previous one atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as fp:
+        json.dump({"campaign": campaign_id, "cases": [asdict(case) for case in cases]}, fp, indent=2)
+
+    os.replace(f"{path}.tmp", path)
+
+
+def load_state(path: str) -> tuple[str, list[TestCase]]:
+    """Return the id and cases of the campaign saved in a state file, or None and no cases"""
+    try:
+        with open(path, encoding="utf-8") as fp:
+            state = json.load(fp)
+
+        return state["campaign"], [TestCase(**case) for case in state["cases"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, []
+
+
+def foreign_host(case: TestCase) -> bool:
+    """Return whether the ReFrame run of a case was started on another host, where its pid means nothing here"""
+    return case.host is not None and case.host != socket.gethostname()
+
+
+def process_alive(case: TestCase) -> bool:
+    """
+    Return whether the ReFrame run of the group of a case, possibly started by an earlier runner on this host,
+    is still alive
+    """
+    if case.pid is None:
+        return False
+
+    if foreign_host(case):
+        raise ValueError(f"the ReFrame run of {case.group} was started on {case.host}")
+
+    try:
+        with open(f"/proc/{case.pid}/cmdline", "rb") as fp:
+            # Process ids are reused, so the process must also be the run of this group
+            return case.group.encode() in fp.read()
+    except OSError:
+        return False
+
+
+def queued_jobs(campaign_dir: str) -> dict[str, list[str]]:
+    """
+    Return the ids of the pending and running Slurm jobs of the user by working directory, relative to the stage
+    directory of the campaign
+    """
+    cmd = ["squeue", "--me", "-h", "-o", "%i|%Z"]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+    stage = os.path.join(campaign_dir, "stage") + os.sep
+    jobs = {}
+    for line in completed.stdout.splitlines():
+        jobid, _, workdir = line.strip().partition("|")
+        if workdir.startswith(stage):
+            jobs.setdefault(os.path.normpath(workdir[len(stage) :]), []).append(jobid)
+
+    return jobs
+
+
+def group_jobs(queued: dict[str, list[str]], group: str) -> list[str]:
+    """Return the ids of the queued jobs run in the stage directory of a group"""
+    return [jobid for workdir, jobids in queued.items() if workdir.split(os.sep)[0] == group for jobid in jobids]
+
+
+def assign_jobs(cases: list[TestCase], queued: dict[str, list[str]]):
+    """
+    Add the queued jobs of a group to its cases, from their stage directory; jobs run elsewhere in the stage
+    directory of the group, such as packs, are added to its first case
+    """
+    for case in cases:
+        case.jobids = sorted(set(case.jobids) | set(queued.get(case.workdir, [])))
+
+    others = set(group_jobs(queued, cases[0].group)) - {jobid for case in cases for jobid in case.jobids}
+    cases[0].jobids = sorted(set(cases[0].jobids) | others)
+
+
+def report_testcases(campaign_dir: str, group: str) -> dict[str, dict]:
+    """
+    Return the test cases of the report of the ReFrame run of a group by case key, and the fixtures also by
+    hashcode, as a session fixture may run on another partition or environment than it was planned on
+    """
+    try:
+        with open(os.path.join(campaign_dir, "reports", f"{group}.json"), encoding="utf-8") as fp:
+            report = json.load(fp)
+
+        testcases = {}
+        for run_info in report["runs"]:
+            for testcase in run_info["testcases"]:
+                testcases[_case_key(testcase)] = testcase
+                if testcase["fixture"]:
+                    testcases[testcase["hashcode"]] = testcase
+
+        return testcases
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def job_node_hours(jobids: list[str]) -> float:
+    """Return the node-hours used by Slurm jobs according to sacct, or None if it is not available"""
+    if not jobids:
+        return None
+
+    cmd = ["sacct", "-X", "-n", "-P", "-j", ",".join(jobids), "-o", "JobID,ElapsedRaw,NNodes"]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    fields = [line.split("|") for line in completed.stdout.splitlines()]
+    return sum(float(elapsed) * int(nodes) for _, elapsed, nodes in fields) / 3600
+
+
+def record_case(ledger: str, campaign_id: str, case: TestCase, testcase: dict) -> dict:
+    """Append the actual consumption of a finished case, from its test case in the report and sacct, to the ledger"""
+    # Jobs run in a pack have no job id of their own, they are only known from squeue
+    jobids = set(case.jobids)
+    if testcase is not None:
+        for jobid in (testcase["jobid"], testcase["build_jobid"]):
+            if str(jobid).isdigit() and testcase["scheduler"] not in LOCAL_SCHEDULERS:
+                jobids.add(str(jobid))
+
+    entry = {
+        "campaign": campaign_id,
+        "case": case.key,
+        "test": case.name,
+        "partition": case.partition,
+        "environ": case.environ,
+        "jobids": sorted(jobids),
+        "estimated_node_hours": case.node_hours,
+        "node_hours": job_node_hours(sorted(jobids)),
+        "result": case.status,
+        "end": time.time(),
+    }
+    with open(ledger, "a", encoding="utf-8") as fp:
+        fp.write(json.dumps(entry) + "\n")
+
+    return entry
+
+
+def restart_killed(cases: list[TestCase], campaign_dir: str):
+    """Cancel the jobs of the running groups whose ReFrame run was killed with an earlier runner and run them again"""
+    for group, members in groups(cases).items():
+        first = members[0]
+        if first.status != "running" or foreign_host(first) or process_alive(first):
+            continue
+
+        if os.path.exists(os.path.join(campaign_dir, "reports", f"{group}.json")):
+            continue
+
+        # Without their ReFrame run the jobs would finish unchecked
+        jobids = group_jobs(queued_jobs(campaign_dir), group)
+        if jobids:
+            subprocess.run(["scancel", *jobids], check=False)
+
+        print(f"Restarting the group of {first.name} @{first.partition}+{first.environ}, its ReFrame run was killed")
+        for case in members:
+            case.status, case.pid, case.host, case.jobids = "pending", None, None, []
+
+
+def finish_group(ledger: str, campaign_id: str, cases: list[TestCase], campaign_dir: str):
+    """Set the result of the cases of a group whose ReFrame run ended from its report and record them"""
+    testcases = report_testcases(campaign_dir, cases[0].group)
+    for case in cases:
+        testcase = testcases.get(case.key, testcases.get(case.hashcode) if case.fixture else None)
+        case.status = "pass" if testcase is not None and testcase["result"] in PASSING_RESULTS else "fail"
+        record_case(ledger, campaign_id, case, testcase)
+        print(f"{'OK' if case.status == 'pass' else 'FAIL':4} {case.name} @{case.partition}+{case.environ}")
+
+
+def has_free_slots(cases: list[TestCase], group: str, max_jobs: dict[str, int]) -> bool:
+    """Return whether a slot of every partition of a group is free, a running group holding one of each of its own"""
+    members = groups(cases)
+    in_flight = Counter(
+        partition
+        for other in members.values()
+        if other[0].status == "running"
+        for partition in {case.partition for case in other}
+    )
+    return all(
+        in_flight[partition] < max_jobs.get(partition, DEFAULT_MAX_JOBS)
+        for partition in {case.partition for case in members[group]}
+    )
+
+
+def run(config: str, campaign_id: str, cases: list[TestCase], max_jobs: dict[str, int], campaign_dir: str) -> int:
+    """
+    Run the pending groups of cases in order, at most max_jobs at once per partition, and wait for the running
+    ones, saving the state of the campaign after every change; returns the number of failed cases
+    """
+    ledger = os.path.join(campaign_dir, "ledger.jsonl")
+    state_file = os.path.join(campaign_dir, STATE_FILE)
+    procs = {}
+    restart_killed(cases, campaign_dir)
+    save_state(state_file, campaign_id, cases)
+    while any(case.status not in FINISHED_STATES for case in cases):
+        members = groups(cases)
+        queued = queued_jobs(campaign_dir) if any(case.status == "running" for case in cases) else {}
+        for group, group_cases in members.items():
+            if group_cases[0].status != "running":
+                continue
+
+            assign_jobs(group_cases, queued)
+            if group in procs:
+                finished = procs[group].poll() is not None
+            else:
+                finished = not process_alive(group_cases[0])
+
+            if finished:
+                finish_group(ledger, campaign_id, group_cases, campaign_dir)
+
+        for group, group_cases in members.items():
+            if group_cases[0].status == "pending" and has_free_slots(cases, group, max_jobs):
+                procs[group] = start_group(config, group_cases, campaign_dir)
+                for case in group_cases:
+                    case.status, case.pid, case.host = "running", procs[group].pid, socket.gethostname()
+
+                save_state(state_file, campaign_id, cases)
+
+        save_state(state_file, campaign_id, cases)
+        if any(case.status == "running" for case in cases):
+            time.sleep(POLL_INTERVAL)
+
+    used = sum(entry["node_hours"] or 0.0 for entry in read_ledger(ledger) if entry["campaign"] == campaign_id)
+    print(f"{used:.1f} node-hours used of {sum(case.node_hours for case in cases):.1f} estimated, recorded in {ledger}")
+    return sum(1 for case in cases if case.status == "fail")
+
+
+def print_state(campaign_id: str, cases: list[TestCase]):
+    """Print the state of every case of a campaign"""
+    counts = Counter(case.status for case in cases)
+    print(f"Campaign {campaign_id}: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+    for case in cases:
+        print(f"  {case.status:8} {case.name} @{case.partition}+{case.environ} {','.join(case.jobids)}")
+
+
+def main(argv=None):  # pylint: disable=too-many-return-statements
+    """Command line interface; other options select the tests as for reframe"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0], allow_abbrev=False)
+    parser.add_argument("command", choices=["plan", "run", "status"])
+    parser.add_argument("-C", "--config", required=True, help="ReFrame configuration file")
+    parser.add_argument("--system", help="system or system:partition, by default the current system")
+    parser.add_argument("--max-jobs", type=int, help="jobs at once per partition, by default its max_jobs")
+    parser.add_argument("--budget", type=float, help="node-hours available to the campaign")
+    parser.add_argument("--history-days", type=float, default=HISTORY_DAYS, help="days of sacct history used")
+    parser.add_argument("--campaign-dir", default="campaign", help="stage, output, reports, logs, state and ledger")
+    parser.add_argument("--restart", action="store_true", help="plan a new campaign instead of resuming one")
+    parser.add_argument("--changed", action="store_true", help="only the cases whose dependencies changed")
+    args, select_args = parser.parse_known_args(argv)
+
+    campaign_dir = os.path.abspath(args.campaign_dir)
+    campaign_id, cases = load_state(os.path.join(campaign_dir, STATE_FILE))
+    if args.command == "status":
+        if not cases:
+            print(f"error: no campaign in {campaign_dir}", file=sys.stderr)
+            return 1
+
+        print_state(campaign_id, cases)
+        return 0
+
+    max_jobs = partition_max_jobs(args.config)
+    if args.max_jobs:
+        max_jobs = {partition: args.max_jobs for partition in max_jobs}
+
+    resume = args.command == "run" and not args.restart
+    if resume and any(case.status not in FINISHED_STATES for case in cases):
+        print_state(campaign_id, cases)
+        hosts = sorted({case.host for case in cases if case.status == "running" and foreign_host(case)})
+        if hosts:
+            print(f"error: campaign {campaign_id} is running on {', '.join(hosts)}, resume it there", file=sys.stderr)
+            return 1
+    else:
+        try:
+            cases = discover(args.config, args.system, select_args)
+        except (OSError, subprocess.CalledProcessError, ValueError) as err:
+            print(f"error: could not list the tests: {err}", file=sys.stderr)
+            return 1
+
+        if args.changed:
+            cases = changed_cases(cases)
+
+        assign_groups(cases)
+        estimate(cases, job_history(args.history_days))
+        assign_values(cases, read_ledger(os.path.join(campaign_dir, "ledger.jsonl")))
+        campaign = plan(cases, max_jobs, args.budget)
+        print_plan(campaign)
+        if args.command == "plan":
+            return 0
+
+        campaign_id, cases = time.strftime("%Y%m%dT%H%M%S"), campaign.selected
+
+    try:
+        return 1 if run(args.config, campaign_id, cases, max_jobs, campaign_dir) else 0
+    except KeyboardInterrupt:
+        print(f"Interrupted, running cases continue; run again with --campaign-dir {campaign_dir} to resume")
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Single-pass extraction of values from test output
+
+Tests that extract many values from the same file with sn.extractsingle read
+and scan the whole file once per value. OutputParser instead collects all the
+patterns used on a file, memory-maps the file once and locates the matches of
+all patterns in one pass with a combined regex. Each value then reads from the
+cached matches.
+
+Tests use it through OutputParserMixin. A pattern is registered when its
+extraction is created, so all of them should be created before the first one
+is evaluated, i.e. when the performance variables are set:
+
+    class IO500Benchmark(rfm.RunOnlyRegressionTest, OutputParserMixin):
+
+        def extract_test_bw(self, kind="mdtest-easy-write"):
+            patt = r"\\[RESULT\\]\\s+" + kind + r"\\s+(\\d+\\.?\\d*)\\s+"
+            return self.extract_perf(patt, self.stdout, "GiB/s", 1, float)
+
+        @run_before("performance")
+        def set_perf_variables(self):
+            self.perf_variables = {kind: self.extract_test_bw(kind) for kind in ...}
+
+Patterns registered after the file has been scanned trigger another scan.
+
+Values that are the last occurrence of a pattern in a long log, for which
+sn.extractsingle(..., item=-1) scans the whole file, are read with extractlast
+instead. It scans the memory-mapped file backwards in blocks and stops at the
+first block from the end that contains a match, optionally only within the
+last window bytes of the file.
+
+As with the reframe.utility.sanity functions, patterns are searched with the
+re.MULTILINE flag and each pattern gets the same non-overlapping matches as
+re.finditer on the whole file. Matching is done on bytes, so the character
+classes \\d, \\s and \\w only match ASCII characters.
+"""
+
+import mmap
+import os
+import re
+
+import reframe as rfm
+import reframe.utility.sanity as sn
+from reframe.core.exceptions import SanityError
+
+# Patterns with numbered backreferences cannot be renumbered into the combined regex
+_NUMBERED_BACKREF = re.compile(r"\\[1-9]")
+_NAMED_GROUP = re.compile(r"\(\?P([<=])(\w+)")
+
+# Size of the blocks read from the end of the file by extractlast
+TAIL_BLOCK_SIZE = 1 << 20
+
+# Length by which a match found in a block may extend past the end of the block
+TAIL_MATCH_OVERLAP = 1 << 16
+
+
+class Match:
+    """Decoded groups of a regex match, kept after the file is unmapped"""
+
+    __slots__ = ("groups", "named")
+
+    def __init__(self, match: re.Match):
+        self.groups = [None if g is None else g.decode(errors="replace") for g in match.groups()]
+        self.groups.insert(0, match.group(0).decode(errors="replace"))
+        self.named = match.re.groupindex
+
+    def group(self, tag=0) -> str:
+        """Return group tag, given as an index or a name, as re.Match.group does"""
+        return self.groups[self.named[tag] if isinstance(tag, str) else tag]
+
+
+def read_file(filename: str):
+    """Return the contents of filename as a memory map, or bytes for an empty file"""
+    with open(filename, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return b""
+
+        return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class OutputParser:
+    """Matches of a set of regex patterns in a single file, found in one pass over the file"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._pending = []
+        self._matches = {}
+
+    def register(self, patt: str):
+        """Register a pattern to be matched on the next scan of the file"""
+        if patt not in self._matches and patt not in self._pending:
+            self._pending.append(patt)
+
+    def matches(self, patt: str) -> list[Match]:
+        """Return the matches of patt, scanning the file for all pending patterns if needed"""
+        self.register(patt)
+        if self._pending:
+            self.scan()
+
+        return self._matches[patt]
+
+    def scan(self):
+        """Match all pending patterns in one pass over the file"""
+        patterns, self._pending = self._pending, []
+        try:
+            contents = read_file(self.filename)
+        except OSError as err:
+            raise SanityError(f"could not read {self.filename!r}: {err}") from err
+
+        try:
+            self._matches.update(find_all(patterns, contents))
+        finally:
+            if isinstance(contents, mmap.mmap):
+                contents.close()
+
+
+def _combined_alternative(index: int, patt: str) -> str:
+    """Rename the named groups of patt so that it can be combined with other patterns"""
+    return _NAMED_GROUP.sub(lambda m: f"(?P{m.group(1)}{m.group(2)}__{index}", patt)
+
+
+def find_all(patterns: list[str], contents) -> dict[str, list[Match]]:
+    """
+    Return all non-overlapping matches of every pattern in contents, as re.finditer would.
+    The combined regex only locates the positions where some pattern matches;
+    at each of them every pattern is tried, so patterns matching at the same or
+    overlapping positions are all found.
+    """
+    compiled = [re.compile(patt.encode(), re.MULTILINE) for patt in patterns]
+    matches = {patt: [] for patt in patterns}
+    combinable = [i for i, patt in enumerate(patterns) if not _NUMBERED_BACKREF.search(patt)]
+    for i in set(range(len(patterns))) - set(combinable):
+        matches[patterns[i]] = [Match(match) for match in compiled[i].finditer(contents)]
+
+    if not combinable:
+        return matches
+
+    combined = re.compile(
+        "|".join(f"(?:{_combined_alternative(i, patterns[i])})" for i in combinable).encode(), re.MULTILINE
+    )
+    # Position from which each pattern may match again, so that its matches do not overlap
+    next_pos = [0] * len(patterns)
+    pos = 0
+    while pos <= len(contents):
+        candidate = combined.search(contents, pos)
+        if candidate is None:
+            break
+
+        start = candidate.start()
+        for i in combinable:
+            if start < next_pos[i]:
+                continue
+
+            match = compiled[i].match(contents, start)
+            if match is not None:
+                matches[patterns[i]].append(Match(match))
+                next_pos[i] = match.end() if match.end() > start else start + 1
+
+        pos = start + 1
+
+    return matches
+
+
+def _group(match: Match, patt: str, tag, conv):
+    """Return the converted value of group tag of a match of patt"""
+    try:
+        val = match.group(tag)
+    except (IndexError, KeyError) as err:
+        raise SanityError(f"no such group in pattern {patt!r}: {tag}") from err
+
+    try:
+        return conv(val) if callable(conv) else val
+    except ValueError as err:
+        raise SanityError(f"could not convert value {val!r} using {getattr(conv, '__name__', conv)}()") from err
+
+
+@sn.deferrable
+def extractall(parser: OutputParser, patt: str, tag=0, conv=None) -> list:
+    """Like sn.extractall, reading the matches from an OutputParser"""
+    return [_group(match, patt, tag, conv) for match in parser.matches(patt)]
+
+
+@sn.deferrable
+def extractsingle(parser: OutputParser, patt: str, tag=0, conv=None, item: int = 0):
+    """Like sn.extractsingle, reading the matches from an OutputParser"""
+    matches = parser.matches(patt)
+    try:
+        return _group(matches[item], patt, tag, conv)
+    except IndexError as err:
+        raise SanityError(
+            f"not enough matches of pattern {patt!r} in file {parser.filename!r} so as to extract item {item!r}"
+        ) from err
+
+
+def find_last(patt: str, contents, window: int = None, block_size: int = TAIL_BLOCK_SIZE) -> Match:
+    """
+    Return the last match of patt in contents, or None, scanning blocks from the end.
+    Blocks start at the beginning of a line and a match may extend TAIL_MATCH_OVERLAP bytes
+    past the end of its block, so for line oriented patterns the result is the last match
+    re.finditer would return.
+    Args:
+        patt (str): Pattern, searched with re.MULTILINE.
+        contents: Bytes or memory map to search.
+        window (int, optional): Only search the last window bytes.
+        block_size (int): Number of bytes searched per step.
+    """
+    regex = re.compile(patt.encode(), re.MULTILINE)
+    size = len(contents)
+    limit = max(0, size - window) if window else 0
+    end = size
+    while end > limit:
+        start = max(limit, end - block_size)
+        if start > 0:
+            # Start at the beginning of a line so that anchors and leading context match
+            start = contents.rfind(b"\n", 0, start) + 1
+
+        endpos = min(size, end + TAIL_MATCH_OVERLAP)
+        if endpos < size:
+            endpos = contents.find(b"\n", endpos)
+            endpos = size if endpos < 0 else endpos + 1
+
+        last = None
+        for match in regex.finditer(contents, start, endpos):
+            if match.start() >= end:
+                break
+
+            last = match
+
+        if last is not None:
+            return Match(last)
+
+        end = start
+
+    return None
+
+
+@sn.deferrable
+def extractlast(patt: str, filename: str, tag=0, conv=None, window: int = None):
+    """
+    Equivalent of sn.extractsingle(patt, filename, tag, conv, item=-1) that only reads the file
+    from the end up to its last match, or at most its last window bytes.
+    """
+    try:
+        contents = read_file(filename)
+    except OSError as err:
+        raise SanityError(f"could not read {filename!r}: {err}") from err
+
+    try:
+        match = find_last(patt, contents, window)
+    finally:
+        if isinstance(contents, mmap.mmap):
+            contents.close()
+
+    if match is None:
+        where = f"the last {window} bytes of " if window else ""
+        raise SanityError(f"pattern {patt!r} not found in {where}file {filename!r}")
+
+    return _group(match, patt, tag, conv)
+
+
+class OutputParserMixin(rfm.RegressionMixin):
+    """Mixin giving a test one OutputParser per output file, shared by all its extractions"""
+
+    def output_parser(self, filename) -> OutputParser:
+        """Return the parser of filename, which may be a deferred expression such as self.stdout"""
+        filename = os.path.join(self.stagedir, sn.evaluate(filename))
+        try:
+            parsers = self._output_parsers
+        except AttributeError:
+            parsers = self._output_parsers = {}
+
+        if filename not in parsers:
+            parsers[filename] = OutputParser(filename)
+
+        return parsers[filename]
+
+    def extract_output(self, patt: str, filename, tag=0, conv=None, item: int = 0):
+        """Deferred equivalent of sn.extractsingle using the cached parser of filename"""
+        parser = self.output_parser(filename)
+        parser.register(patt)
+        return extractsingle(parser, patt, tag, conv, item)
+
+    def extract_perf(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, patt: str, filename, unit: str, tag=0, conv=None, item: int = 0
+    ):
+        """Performance function extracting a value with extract_output"""
+        return sn.make_performance_function(self.extract_output(patt, filename, tag, conv, item), unit)
+
+    def extract_output_all(self, patt: str, filename, tag=0, conv=None):
+        """Deferred equivalent of sn.extractall using the cached parser of filename"""
+        parser = self.output_parser(filename)
+        parser.register(patt)
+        return extractall(parser, patt, tag, conv)
@@ -0,0 +1,155 @@
+"""
+Slurm heterogeneous jobs
+
+A test inheriting from HetJobMixin declares the components of its job in
+het_groups, each with its number of nodes, tasks per node, CPUs per task,
+environment variables and, optionally, its own program:
+
+    het_groups = [
+        HetGroup(nodes=1, tasks_per_node=8, cpus_per_task=16, env_vars={"OMP_NUM_THREADS": "16"}),
+        HetGroup(nodes=2, tasks_per_node=4, executable="ioserver"),
+    ]
+
+The first component is the job ReFrame describes with num_tasks,
+num_tasks_per_node and num_cpus_per_task, which are set from it. The others
+follow it in the job script, each after an "#SBATCH hetjob" separator and
+with the time limit, access options, resources and command line job options
+of the test, so that they run on the same partition and QoS. The command line
+job options are also given to the first component. The program is launched
+by HetjobSrunLauncher as one srun step spanning all components, sharing
+MPI_COMM_WORLD, with the launcher options of the test in each component:
+
+    srun --het-group=0 --nodes=1 --ntasks=8 ... xthi : --het-group=1 --nodes=2 --ntasks=8 ... ioserver
+
+Components without their own program run the executable of the test.
+"""
+
+import shlex
+from dataclasses import dataclass, field, replace
+
+import reframe as rfm
+import reframe.utility.typecheck as typ
+from reframe.core.builtins import run_before, variable
+from reframe.core.launchers import JobLauncher
+from reframe.utility import seconds_to_hms
+
+# Separator of the components of a heterogeneous job in a Slurm batch script
+HETJOB_SEPARATOR = "#SBATCH hetjob"
+
+
+@dataclass
+class HetGroup:
+    """Component of a heterogeneous job and the program it runs"""
+
+    nodes: int
+    tasks_per_node: int
+    cpus_per_task: int = None
+    env_vars: dict = field(default_factory=dict)
+    executable: str = None
+    executable_opts: list = field(default_factory=list)
+
+    #: Further sbatch options of the component
+    options: list = field(default_factory=list)
+
+    @property
+    def num_tasks(self) -> int:
+        """Number of tasks of the component"""
+        return self.nodes * self.tasks_per_node
+
+    def sbatch_options(self) -> list[str]:
+        """Return the sbatch options allocating the component"""
+        options = [f"--nodes={self.nodes}", f"--ntasks={self.num_tasks}", f"--ntasks-per-node={self.tasks_per_node}"]
+        if self.cpus_per_task:
+            options.append(f"--cpus-per-task={self.cpus_per_task}")
+
+        return options + self.options
+
+    def srun_options(self) -> list[str]:
+        """Return the srun options of the component in the launch line"""
+        options = [f"--nodes={self.nodes}", f"--ntasks={self.num_tasks}", f"--ntasks-per-node={self.tasks_per_node}"]
+        if self.cpus_per_task:
+            options.append(f"--cpus-per-task={self.cpus_per_task}")
+
+        if self.env_vars:
+            options.append(shlex.quote(",".join(["--export=ALL", *(f"{k}={v}" for k, v in self.env_vars.items())])))
+
+        return options
+
+
+class HetjobSrunLauncher(JobLauncher):
+    """
+    srun launching a program on every component of the heterogeneous job of job.het_groups. The
+    executable of the test, appended to the launch line by ReFrame, is the program of the last one.
+    The launcher options apply to each component, so they are repeated in each of them.
+    """
+
+    def command(self, job):
+        cmd = ["srun"]
+        for i, group in enumerate(job.het_groups):
+            if i > 0:
+                cmd.append(":")
+
+            cmd += [f"--het-group={i}", *group.srun_options(), *self.options]
+            if i < len(job.het_groups) - 1:
+                cmd += [group.executable, *group.executable_opts]
+
+        return cmd
+
+    def run_command(self, job):
+        # The options are in the command of each component rather than at its end
+        modifier = [self.modifier, *self.modifier_options] if self.modifier else []
+        return " ".join([*modifier, *self.command(job)])
+
+
+class HetJobMixin(rfm.RegressionMixin):
+    """Mixin running a test as a Slurm heterogeneous job of the components in het_groups"""
+
+    #: Components of the job, in order
+    het_groups = variable(typ.List[HetGroup], value=[])
+
+    @run_before("run")
+    def setup_hetjob(self):
+        """Size the job as its first component, add the others to the job script and launch all of them"""
+        if not self.het_groups:
+            return
+
+        first = self.het_groups[0]
+        self.num_tasks = first.num_tasks
+        self.num_tasks_per_node = first.tasks_per_node
+        self.num_cpus_per_task = first.cpus_per_task
+        self.job.options += [f"--nodes={first.nodes}", *first.options]
+
+        # Resources are only added to the job options when it is submitted
+        shared = list(self.job.sched_access)
+        for name, values in self.extra_resources.items():
+            shared += self.current_partition.get_resource(name, **values)
+
+        if self.time_limit:
+            hours, minutes, seconds = map(int, seconds_to_hms(self.time_limit))
+            shared.append(f"--time={hours}:{minutes}:{seconds}")
+
+        if self.exclusive_access:
+            shared.append("--exclusive")
+
+        # Command line job options are added after the job options, so in the last component
+        if len(self.het_groups) > 1:
+            self.job.options += self.job.cli_options
+
+        for i, group in enumerate(self.het_groups[1:], start=1):
+            cli_options = self.job.cli_options if i < len(self.het_groups) - 1 else []
+            self.job.options += [HETJOB_SEPARATOR]
+            self.job.options += [f"#SBATCH {opt}" for opt in [*shared, *group.sbatch_options(), *cli_options]]
+
+        groups = [
+            (
+                group
+                if group.executable
+                else replace(group, executable=self.executable, executable_opts=self.executable_opts)
+            )
+            for group in self.het_groups
+        ]
+        self.executable, self.executable_opts = groups[-1].executable, list(groups[-1].executable_opts)
+        launcher = HetjobSrunLauncher()
+        launcher.options = self.job.launcher.options
+        self.job.launcher = launcher
+        self.job.het_groups = groups
@@ -0,0 +1,96 @@
+"""
+References derived from the performance history
+
+HistoryReferenceMixin replaces the static reference of a test with a rolling
+baseline of its last successful runs recorded by the "sqlite" perflog handler.
+The static reference is kept for any performance variable without enough
+history, and for those left out of history_perf_vars, such as correctness
+checks of an energy. The last runs of every test of a partition are read with
+a single indexed query, which is cached for the whole ReFrame session.
+"""
+
+import functools
+import os
+
+import reframe as rfm
+import reframe.core.runtime as rt
+import reframe.utility.typecheck as typ
+from reframe.core.builtins import run_before, variable
+
+from epcc_reframe.perflog import PerflogStore, store_path
+from epcc_reframe.regression import suggest_reference
+
+
+@functools.lru_cache(maxsize=None)
+def partition_history(path: str, system: str, num_runs: int) -> dict:
+    """
+    Return the last num_runs successful values of every series of a system:partition,
+    as {(environ, test, perf_var): (unit, [values, newest first])}.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    series = {}
+    with PerflogStore(path) as store:
+        for row in store.last_values_by_series(system, num_runs):
+            if row["value"] is None:
+                continue
+
+            key = (row["environ"], row["test"], row["perf_var"])
+            series.setdefault(key, (row["unit"], []))[1].append(row["value"])
+
+    return series
+
+
+class HistoryReferenceMixin(rfm.RegressionMixin):
+    """Mixin setting the reference of a test from its performance history"""
+
+    #: Number of last successful runs used as the baseline
+    history_num_runs = variable(int, value=10)
+
+    #: Minimum number of runs needed to replace the static reference
+    history_min_runs = variable(int, value=3)
+
+    #: Width of the reference thresholds in robust standard deviations
+    history_tolerance = variable(float, value=3.0)
+
+    #: Path of the history database, by default the one of the sqlite perflog handler
+    history_db = variable(str, type(None), value=None)
+
+    #: Performance variables whose reference is taken from the history, by default all of them
+    history_perf_vars = variable(typ.List[str], type(None), value=None)
+
+    def history_values(self, perf_var: str) -> tuple[str, list[float]]:
+        """Return the unit and the last successful values of a performance variable of the test, newest first"""
+        path = self.history_db or store_path(rt.runtime().site_config)
+        if path is None:
+            return None, []
+
+        history = partition_history(path, self.current_partition.fullname, self.history_num_runs)
+        # Runs imported from text perflogs have no programming environment
+        return history.get(
+            (self.current_environ.name, self.display_name, perf_var),
+            history.get((None, self.display_name, perf_var), (None, [])),
+        )
+
+    def set_history_references(self, perf_vars):
+        """Replace the reference of performance variables with a baseline from the history, if there is enough"""
+        partition = self.current_partition.fullname
+        for perf_var in perf_vars:
+            unit, values = self.history_values(perf_var)
+            if len(values) < self.history_min_runs:
+                continue
+
+            self.reference[f"{partition}:{perf_var}"] = suggest_reference(values, unit, self.history_tolerance)
+
+    @run_before("performance")
+    def set_history_reference(self):
+        """Replace the reference of each performance variable with a baseline from the history"""
+        if self.history_perf_vars is not None:
+            self.set_history_references(self.history_perf_vars)
+            return
+
+        # The references of the partition include those of its system and of the global scope
+        self.set_history_references(
+            set(self.perf_variables) | set(self.reference.scope(self.current_partition.fullname))
+        )
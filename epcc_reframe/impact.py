@@ -0,0 +1,216 @@
+"""
+Change-impact selection of tests from fingerprints of their software stack
+
+After an update of the software stack only the tests depending on what
+changed need to run again. Tests that inherit from ImpactMixin record, each
+time they pass, the fingerprint of their dependencies:
+
+  - the programming environment and the modules loaded for the test, with
+    the versions they resolve to;
+  - the shared libraries linked by the executable, from ldd in the job, with
+    the file each one resolves to, its size and modification time;
+  - the Python files of the directory of the test.
+
+Records are JSON files named after the test case, as campaign test case keys,
+in EPCC_REFRAME_IMPACT (by default ~/.reframe/impact). The campaign --changed
+option recomputes the fingerprint of each selected case from its record and
+only keeps the cases that changed or have no record:
+
+    python -m epcc_reframe.campaign plan -C configuration/archer2.py --system archer2 --changed -c tests -R
+"""
+
+import glob
+import hashlib
+import inspect
+import json
+import os
+import re
+import shlex
+import time
+
+import reframe as rfm
+import reframe.core.runtime as rt
+import reframe.utility.typecheck as typ
+from reframe.core.builtins import run_after, run_before, variable
+
+from epcc_reframe.buildcache import ModulesListError, hash_file, loaded_modules
+
+# Environment variable giving the directory of the fingerprint records
+IMPACT_DIR_ENV = "EPCC_REFRAME_IMPACT"
+
+# Directory of the fingerprint records if IMPACT_DIR_ENV is not set
+DEFAULT_IMPACT_DIR = os.path.join(os.path.expanduser("~"), ".reframe", "impact")
+
+# File of the stage directory the job writes the ldd output of the binaries to
+LDD_FILE = "rfm_impact_ldd.txt"
+
+# Library of an ldd line, "libm.so.6 => /lib64/libm.so.6 (0x...)" or "/lib64/ld-linux-x86-64.so.2 (0x...)"
+_LDD_LINE = re.compile(r"^\s*(?:\S+\s+=>\s+)?(?P<path>/\S+)\s+\(0x[0-9a-f]+\)", re.MULTILINE)
+
+
+def library_signatures(paths: list[str]) -> dict[str, list]:
+    """Return the file each library path resolves to with its size and modification time, None if missing"""
+    signatures = {}
+    for path in paths:
+        real = os.path.realpath(path)
+        try:
+            stat = os.stat(real)
+            signatures[path] = [real, stat.st_size, int(stat.st_mtime)]
+        except OSError:
+            signatures[path] = None
+
+    return signatures
+
+
+def sources_digest(test_file: str) -> str:
+    """Return the digest of the Python files of the directory of a test, which holds its base classes"""
+    paths = sorted(glob.glob(os.path.join(os.path.dirname(test_file), "*.py")))
+    return hashlib.sha256(" ".join(f"{os.path.basename(p)}:{hash_file(p)}" for p in paths).encode()).hexdigest()
+
+
+def fingerprint(components: dict) -> str:
+    """Return the fingerprint of the dependencies of a test case"""
+    return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+
+
+class ImpactRecords:
+    """Fingerprint records of the test cases in a directory"""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.environ.get(IMPACT_DIR_ENV, DEFAULT_IMPACT_DIR)
+        self._modules = {}
+
+    def path(self, key: str) -> str:
+        """Return the path of the record of a test case"""
+        return os.path.join(self.root, f"{key}.json")
+
+    def modules(self, load_cmds: list[str], nomod: bool = False) -> list[str]:
+        """Return the modules loaded by load_cmds with their versions, resolving each set once"""
+        if tuple(load_cmds) not in self._modules:
+            self._modules[tuple(load_cmds)] = loaded_modules(load_cmds, nomod)
+
+        return self._modules[tuple(load_cmds)]
+
+    def components(
+        self, environ: str, load_cmds: list[str], libraries: list[str], test_file: str, nomod: bool = False
+    ) -> dict:
+        """Return the current dependencies of a test case, nomod if the system has no environment modules"""
+        return {
+            "environ": environ,
+            "modules": self.modules(load_cmds, nomod),
+            "libraries": library_signatures(libraries),
+            "sources": sources_digest(test_file),
+        }
+
+    def record(self, key: str, record: dict):
+        """Write the record of a test case, replacing the previous one atomically"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(f"{self.path(key)}.tmp", "w", encoding="utf-8") as fp:
+            json.dump(record, fp, indent=2)
+
+        os.replace(f"{self.path(key)}.tmp", self.path(key))
+
+    def changes(self, key: str, test_file: str) -> list[str]:
+        """Return what changed in the dependencies of a test case since it last passed, nothing if unchanged"""
+        try:
+            with open(self.path(key), encoding="utf-8") as fp:
+                record = json.load(fp)
+        except (OSError, ValueError):
+            return ["no record"]
+
+        previous = record["components"]
+        try:
+            current = self.components(
+                previous["environ"],
+                record["load_cmds"],
+                list(previous["libraries"]),
+                test_file,
+                record.get("modules_system") == "nomod",
+            )
+        except ModulesListError:
+            return ["modules not listed"]
+
+        if fingerprint(current) == record["fingerprint"]:
+            return []
+
+        changes = []
+        removed = sorted(set(previous["modules"]) - set(current["modules"]))
+        added = sorted(set(current["modules"]) - set(previous["modules"]))
+        if removed or added:
+            changes.append("modules " + ", ".join([*(f"-{m}" for m in removed), *(f"+{m}" for m in added)]))
+
+        libraries = [
+            path for path, signature in current["libraries"].items() if previous["libraries"][path] != signature
+        ]
+        if libraries:
+            changes.append("libraries " + ", ".join(os.path.basename(path) for path in libraries))
+
+        if previous["sources"] != current["sources"]:
+            changes.append("test sources")
+
+        return changes or ["fingerprint"]
+
+
+class ImpactMixin(rfm.RegressionMixin):
+    """Mixin recording the fingerprint of the dependencies of a test when it passes"""
+
+    #: Directory of the fingerprint records
+    impact_dir = variable(str, value=os.environ.get(IMPACT_DIR_ENV, DEFAULT_IMPACT_DIR))
+
+    #: Binaries whose linked libraries are part of the fingerprint, by default the executable
+    impact_binaries = variable(typ.List[str], type(None), value=None)
+
+    @run_before("run", always_last=True)
+    def list_linked_libraries(self):
+        """List the libraries linked by the binaries in the job, where the modules of the test are loaded"""
+        binaries = self.impact_binaries
+        if binaries is None:
+            binaries = shlex.split(self.executable)[:1] if self.executable else []
+
+        # The file is created even without binaries, its absence means the job did not complete
+        self.postrun_cmds.append(f"touch {LDD_FILE}")
+        for binary in binaries:
+            self.postrun_cmds.append(f'ldd "$(command -v {shlex.quote(binary)})" >> {LDD_FILE} 2>&1 || true')
+
+    @run_after("performance")
+    def record_impact_fingerprint(self):
+        """Record the fingerprint of the dependencies of the test, which has passed"""
+        if self.is_dry_run():
+            return
+
+        try:
+            with open(os.path.join(self.stagedir, LDD_FILE), encoding="utf-8") as fp:
+                libraries = sorted(set(match["path"] for match in _LDD_LINE.finditer(fp.read())))
+        except OSError as err:
+            self.logger.debug(f"impact: cannot read the linked libraries: {err}, not recording")
+            return
+
+        modules_system = rt.runtime().modules_system
+        modules = [*self.current_partition.local_env.modules, *self.current_environ.modules, *self.modules]
+        load_cmds = [cmd for module in modules for cmd in modules_system.emit_load_commands(module)]
+        records = ImpactRecords(self.impact_dir)
+        try:
+            components = records.components(
+                self.current_environ.name,
+                load_cmds,
+                libraries,
+                inspect.getfile(type(self)),
+                modules_system.name == "nomod",
+            )
+        except ModulesListError as err:
+            self.logger.debug(f"impact: {err}, not recording")
+            return
+
+        key = f"{self.hashcode}_{self.current_partition.fullname.replace(':', '_')}_{self.current_environ.name}"
+        records.record(
+            key,
+            {
+                "test": self.display_name,
+                "partition": self.current_partition.fullname,
+                "load_cmds": load_cmds,
+                "modules_system": modules_system.name,
+                "components": components,
+                "fingerprint": fingerprint(components),
+                "time": time.time(),
+            },
+        )
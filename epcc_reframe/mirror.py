@@ -0,0 +1,309 @@
+"""
+Local mirror of source tarballs, git repositories and container images
+
+Tests that fetch their sources or containers from the network consult an
+artifact mirror on a shared filesystem first, so that repeated campaigns do
+not download them again and builds do not depend on the network:
+
+  - files (e.g. source tarballs) are stored under files/<host>/<path>;
+  - git repositories are bare mirrors under git/<host>/<path>, cloned from
+    with a file:// URL and updated with git fetch at most every
+    mirror_refresh_hours;
+  - container images are pulled with singularity into
+    containers/<host>/<path>:<tag>.sif, with the latest tag if the image has
+    neither a tag nor a digest.
+
+Each file and image has a <name>.sha256 checksum next to it, either the one
+pinned by the test or the one computed when it was first downloaded, and is
+verified against it every time it is used. Tests pin the checksums of the
+releases they download, which are also checked without a mirror.
+
+The mirror is enabled by setting the EPCC_REFRAME_MIRROR environment variable,
+or the mirror_dir variable of ArtifactMirrorMixin, to its directory. Fetch
+jobs run this module to fetch into the mirror and copy to their stage
+directory:
+
+    python -m epcc_reframe.mirror /path/to/mirror fetch https://example.org/src.tar.gz
+    python -m epcc_reframe.mirror /path/to/mirror container docker://ghcr.io/org/image --output image_latest.sif
+    python -m epcc_reframe.mirror /path/to/mirror verify
+"""
+
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+import reframe as rfm
+from reframe.core.builtins import variable
+
+# Environment variable giving the default mirror directory
+MIRROR_ENV = "EPCC_REFRAME_MIRROR"
+
+# Suffix of the checksum file stored next to each mirrored file
+CHECKSUM_SUFFIX = ".sha256"
+
+# Directory containing the epcc_reframe package, added to the PYTHONPATH of fetch jobs
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MirrorError(Exception):
+    """Error fetching or verifying an artifact of the mirror"""
+
+
+def sha256sum(path: str) -> str:
+    """Return the sha256 hex digest of the contents of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def _locked(path: str):
+    """Hold an exclusive lock on path.lock, so concurrent sessions fetch an artifact once"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "w", encoding="utf-8") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _url_path(url: str) -> str:
+    """Return host/path of a URL, used as the relative path of its artifact in the mirror"""
+    parsed = urllib.parse.urlparse(url)
+    return os.path.normpath(os.path.join(parsed.netloc, parsed.path.lstrip("/")))
+
+
+def _image_path(uri: str) -> str:
+    """Return host/path:tag of a container image URI, used as the relative path of its image in the mirror"""
+    path = _url_path(uri)
+    name = os.path.basename(path)
+    if ":" not in name and "@" not in name:
+        path += ":latest"
+
+    return path
+
+
+class ArtifactMirror:
+    """Mirror of artifacts in a directory"""
+
+    def __init__(self, root: str, refresh_hours: float = 24.0):
+        self.root = root
+        self.refresh_hours = refresh_hours
+
+    def verify(self, path: str, sha256: str = None):
+        """Verify path against the pinned sha256 or its stored checksum, recording it if there is none"""
+        actual = sha256sum(path)
+        checksum_file = path + CHECKSUM_SUFFIX
+        if sha256 is None and os.path.exists(checksum_file):
+            with open(checksum_file, encoding="utf-8") as fp:
+                sha256 = fp.read().split()[0]
+
+        if sha256 is not None and actual != sha256:
+            raise MirrorError(f"checksum mismatch for {path}: expected {sha256}, got {actual}")
+
+        if not os.path.exists(checksum_file):
+            with open(checksum_file, "w", encoding="utf-8") as fp:
+                fp.write(f"{actual}  {os.path.basename(path)}\n")
+
+    def _download(self, path: str, download, sha256: str = None):
+        """Create path by calling download(tmp_path), atomically and only if it matches sha256"""
+        fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            download(tmp)
+            actual = sha256sum(tmp)
+            if sha256 is not None and actual != sha256:
+                raise MirrorError(f"checksum mismatch for {path}: expected {sha256}, got {actual}")
+
+            os.rename(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def fetch_file(self, url: str, sha256: str = None) -> str:
+        """Return the path of the verified mirror copy of url, downloading it if needed"""
+        path = os.path.join(self.root, "files", _url_path(url))
+        with _locked(path):
+            if not os.path.exists(path):
+
+                def download(tmp):
+                    with urllib.request.urlopen(url, timeout=300) as response, open(tmp, "wb") as fp:
+                        shutil.copyfileobj(response, fp)
+
+                self._download(path, download, sha256)
+
+            self.verify(path, sha256)
+
+        return path
+
+    def fetch_container(self, uri: str, sha256: str = None) -> str:
+        """Return the path of the verified mirror copy of a container image, pulling it if needed"""
+        path = os.path.join(self.root, "containers", _image_path(uri) + ".sif")
+        with _locked(path):
+            if not os.path.exists(path):
+
+                def pull(tmp):
+                    subprocess.run(["singularity", "pull", "--force", tmp, uri], check=True)
+
+                self._download(path, pull, sha256)
+
+            self.verify(path, sha256)
+
+        return path
+
+    def git_url(self, url: str) -> str:
+        """
+        Return the file:// URL of the mirror of a git repository, creating it or updating it if it
+        was last updated more than refresh_hours ago. An existing mirror is used as is if the
+        update fails, e.g. without network access.
+        """
+        path = os.path.join(self.root, "git", _url_path(url))
+        if not path.endswith(".git"):
+            path += ".git"
+
+        with _locked(path):
+            if not os.path.exists(path):
+                self._git(["clone", "--mirror", url, path])
+            elif time.time() - os.path.getmtime(path) > self.refresh_hours * 3600:
+                try:
+                    self._git(["--git-dir", path, "fetch", "--prune", "origin"])
+                except MirrorError:
+                    pass
+
+                os.utime(path)
+
+        # ReFrame only clones a sourcesdir URL with a host
+        return f"file://localhost{os.path.abspath(path)}"
+
+    @staticmethod
+    def _git(args: list[str]):
+        """Run a git command, raising MirrorError if it fails"""
+        completed = subprocess.run(["git", *args], capture_output=True, text=True, check=False)
+        if completed.returncode != 0:
+            raise MirrorError(f"git {' '.join(args)} failed: {completed.stderr.strip()}")
+
+    def verify_all(self) -> list[str]:
+        """Verify every file and image against its stored checksum; returns the failures"""
+        failures = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(CHECKSUM_SUFFIX):
+                    continue
+
+                path = os.path.join(dirpath, name[: -len(CHECKSUM_SUFFIX)])
+                try:
+                    self.verify(path)
+                except (OSError, MirrorError) as err:
+                    failures.append(f"{path}: {err}")
+
+        return failures
+
+
+class ArtifactMirrorMixin(rfm.RegressionMixin):
+    """Mixin giving a test the commands and URLs to fetch its artifacts through the mirror"""
+
+    #: Directory of the artifact mirror, artifacts are fetched directly if None
+    mirror_dir = variable(str, type(None), value=os.environ.get(MIRROR_ENV))
+
+    #: Minimum time between updates of a git mirror
+    mirror_refresh_hours = variable(float, value=24.0)
+
+    def _mirror_cmd(self, *args) -> str:
+        """Return the shell command running this module with args"""
+        return " ".join(
+            [
+                f"PYTHONPATH={shlex.quote(PACKAGE_ROOT)}",
+                shlex.quote(sys.executable),
+                "-m epcc_reframe.mirror",
+                shlex.quote(self.mirror_dir),
+                *map(shlex.quote, args),
+            ]
+        )
+
+    def fetch_cmd(self, url: str, sha256: str = None) -> str:
+        """Return the shell command downloading url into the current directory, checking it against sha256"""
+        if not self.mirror_dir:
+            if not sha256:
+                return f"wget {url}"
+
+            name = shlex.quote(os.path.basename(urllib.parse.urlparse(url).path))
+            return (
+                f"wget {url} && {{ printf '%s  %s\\n' {sha256} {name} | sha256sum --check --status || "
+                f"{{ echo error: checksum mismatch for {name} >&2; exit 1; }}; }}"
+            )
+
+        return self._mirror_cmd("fetch", url, *(["--sha256", sha256] if sha256 else []))
+
+    def pull_cmd(self, uri: str, output: str, sha256: str = None) -> str:
+        """Return the shell command pulling a container image into output in the current directory"""
+        if not self.mirror_dir:
+            return f"singularity pull {output} {uri}"
+
+        return self._mirror_cmd("container", uri, "--output", output, *(["--sha256", sha256] if sha256 else []))
+
+    def git_url(self, url: str) -> str:
+        """Return the URL to clone a git repository from, updating its mirror if needed"""
+        if not self.mirror_dir:
+            return url
+
+        try:
+            return ArtifactMirror(self.mirror_dir, self.mirror_refresh_hours).git_url(url)
+        except MirrorError as err:
+            self.logger.warning(f"cloning {url} directly: {err}")
+            return url
+
+
+def main(argv=None):
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("mirror_dir")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fetch_parser = subparsers.add_parser("fetch", help="copy a file from the mirror, downloading it if needed")
+    fetch_parser.add_argument("url")
+    fetch_parser.add_argument("--sha256")
+    fetch_parser.add_argument("--output", help="destination, by default the file name of the URL")
+    container_parser = subparsers.add_parser("container", help="copy a container image, pulling it if needed")
+    container_parser.add_argument("uri")
+    container_parser.add_argument("--output", required=True)
+    container_parser.add_argument("--sha256")
+    subparsers.add_parser("verify", help="verify all files and images against their checksums")
+    args = parser.parse_args(argv)
+
+    mirror = ArtifactMirror(args.mirror_dir)
+    try:
+        if args.command == "fetch":
+            path = mirror.fetch_file(args.url, args.sha256)
+            shutil.copy2(path, args.output or os.path.basename(path))
+        elif args.command == "container":
+            path = mirror.fetch_container(args.uri, args.sha256)
+            shutil.copy2(path, args.output)
+        else:
+            failures = mirror.verify_all()
+            for failure in failures:
+                print(failure, file=sys.stderr)
+
+            return 1 if failures else 0
+    except (OSError, MirrorError, subprocess.CalledProcessError) as err:
+        print(f"error: {err}", file=sys.stderr)
+        return 1
+
+    print(f"{args.command}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Metrics of the MLPerf training benchmarks
+
+The ResNet50, CosmoFlow and DeepCam training scripts print the same per-epoch
+log lines. MLPerfMetricsMixin registers the patterns of all of them on the
+OutputParser of the job output, so the whole training log is read in a single
+pass however many metrics are reported.
+
+Besides the mean of every per-epoch metric, the throughput and the epoch
+length are reported per epoch, as their median and 95th percentile, and as a
+mean excluding the first warmup_epochs epochs, which are usually slower as
+data is loaded into the caches and the framework compiles its kernels.
+"""
+
+import math
+
+import reframe.utility.sanity as sn
+import reframe.utility.typecheck as typ
+from reframe.core.builtins import run_before, variable
+from reframe.core.exceptions import SanityError
+
+from epcc_reframe.extraction import OutputParserMixin
+
+# Pattern and unit of each metric printed by the training scripts
+MLPERF_METRICS = {
+    "Throughput": (r"Processing Speed: (.*)", "inputs/s"),
+    "Epoch Length": (r"Time For Epoch: (.*)", "s"),
+    "Communication Time": (r"Communication Time: (.*)", "s"),
+    "Total IO Time": (r"Total IO Time: (.*)", "s"),
+    "Delta Loss": (r"Change In Train Loss at Epoch: (.*)", ""),
+    "Avg GPU Power Draw": (r"Avg GPU Power Draw: (.*)", "W"),
+    "Avg GPU Utilization": (r"Avg GPU Utilization: (.*)", "%"),
+}
+
+# Metrics printed once per run, the others are printed once per epoch
+SINGLE_VALUE_METRICS = {"Delta Loss", "Avg GPU Power Draw", "Avg GPU Utilization"}
+
+# Per-epoch metrics also reported per epoch, as percentiles and excluding the warm-up
+SERIES_METRICS = ("Throughput", "Epoch Length")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the q-th percentile of values, interpolating linearly between the closest ranks"""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def _steady(values: list[float], skip: int, metric: str) -> list[float]:
+    """Return values without the first skip epochs, or all of them if there are no more epochs"""
+    if not values:
+        raise SanityError(f"no values of {metric!r} found in the training log")
+
+    return values[skip:] or values
+
+
+@sn.deferrable
+def epoch_mean(values: list[float], metric: str, skip: int = 0) -> float:
+    """Mean of the per-epoch values of a metric, excluding the first skip epochs"""
+    steady = _steady(values, skip, metric)
+    return sum(steady) / len(steady)
+
+
+@sn.deferrable
+def epoch_percentile(values: list[float], metric: str, q: float, skip: int = 0) -> float:
+    """q-th percentile of the per-epoch values of a metric, excluding the first skip epochs"""
+    return percentile(_steady(values, skip, metric), q)
+
+
+class MLPerfMetricsMixin(OutputParserMixin):
+    """Mixin reporting the training log metrics of the MLPerf benchmarks as performance variables"""
+
+    #: Metrics reported, from MLPERF_METRICS
+    mlperf_metrics = variable(
+        typ.List[str],
+        value=["Throughput", "Epoch Length", "Delta Loss", "Communication Time", "Total IO Time"],
+    )
+
+    #: Number of first epochs excluded from the steady state statistics
+    warmup_epochs = variable(int, value=1)
+
+    def extract_metric(self, metric: str):
+        """Performance function of the mean of a per-epoch metric, or of a metric printed once"""
+        patt, unit = MLPERF_METRICS[metric]
+        if metric in SINGLE_VALUE_METRICS:
+            return self.extract_perf(patt, self.stdout, unit, 1, float)
+
+        values = self.extract_output_all(patt, self.stdout, 1, float)
+        return sn.make_performance_function(epoch_mean(values, metric), unit)
+
+    def series_perf_variables(self, metric: str) -> dict:
+        """Performance variables of the per-epoch values of a metric and of their statistics"""
+        patt, unit = MLPERF_METRICS[metric]
+        values = self.extract_output_all(patt, self.stdout, 1, float)
+        perf_variables = {
+            f"{metric} (excl. warm-up)": sn.make_performance_function(
+                epoch_mean(values, metric, self.warmup_epochs), unit
+            ),
+            f"{metric} p50": sn.make_performance_function(
+                epoch_percentile(values, metric, 50, self.warmup_epochs), unit
+            ),
+            f"{metric} p95": sn.make_performance_function(
+                epoch_percentile(values, metric, 95, self.warmup_epochs), unit
+            ),
+        }
+        # Dry runs have no log to count the epochs of
+        if self.is_dry_run():
+            return perf_variables
+
+        for epoch in range(len(self.output_parser(self.stdout).matches(patt))):
+            perf_variables[f"{metric} epoch {epoch}"] = sn.make_performance_function(values[epoch], unit)
+
+        return perf_variables
+
+    @run_before("performance")
+    def set_mlperf_perf_variables(self):
+        """Set the performance variables of all metrics, which are then extracted in one pass"""
+        for metric in self.mlperf_metrics:
+            self.perf_variables[metric] = self.extract_metric(metric)
+
+        # The number of epochs is read from the log once all patterns are registered
+        for metric in SERIES_METRICS:
+            if metric in self.mlperf_metrics:
+                self.perf_variables.update(self.series_perf_variables(metric))
@@ -0,0 +1,92 @@
+"""
+Message size curves of the OSU micro-benchmarks
+
+The OSU benchmarks print one line per message size, with the size in bytes
+followed by the latency or bandwidth. Tests inheriting from OSUCurveMixin
+report every line of the output as a performance variable named after the
+performance variable of the test and the size, e.g. latency_8 or
+bandwidth_4194304, so the whole curve is kept in the performance history.
+
+The reference of each size is the baseline of its last successful runs, as
+with HistoryReferenceMixin. The curve as a whole is compared with the
+reference curve, the median of each size, by curve_ratio: the area under the
+ratio of the curve to its reference over the log2 of the message size,
+divided by its width. It is 1 for a curve matching its reference, and detects
+a shift over a range of sizes, such as the eager to rendezvous crossover,
+too small to fail the reference of any single size.
+"""
+
+import math
+import os
+import re
+import statistics
+
+import reframe.utility.sanity as sn
+from reframe.core.builtins import run_before, variable
+
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.regression import LOWER_IS_BETTER_UNITS
+
+# Line of a message size and its first value in the output of an OSU benchmark
+_CURVE_LINE = re.compile(r"^(?P<size>\d+)\s+(?P<value>\d+(?:\.\d*)?)\b", re.MULTILINE)
+
+
+def parse_curve(path: str) -> dict[int, float]:
+    """Return the first value of each message size in the output of an OSU benchmark"""
+    with open(path, encoding="utf-8", errors="replace") as fp:
+        return {int(match["size"]): float(match["value"]) for match in _CURVE_LINE.finditer(fp.read())}
+
+
+def curve_ratio(curve: dict[int, float], reference: dict[int, float]) -> float:
+    """
+    Return the mean ratio of a curve to its reference over the log2 of the message size, integrated with
+    the trapezoidal rule over the non-zero sizes of both, or None if they have fewer than two in common.
+    """
+    sizes = sorted(size for size in curve if size > 0 and reference.get(size))
+    if len(sizes) < 2:
+        return None
+
+    x = [math.log2(size) for size in sizes]
+    y = [curve[size] / reference[size] for size in sizes]
+    area = sum((x[i + 1] - x[i]) * (y[i + 1] + y[i]) / 2 for i in range(len(sizes) - 1))
+    return area / (x[-1] - x[0])
+
+
+class OSUCurveMixin(HistoryReferenceMixin):
+    """Mixin reporting the whole message size curve of an OSU benchmark, checked against its history"""
+
+    #: Performance variable of the test giving the value at one message size
+    osu_curve_var = variable(str, value="latency")
+
+    #: Relative deviation of curve_ratio from 1 that fails the test
+    osu_curve_tolerance = variable(float, value=0.05)
+
+    @run_before("performance")
+    def set_history_reference(self):
+        """Add the performance variables of the curve, with their references from the history"""
+        if self.is_dry_run():
+            super().set_history_reference()
+            return
+
+        unit = self.perf_variables[self.osu_curve_var].unit
+        curve = parse_curve(os.path.join(self.stagedir, sn.evaluate(self.stdout)))
+        for size, value in curve.items():
+            self.perf_variables[f"{self.osu_curve_var}_{size}"] = sn.make_performance_function(sn.defer(value), unit)
+
+        super().set_history_reference()
+
+        reference = {}
+        for size in curve:
+            _, values = self.history_values(f"{self.osu_curve_var}_{size}")
+            if len(values) >= self.history_min_runs:
+                reference[size] = statistics.median(values)
+
+        ratio = curve_ratio(curve, reference)
+        if ratio is None:
+            return
+
+        self.perf_variables["curve_ratio"] = sn.make_performance_function(sn.defer(ratio), "x")
+        if unit in LOWER_IS_BETTER_UNITS:
+            self.reference[f"{self.current_partition.fullname}:curve_ratio"] = (1.0, None, self.osu_curve_tolerance)
+        else:
+            self.reference[f"{self.current_partition.fullname}:curve_ratio"] = (1.0, -self.osu_curve_tolerance, None)
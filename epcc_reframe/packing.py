@@ -0,0 +1,310 @@
+"""
+Packing of short single-node jobs into shared Slurm allocations
+
+Checks such as the Cray counter, CPU frequency, MPI initialisation, hello world
+and affinity tests run for seconds on one node, but each of them waits in the
+queue for its own allocation. The slurm-packed scheduler submits the jobs of
+tests using PackedJobMixin together, as one sbatch job per pack, and submits
+all other jobs as the slurm scheduler does.
+
+Jobs wait up to EPCC_REFRAME_PACK_WAIT seconds for others with the same
+access options to join their pack. Each job script then runs in its own stage
+directory with its own stdout and stderr, under timeout(1) with the time limit
+of its test, and its exit code is written next to its script. The number of
+tasks and CPUs of the test are passed to srun through the SLURM_* and SRUN_*
+input environment variables, as the #SBATCH lines of the job script are not
+read inside the pack.
+
+By default the jobs of a pack run one after the other. With
+EPCC_REFRAME_PACK_MODE=concurrent they run at the same time as exclusive job
+steps, each on its own cores; steps that do not fit wait for others to end.
+
+The scheduler is selected per partition in the configuration, e.g. for the
+ARCHER2 and Cirrus compute nodes when EPCC_REFRAME_PACK_JOBS is set:
+
+    EPCC_REFRAME_PACK_JOBS=1 reframe -C configuration/archer2.py -c tests/env -r
+"""
+
+import itertools
+import os
+import shlex
+import time
+
+import reframe as rfm
+import reframe.core.runtime as rt
+from reframe.core.backends import register_scheduler
+from reframe.core.builtins import run_before, variable
+from reframe.core.schedulers.slurm import SlurmJobScheduler, slurm_state_completed
+from reframe.utility import seconds_to_hms
+
+# Environment variable enabling the slurm-packed scheduler in the configurations
+PACK_JOBS_ENV = "EPCC_REFRAME_PACK_JOBS"
+
+# Environment variable selecting how the jobs of a pack run, "serial" or "concurrent"
+PACK_MODE_ENV = "EPCC_REFRAME_PACK_MODE"
+
+# Environment variable giving the maximum number of jobs in a pack
+PACK_MAX_JOBS_ENV = "EPCC_REFRAME_PACK_MAX_JOBS"
+
+# Environment variable giving the maximum time limit of a pack in seconds
+PACK_MAX_TIME_ENV = "EPCC_REFRAME_PACK_MAX_TIME"
+
+# Environment variable giving the seconds a job waits for others to join its pack
+PACK_WAIT_ENV = "EPCC_REFRAME_PACK_WAIT"
+
+# Time limit of a packed job whose test does not set one, in seconds
+DEFAULT_JOB_TIME = 600
+
+# Time added to the time limit of a pack for starting and ending its jobs, in seconds
+PACK_TIME_MARGIN = 60
+
+# Exit status of timeout(1) when the command timed out
+TIMEOUT_EXITCODE = 124
+
+
+class _Pack:  # pylint: disable=too-few-public-methods
+    """Allocation running a list of (job, stage directory) entries"""
+
+    def __init__(self, job, entries: list):
+        self.job = job
+        self.entries = entries
+
+
+@register_scheduler("slurm-packed")
+class PackedSlurmJobScheduler(SlurmJobScheduler):
+    """Slurm scheduler running the jobs of PackedJobMixin tests in shared allocations"""
+
+    # Job states are set through the same private attributes as in the slurm scheduler
+    # pylint: disable=protected-access
+
+    def __init__(self):
+        super().__init__()
+        self._mode = os.environ.get(PACK_MODE_ENV, "serial")
+        self._max_jobs = int(os.environ.get(PACK_MAX_JOBS_ENV, "16"))
+        self._max_time = int(os.environ.get(PACK_MAX_TIME_ENV, "3600"))
+        self._wait = float(os.environ.get(PACK_WAIT_ENV, "30"))
+        self._queued = []
+        self._packs = {}
+        self._ids = itertools.count()
+
+    @staticmethod
+    def time_limit(job) -> int:
+        """Time limit of a job in a pack, in seconds"""
+        return int(job.time_limit) if job.time_limit else DEFAULT_JOB_TIME
+
+    def packable(self, job) -> bool:
+        """Whether a job may run in a pack: marked by its test, short, on a single node and not an array"""
+        if not getattr(job, "packable", False) or job.is_array or job.pin_nodes:
+            return False
+
+        if not job.num_tasks or job.num_tasks < 0:
+            return False
+
+        if job.num_tasks_per_node and job.num_tasks > job.num_tasks_per_node:
+            return False
+
+        return self.time_limit(job) + PACK_TIME_MARGIN <= self._max_time
+
+    @staticmethod
+    def _pack_key(job) -> tuple:
+        """Options that all the jobs of a pack share"""
+        return (tuple(job.sched_access), tuple(job.options + job.cli_options), job.exclusive_access, job.use_smt)
+
+    def submit(self, job):
+        if not self.packable(job):
+            super().submit(job)
+            return
+
+        # The job is only known by this id until its pack is submitted
+        job._jobid = f"queued.pack{next(self._ids)}"
+        job._submit_time = time.time()
+        job._state = "PENDING"
+        self._queued.append((job, os.path.abspath(job.workdir)))
+        self._submit_packs()
+
+    def _submit_packs(self):
+        """Submit the packs that are full or whose first job has waited long enough"""
+        groups = {}
+        for entry in self._queued:
+            groups.setdefault(self._pack_key(entry[0]), []).append(entry)
+
+        self._queued = []
+        for entries in groups.values():
+            waited = time.time() - entries[0][0].submit_time
+            if len(entries) < self._max_jobs and waited < self._wait:
+                self._queued += entries
+                continue
+
+            pack = []
+            for entry in entries:
+                limits = [self.time_limit(job) for job, _ in pack + [entry]]
+                if pack and (len(pack) == self._max_jobs or self._pack_time(limits) > self._max_time):
+                    self._submit_pack(pack)
+                    pack = []
+
+                pack.append(entry)
+
+            self._submit_pack(pack)
+
+    def _pack_time(self, limits: list[int]) -> int:
+        """Time limit of a pack of jobs with the given time limits"""
+        return (max(limits) if self._mode == "concurrent" else sum(limits)) + PACK_TIME_MARGIN
+
+    def _step_env(self, job) -> str:
+        """Environment variables giving srun the resources of a job inside the pack"""
+        env = {"SLURM_NTASKS": job.num_tasks, "SLURM_NPROCS": job.num_tasks, "SLURM_NNODES": 1}
+        for var, value in (
+            ("SLURM_NTASKS_PER_NODE", job.num_tasks_per_node),
+            ("SLURM_NTASKS_PER_CORE", job.num_tasks_per_core),
+            ("SLURM_NTASKS_PER_SOCKET", job.num_tasks_per_socket),
+            ("SLURM_CPUS_PER_TASK", job.num_cpus_per_task),
+            ("SRUN_CPUS_PER_TASK", job.num_cpus_per_task),
+        ):
+            if value is not None:
+                env[var] = value
+
+        if self._mode == "concurrent":
+            env["SLURM_EXACT"] = 1
+
+        return " ".join(f"{var}={value}" for var, value in env.items())
+
+    def _job_command(self, job, workdir: str) -> str:
+        """Line of the pack script running a job, unless it was cancelled, and saving its exit code"""
+        script = shlex.quote(os.path.join(workdir, job.script_filename))
+        run = (
+            f"cd {shlex.quote(workdir)} && env {self._step_env(job)} timeout {self.time_limit(job)} "
+            f"bash {script} >{shlex.quote(job.stdout)} 2>{shlex.quote(job.stderr)}"
+        )
+        cancelled = shlex.quote(os.path.join(workdir, f"{job.script_filename}.cancel"))
+        exitcode = shlex.quote(os.path.join(workdir, f"{job.script_filename}.exitcode"))
+        background = " &" if self._mode == "concurrent" else ""
+        return f"[ -e {cancelled} ] || {{ ({run}); echo $? >{exitcode}; }}{background}"
+
+    def _submit_pack(self, entries: list):
+        """Write and submit the script of a pack"""
+        packdir = os.path.join(os.path.abspath(rt.runtime().stage_prefix), "packs")
+        os.makedirs(packdir, exist_ok=True)
+        name = f"rfm_pack_{next(self._ids)}"
+        first = entries[0][0]
+        pack_job = self.make_job(
+            name=name,
+            workdir=packdir,
+            script_filename=os.path.join(packdir, f"{name}.sh"),
+            sched_access=list(first.sched_access),
+        )
+        h, m, s = seconds_to_hms(self._pack_time([self.time_limit(job) for job, _ in entries]))
+        lines = [
+            "#!/bin/bash",
+            f'#SBATCH --job-name="{name}"',
+            "#SBATCH --nodes=1",
+            f"#SBATCH --time={h}:{m}:{s}",
+            f"#SBATCH --output={pack_job.stdout}",
+            f"#SBATCH --error={pack_job.stderr}",
+        ]
+        if first.exclusive_access:
+            lines.append("#SBATCH --exclusive")
+
+        if not self._sched_access_in_submit:
+            lines += [f"#SBATCH {opt}" for opt in first.sched_access]
+
+        if first.use_smt is not None:
+            lines.append(f"#SBATCH --hint={'multithread' if first.use_smt else 'nomultithread'}")
+
+        lines += [opt if opt.startswith("#") else f"#SBATCH {opt}" for opt in first.options + first.cli_options]
+        lines += [self._job_command(job, workdir) for job, workdir in entries]
+        if self._mode == "concurrent":
+            lines.append("wait")
+
+        with open(pack_job.script_filename, "w", encoding="utf-8") as fp:
+            fp.write("\n".join(lines) + "\n")
+
+        super().submit(pack_job)
+        self.log(f"submitted {len(entries)} jobs in pack {pack_job.jobid}")
+        pack = _Pack(pack_job, entries)
+        for index, (job, _) in enumerate(entries):
+            job._jobid = f"{pack_job.jobid}.pack{index}"
+            self._packs[id(job)] = pack
+
+    def _update_packed_job(self, job, pack: _Pack):
+        """Set the state of a packed job from its exit code file or from the state of its pack"""
+        workdir = next(workdir for packed, workdir in pack.entries if packed is job)
+        exitcode_file = os.path.join(workdir, f"{job.script_filename}.exitcode")
+        try:
+            with open(exitcode_file, encoding="utf-8") as fp:
+                exitcode = int(fp.read())
+        except (OSError, ValueError):
+            exitcode = None
+
+        job._nodespec = pack.job._nodespec
+        if exitcode is not None:
+            job._exitcode = exitcode
+            if exitcode == 0:
+                job._state = "COMPLETED"
+            else:
+                job._state = "TIMEOUT" if exitcode == TIMEOUT_EXITCODE else "FAILED"
+
+            job._completion_time = os.path.getmtime(exitcode_file)
+        elif job.is_cancelling:
+            job._state = "CANCELLED"
+        elif slurm_state_completed(pack.job.state):
+            # The pack ended before the job ran or finished
+            job._state = "FAILED" if pack.job.state == "COMPLETED" else pack.job.state
+            job._exitcode = pack.job.exitcode
+            job._completion_time = pack.job.completion_time
+            job._exception = pack.job._exception
+        else:
+            job._state = pack.job.state
+
+    def poll(self, *jobs):
+        jobs = [job for job in jobs if job is not None]
+        self._submit_packs()
+        queued = {id(job) for job, _ in self._queued}
+        packed = [job for job in jobs if id(job) in self._packs]
+        packs = list({id(self._packs[id(job)]): self._packs[id(job)] for job in packed}.values())
+        others = [job for job in jobs if id(job) not in self._packs and id(job) not in queued]
+        super().poll(*others, *(pack.job for pack in packs))
+        for job in packed:
+            self._update_packed_job(job, self._packs[id(job)])
+
+    def cancel_many(self, jobs):
+        jobs = list(jobs)
+        queued = {id(job) for job in jobs}
+        for job, _ in self._queued:
+            if id(job) in queued:
+                job._state = "CANCELLED"
+                job._is_cancelling = True
+
+        self._queued = [entry for entry in self._queued if id(entry[0]) not in queued]
+        to_cancel = [job for job in jobs if id(job) not in self._packs and not job.is_cancelling]
+        packs = {}
+        for job in jobs:
+            pack = self._packs.get(id(job))
+            if pack is None:
+                continue
+
+            # Jobs of the pack that have not started yet are skipped
+            workdir = next(workdir for packed, workdir in pack.entries if packed is job)
+            with open(os.path.join(workdir, f"{job.script_filename}.cancel"), "w", encoding="utf-8"):
+                pass
+
+            job._is_cancelling = True
+            packs[id(pack)] = pack
+
+        for pack in packs.values():
+            if all(job.is_cancelling or slurm_state_completed(job.state) for job, _ in pack.entries):
+                to_cancel.append(pack.job)
+
+        if to_cancel:
+            super().cancel_many(to_cancel)
+
+
+class PackedJobMixin(rfm.RegressionMixin):
+    """Mixin letting the slurm-packed scheduler run the job of a short single-node test in a pack"""
+
+    #: Run the job in a pack when the partition uses the slurm-packed scheduler
+    pack_job = variable(bool, value=True)
+
+    @run_before("run")
+    def set_job_packable(self):
+        """Mark the job as packable, which other schedulers ignore"""
+        self.job.packable = self.pack_job
@@ -0,0 +1,418 @@
+"""
+Indexed performance history store
+
+Performance variables are written one row per value into an SQLite database
+which is indexed by system, partition, test and performance variable, so that
+questions like "last 10 values of StreamTest Triad on archer2:compute" do not
+require re-reading and splitting every text perflog.
+
+The store is fed by the "sqlite" perflog handler registered below, which lives
+alongside the existing "filelog" handlers in the site configuration:
+
+    {
+        "type": "sqlite",
+        "basedir": "./perflogs",
+        "name": "perflogs.db",
+        "level": "info",
+    }
+
+Existing text perflogs can be loaded into the store and queried from the
+command line:
+
+    python -m epcc_reframe.perflog import perflogs/perflogs.db perflogs/archer2/compute/*.log
+    python -m epcc_reframe.perflog query perflogs/perflogs.db archer2:compute StreamTest Triad -n 10
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import sqlite3
+import sys
+
+from reframe.core.logging import register_log_handler
+
+# Seconds to wait for the database lock when several ReFrame sessions log at once
+SQLITE_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS perflog (
+    id INTEGER PRIMARY KEY,
+    system TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    environ TEXT,
+    test TEXT NOT NULL,
+    perf_var TEXT NOT NULL,
+    value REAL,
+    unit TEXT,
+    reference REAL,
+    lower REAL,
+    upper REAL,
+    result TEXT,
+    completion_time REAL,
+    job_id TEXT
+);
+CREATE INDEX IF NOT EXISTS perflog_lookup
+    ON perflog (system, partition, test, perf_var, completion_time);
+CREATE INDEX IF NOT EXISTS perflog_time ON perflog (completion_time);
+"""
+
+COLUMNS = (
+    "system",
+    "partition",
+    "environ",
+    "test",
+    "perf_var",
+    "value",
+    "unit",
+    "reference",
+    "lower",
+    "upper",
+    "result",
+    "completion_time",
+    "job_id",
+)
+
+
+def _to_float(value) -> float:
+    """Convert a perflog field to float, returning None for missing values"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _xstr(value) -> str:
+    """Convert value to str, keeping None"""
+    return None if value is None else str(value)
+
+
+def _to_timestamp(value) -> float:
+    """Convert an RFC3339 completion time or a unix time to a unix timestamp"""
+    if value is None:
+        return None
+
+    timestamp = _to_float(value)
+    if timestamp is not None:
+        return timestamp
+
+    try:
+        return datetime.datetime.fromisoformat(str(value).strip()).timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_filelog_line(line: str) -> dict:
+    """Parse a filelog record into a store row without system and partition; returns None for headers"""
+    fields = line.rstrip("\n").split("|")
+    if len(fields) < 6:
+        return None
+
+    test, result, completion_time, perf_var, value_unit, thresholds = fields[:6]
+    timestamp = _to_timestamp(completion_time)
+    if timestamp is None:
+        # Header line or malformed record
+        return None
+
+    value, _, unit = value_unit.partition(" ")
+    reference, lower, upper = (thresholds.strip("()").split(",") + [None, None, None])[:3]
+    return {
+        "test": test,
+        "perf_var": perf_var,
+        "value": _to_float(value),
+        "unit": unit.strip() or None,
+        "reference": _to_float(reference),
+        "lower": _to_float(lower),
+        "upper": _to_float(upper),
+        "result": result,
+        "completion_time": timestamp,
+    }
+
+
+class PerflogStore:
+    """SQLite backed store of performance variable history"""
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the store at path.
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        dirname = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the underlying database connection"""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def insert(self, rows: list[dict]):
+        """
+        Insert performance rows in a single transaction.
+        Args:
+            rows (list[dict]): Rows keyed by the names in COLUMNS; missing keys are stored as NULL.
+        """
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO perflog ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row.get(col) for col in COLUMNS) for row in rows],
+            )
+
+    def last_values(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        system: str,
+        test: str,
+        perf_var: str,
+        n: int = 10,
+        *,
+        environ: str = None,
+        result: str = "pass",
+    ) -> list[sqlite3.Row]:
+        """
+        Return the last n rows of a performance variable, newest first.
+        Args:
+            system (str): System and partition, i.e. 'archer2:compute'.
+            test (str): Test display name, i.e. 'StreamTest'.
+            perf_var (str): Performance variable name, i.e. 'Triad'.
+            n (int): Maximum number of rows to return.
+            environ (str, optional): Restrict to a programming environment.
+            result (str, optional): Restrict to a test result; None returns all results.
+        """
+        system, partition = system.split(":", maxsplit=1)
+        query = "SELECT * FROM perflog WHERE system = ? AND partition = ? AND test = ? AND perf_var = ?"
+        args = [system, partition, test, perf_var]
+        if environ is not None:
+            query += " AND environ = ?"
+            args.append(environ)
+
+        if result is not None:
+            query += " AND result = ?"
+            args.append(result)
+
+        query += " ORDER BY completion_time DESC LIMIT ?"
+        args.append(n)
+        return self._conn.execute(query, args).fetchall()
+
+    def last_values_by_series(self, system: str, n: int = 10, result: str = "pass") -> list[sqlite3.Row]:
+        """
+        Return the last n rows of every series of a system:partition in a single query,
+        ordered by environ, test, perf_var and newest first.
+        """
+        system, partition = system.split(":", maxsplit=1)
+        query = """
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY environ, test, perf_var ORDER BY completion_time DESC
+                ) AS position
+                FROM perflog WHERE system = ? AND partition = ? AND (? IS NULL OR result = ?)
+            )
+            WHERE position <= ? ORDER BY environ, test, perf_var, position
+        """
+        return self._conn.execute(query, (system, partition, result, result, n)).fetchall()
+
+    def history(self, system: str = None, test: str = None, since: float = None) -> list[sqlite3.Row]:
+        """
+        Return all rows, optionally restricted to a system[:partition], a test and a start time,
+        ordered by series and completion time.
+        """
+        query = "SELECT * FROM perflog WHERE 1 = 1"
+        args = []
+        if system is not None:
+            sysname, _, partition = system.partition(":")
+            query += " AND system = ?"
+            args.append(sysname)
+            if partition:
+                query += " AND partition = ?"
+                args.append(partition)
+
+        if test is not None:
+            query += " AND test = ?"
+            args.append(test)
+
+        if since is not None:
+            query += " AND completion_time >= ?"
+            args.append(since)
+
+        query += " ORDER BY system, partition, environ, test, perf_var, completion_time"
+        return self._conn.execute(query, args).fetchall()
+
+    def import_filelog(self, filename: str, system: str = None, partition: str = None) -> int:
+        """
+        Load a text perflog written by the "filelog" handler of our site configurations.
+        The lines have the format:
+            display_name|result|completion_time|perf_var|value unit|(ref, lower, upper)|
+        If system and partition are not given, they are taken from the perflogs/<system>/<partition>/ path.
+        Returns the number of imported rows.
+        """
+        if system is None or partition is None:
+            path_parts = os.path.abspath(filename).split(os.sep)
+            system = system or path_parts[-3]
+            partition = partition or path_parts[-2]
+
+        rows = []
+        with open(filename, encoding="utf-8") as logfile:
+            for line in logfile:
+                row = _parse_filelog_line(line)
+                if row is not None:
+                    rows.append(dict(row, system=system, partition=partition))
+
+        self.insert(rows)
+        return len(rows)
+
+
+class SQLitePerflogHandler(logging.Handler):
+    """Logging handler writing each performance variable of a record into a PerflogStore"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._store = None
+
+    def _record_rows(self, record: logging.LogRecord) -> list[dict]:
+        """Convert a ReFrame performance log record into store rows"""
+        common = {
+            "system": getattr(record, "check_system", None),
+            "partition": getattr(record, "check_partition", None),
+            "environ": getattr(record, "check_environ", None),
+            "test": getattr(record, "check_display_name", None),
+            "result": getattr(record, "check_result", None),
+            "completion_time": _to_timestamp(getattr(record, "check_job_completion_time_unix", None)),
+            "job_id": _xstr(getattr(record, "check_jobid", None)),
+        }
+        if common["system"] is None or common["test"] is None:
+            return []
+
+        # With perflog_multiline (perflog_compat) ReFrame emits one record per variable
+        perf_var = getattr(record, "check_perf_var", None)
+        if perf_var is not None:
+            perfvalues = {
+                perf_var: (
+                    record.check_perf_value,
+                    record.check_perf_ref,
+                    record.check_perf_lower_thres,
+                    record.check_perf_upper_thres,
+                    record.check_perf_unit,
+                )
+            }
+        else:
+            perfvalues = getattr(record, "check_perfvalues", None) or {}
+
+        rows = []
+        for var, info in perfvalues.items():
+            value, ref, lower, upper, unit = info[:5]
+            rows.append(
+                dict(
+                    common,
+                    perf_var=var.split(":")[-1],
+                    value=_to_float(value),
+                    unit=unit,
+                    reference=_to_float(ref),
+                    lower=_to_float(lower),
+                    upper=_to_float(upper),
+                )
+            )
+
+        return rows
+
+    def emit(self, record):
+        try:
+            rows = self._record_rows(record)
+            if not rows:
+                return
+
+            if self._store is None:
+                self._store = PerflogStore(self.path)
+
+            self._store.insert(rows)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+        super().close()
+
+
+def _store_path(site_config, config_prefix: str) -> str:
+    """Return the database path of the sqlite handler configured at config_prefix"""
+    basedir = os.path.abspath(
+        os.path.join(
+            site_config.get("systems/0/prefix"),
+            os.path.expandvars(site_config.get(f"{config_prefix}/basedir") or "./perflogs"),
+        )
+    )
+    name = os.path.expandvars(site_config.get(f"{config_prefix}/name") or "perflogs.db")
+    return os.path.join(basedir, name)
+
+
+def store_path(site_config) -> str:
+    """Return the database path of the first sqlite perflog handler of a site configuration, or None"""
+    for i, handler in enumerate(site_config.get("logging/0/handlers_perflog") or []):
+        if handler["type"] == "sqlite":
+            return _store_path(site_config, f"logging/0/handlers_perflog/{i}")
+
+    return None
+
+
+@register_log_handler("sqlite")
+def _create_sqlite_handler(site_config, config_prefix):
+    """Create the sqlite perflog handler from its site configuration entry"""
+    return SQLitePerflogHandler(_store_path(site_config, config_prefix))
+
+
+def main(argv=None):
+    """Command line interface to import and query the performance history"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import text perflogs written by the filelog handler")
+    import_parser.add_argument("database")
+    import_parser.add_argument("perflogs", nargs="+")
+    import_parser.add_argument("--system", help="system:partition, if not taken from the perflog path")
+
+    query_parser = commands.add_parser("query", help="print the last values of a performance variable")
+    query_parser.add_argument("database")
+    query_parser.add_argument("system", help="system:partition")
+    query_parser.add_argument("test")
+    query_parser.add_argument("perf_var")
+    query_parser.add_argument("-n", type=int, default=10)
+    query_parser.add_argument("--environ")
+    query_parser.add_argument("--all-results", action="store_true", help="include failed runs")
+
+    args = parser.parse_args(argv)
+    with PerflogStore(args.database) as store:
+        if args.command == "import":
+            system, partition = args.system.split(":", maxsplit=1) if args.system else (None, None)
+            for filename in args.perflogs:
+                count = store.import_filelog(filename, system, partition)
+                print(f"{filename}: {count} rows")
+        else:
+            rows = store.last_values(
+                args.system,
+                args.test,
+                args.perf_var,
+                n=args.n,
+                environ=args.environ,
+                result=None if args.all_results else "pass",
+            )
+            for row in rows:
+                when = datetime.datetime.fromtimestamp(row["completion_time"] or 0).isoformat()
+                print(f"{when} {row['environ'] or '-'} {row['value']} {row['unit'] or ''} {row['result']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Statistical regression detection on the performance history
+
+Each series of a performance variable (per system:partition:environ and test)
+is read from the PerflogStore in a single indexed query and checked with
+robust statistics instead of hand-tuned reference tuples:
+
+  - the latest value is compared against the median/MAD of a rolling window
+    of the preceding runs, and a significantly worse run is reported as an
+    outlier;
+  - a single change point is searched for over the whole series, and a recent
+    shift larger than the noise of the series is reported as a regression or
+    an improvement depending on whether higher or lower values are better.
+
+A single bad run is therefore an outlier, and becomes a regression once
+enough runs confirm the shift.
+
+A suggested (value, lower, upper, unit) reference computed from the runs since
+the last change point is reported for every series, so references can be
+refreshed after an OS or PE upgrade:
+
+    python -m epcc_reframe.regression perflogs/perflogs.db --system archer2:compute --suggest
+"""
+
+import argparse
+import itertools
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+
+from epcc_reframe.perflog import PerflogStore
+
+# Scale factor to make the MAD a consistent estimator of the standard deviation
+MAD_SCALE = 1.4826
+
+# Units for which a smaller value is better; for any other unit a larger value is better
+LOWER_IS_BETTER_UNITS = {"s", "ms", "us", "ns", "min", "h", "J", "kJ", "W"}
+
+
+@dataclass
+class SeriesReport:  # pylint: disable=too-many-instance-attributes
+    """Result of checking a single performance variable series"""
+
+    system: str
+    environ: str
+    test: str
+    perf_var: str
+    unit: str
+    num_runs: int
+    latest: float
+    baseline: float = None
+    zscore: float = None
+    change_index: int = None
+    change_ratio: float = None
+    status: str = "ok"
+    suggested_reference: tuple = None
+
+    @property
+    def name(self) -> str:
+        """Series name in system:partition:environ/test/perf_var form"""
+        return f"{self.system}:{self.environ or '-'}/{self.test}/{self.perf_var}"
+
+
+def robust_stats(values: list[float]) -> tuple[float, float]:
+    """
+    Return the median and the MAD based standard deviation estimate of values.
+    The deviation falls back to 1% of the median for series with a zero MAD.
+    """
+    median = statistics.median(values)
+    sigma = MAD_SCALE * statistics.median(abs(x - median) for x in values)
+    if sigma == 0:
+        sigma = 0.01 * abs(median) or 1.0
+
+    return median, sigma
+
+
+def find_change_point(values: list[float], min_size: int = 3) -> int:
+    """
+    Return the index at which the series is best split into two segments of
+    different mean, or None if the series is too short.
+    Uses prefix sums so that the search is linear in the length of the series.
+    """
+    num = len(values)
+    if num < 2 * min_size:
+        return None
+
+    prefix = list(itertools.accumulate(values, initial=0.0))
+    total = prefix[-1]
+    best_index, best_score = None, 0.0
+    for k in range(min_size, num - min_size + 1):
+        left_mean = prefix[k] / k
+        right_mean = (total - prefix[k]) / (num - k)
+        # Between-segment sum of squares, maximising it minimises the within-segment error
+        score = k * (num - k) * (left_mean - right_mean) ** 2
+        if score > best_score:
+            best_index, best_score = k, score
+
+    return best_index
+
+
+def significant_change_point(values: list[float], threshold: float = 3.0, min_size: int = 3) -> tuple[int, float]:
+    """
+    Return the index of the best change point of values and the ratio of the medians after and
+    before it, or (None, None) if the shift is not larger than threshold times the noise.
+    """
+    index = find_change_point(values, min_size)
+    if index is None:
+        return None, None
+
+    before_median, before_sigma = robust_stats(values[:index])
+    after_median, after_sigma = robust_stats(values[index:])
+    if abs(after_median - before_median) <= threshold * max(before_sigma, after_sigma):
+        return None, None
+
+    return index, after_median / before_median if before_median else None
+
+
+def suggest_reference(values: list[float], unit: str, tolerance: float = 3.0) -> tuple:
+    """
+    Suggest a (value, lower, upper, unit) reference tuple from values.
+    The thresholds are the relative MAD based deviation times tolerance, with a minimum of 1%.
+    Only the side that indicates a regression is bounded.
+    """
+    median, sigma = robust_stats(values)
+    spread = round(max(tolerance * sigma / abs(median), 0.01), 3) if median else None
+    if unit in LOWER_IS_BETTER_UNITS:
+        return (round(median, 6), None, spread, unit)
+
+    return (round(median, 6), -spread if spread is not None else None, None, unit)
+
+
+def check_series(values: list[float], unit: str, window: int = 20, threshold: float = 3.0, min_size: int = 3) -> dict:
+    """
+    Check a series of values ordered from oldest to newest.
+    Args:
+        values (list[float]): Performance values, oldest first.
+        unit (str): Unit of the values, used to decide which direction is a regression.
+        window (int): Number of runs preceding the latest one used as the rolling baseline.
+        threshold (float): Number of robust standard deviations considered significant.
+        min_size (int): Minimum number of runs on each side of a change point.
+    Returns:
+        A dict with the status, baseline, zscore, change_index and change_ratio of the series.
+        The status is one of
+        'regression' or 'improvement' for a sustained shift at a recent change point,
+        'outlier' for a latest run worse than the rolling baseline, 'ok' or 'short'.
+    """
+    if len(values) < min_size + 1:
+        return {"status": "short", "baseline": None, "zscore": None, "change_index": None, "change_ratio": None}
+
+    lower_is_better = unit in LOWER_IS_BETTER_UNITS
+    history = values[-window - 1 : -1]
+    baseline, sigma = robust_stats(history)
+    zscore = (values[-1] - baseline) / sigma
+
+    status = "ok"
+    if (zscore > threshold) if lower_is_better else (zscore < -threshold):
+        status = "outlier"
+
+    change_index, change_ratio = significant_change_point(values, threshold, min_size)
+    # Only a change point that the latest runs still sit on is reported
+    if change_index is not None and change_index >= len(values) - window:
+        shifted_up = change_ratio > 1 if change_ratio is not None else values[-1] > values[0]
+        status = "regression" if shifted_up == lower_is_better else "improvement"
+
+    return {
+        "status": status,
+        "baseline": baseline,
+        "zscore": zscore,
+        "change_index": change_index,
+        "change_ratio": change_ratio,
+    }
+
+
+def _series_report(key: tuple, series: list, check_options: dict) -> SeriesReport:
+    """Check a single series of store rows ordered by completion time"""
+    sysname, partition, environ, test, perf_var = key
+    values = [row["value"] for row in series]
+    unit = series[-1]["unit"]
+    result = check_series(values, unit, **check_options)
+    return SeriesReport(
+        system=f"{sysname}:{partition}",
+        environ=environ,
+        test=test,
+        perf_var=perf_var,
+        unit=unit,
+        num_runs=len(values),
+        latest=values[-1],
+        suggested_reference=suggest_reference(values[result["change_index"] or 0 :], unit),
+        **result,
+    )
+
+
+def detect(
+    store: PerflogStore,
+    system: str = None,
+    test: str = None,
+    since: float = None,
+    **check_options,
+) -> list[SeriesReport]:
+    """
+    Check every performance variable series of the store.
+    Args:
+        store (PerflogStore): Performance history.
+        system (str, optional): Restrict to a system or system:partition.
+        test (str, optional): Restrict to a test display name.
+        since (float, optional): Only use runs completed after this unix time.
+        check_options: Passed on to check_series.
+    """
+    # Runs that failed their static reference are kept, they are the ones we are looking for
+    rows = [row for row in store.history(system, test, since) if row["value"] is not None]
+    reports = []
+
+    def series_key(row):
+        return (row["system"], row["partition"], row["environ"], row["test"], row["perf_var"])
+
+    for key, series in itertools.groupby(rows, key=series_key):
+        reports.append(_series_report(key, list(series), check_options))
+
+    return reports
+
+
+def main(argv=None):
+    """Command line interface; returns 1 if any regression is found"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("database")
+    parser.add_argument("--system", help="system or system:partition")
+    parser.add_argument("--test", help="test display name")
+    parser.add_argument("--since-days", type=float, help="only use runs of the last N days")
+    parser.add_argument("--window", type=int, default=20, help="rolling baseline length")
+    parser.add_argument("--threshold", type=float, default=3.0, help="significance in robust standard deviations")
+    parser.add_argument("--suggest", action="store_true", help="print suggested references for every series")
+    parser.add_argument("--all", action="store_true", help="report series without a regression too")
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.since_days * 86400 if args.since_days else None
+    with PerflogStore(args.database) as store:
+        reports = detect(store, args.system, args.test, since, window=args.window, threshold=args.threshold)
+
+    for report in reports:
+        if report.status in ("ok", "short") and not (args.all or args.suggest):
+            continue
+
+        line = f"{report.status.upper():12} {report.name}: latest={report.latest} {report.unit or ''}"
+        if report.baseline is not None:
+            line += f" baseline={report.baseline:.6g} z={report.zscore:+.2f}"
+
+        if report.change_ratio is not None:
+            line += f" change_point=run {report.change_index}/{report.num_runs} ratio={report.change_ratio:.3f}"
+
+        if args.suggest:
+            line += f" suggested_reference={report.suggested_reference}"
+
+        print(line)
+
+    return 1 if any(report.status == "regression" for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Strong and weak scaling of a test over a ladder of node counts
+
+A test inheriting from StrongScalingMixin or WeakScalingMixin defines the
+node counts of its ladder in the scaling_nodes parameter. Each point runs on
+scaling_nodes nodes with the num_tasks_per_node of the test, and every point
+depends on the smallest one, in the same partition and programming
+environment, which it is compared with.
+
+For strong scaling, the test names the performance variable giving its time
+per step (or any time proportional to it) in scaling_time_var:
+
+    scaling_nodes = parameter([1, 2, 4, 8])
+    scaling_time_var = "steptime"
+
+Relative to the p = N / N_0 times more nodes, each point reports as
+performance variables:
+
+  - the speedup S = t_0 / t_N;
+  - the parallel efficiency E = S / p;
+  - the Karp-Flatt serial fraction e = (1 / S - 1 / p) / (1 - 1 / p).
+
+For weak scaling, the test scales its input with scaling_factor, p, to keep
+the work per node constant, e.g. the grid of a simulation with scale_grid,
+and names the performance variable compared between the points in
+weak_scaling_var. Each point reports the weak scaling efficiency t_0 / t_N,
+or v_N / v_0 for a rate with weak_scaling_higher_is_better.
+
+The reference of the efficiency is the median of its last successful runs in
+the performance history, so a point whose efficiency dropped by more than
+scaling_efficiency_drop fails its performance check.
+"""
+
+import statistics
+
+import reframe as rfm
+import reframe.core.runtime as rt
+import reframe.utility.sanity as sn
+from reframe.core.builtins import parameter, run_after, run_before, variable
+
+from epcc_reframe.history import partition_history
+from epcc_reframe.perflog import store_path
+
+
+def scale_grid(dims: list[int], factor: int) -> list[int]:
+    """
+    Return the dimensions of a grid with factor times as many points, multiplying
+    the smallest dimension by each prime factor of factor in turn.
+    """
+    dims = list(dims)
+    prime = 2
+    while factor > 1:
+        while factor % prime == 0:
+            smallest = dims.index(min(dims))
+            dims[smallest] *= prime
+            factor //= prime
+
+        prime += 1
+
+    return dims
+
+
+@sn.deferrable
+def karp_flatt(speedup: float, processors: float) -> float:
+    """Return the Karp-Flatt experimentally determined serial fraction"""
+    return (1 / speedup - 1 / processors) / (1 - 1 / processors)
+
+
+class ScalingLadderMixin(rfm.RegressionMixin):
+    """Mixin running a test over a ladder of node counts, each point depending on the first one"""
+
+    #: Node counts of the ladder, set by the test
+    scaling_nodes = parameter()
+
+    #: Relative drop of the efficiency below the median of its history that fails a point
+    scaling_efficiency_drop = variable(float, value=0.1)
+
+    #: Number of last successful runs whose median efficiency is the reference
+    scaling_history_runs = variable(int, value=10)
+
+    #: Minimum number of runs needed to check the efficiency against the history
+    scaling_history_min_runs = variable(int, value=3)
+
+    @property
+    def scaling_base_nodes(self) -> int:
+        """Number of nodes of the first point of the ladder"""
+        return min(type(self).param_space["scaling_nodes"])
+
+    @property
+    def scaling_factor(self) -> float:
+        """Number of nodes of the point relative to the first one"""
+        return self.scaling_nodes / self.scaling_base_nodes
+
+    def scaling_base_name(self) -> str:
+        """Return the unique name of the first point of the ladder with the other parameters of this one"""
+        cls = type(self)
+        point = dict(cls.param_space[self.param_variant], scaling_nodes=self.scaling_base_nodes)
+        param_variant = next(i for i in range(len(cls.param_space)) if cls.param_space[i] == point)
+        return cls.variant_name(param_variant + len(cls.param_space) * self.fixture_variant)
+
+    def scaling_base_value(self, perf_var: str) -> float:
+        """Return the value of a performance variable of the first point of the ladder"""
+        base = self.getdep(self.scaling_base_name())
+        return base.perfvalues[f"{self.current_partition.fullname}:{perf_var}"][0]
+
+    def set_efficiency_reference(self, perf_var: str):
+        """Set the reference of an efficiency to the median of its history, if there is enough"""
+        path = store_path(rt.runtime().site_config)
+        if path is None:
+            return
+
+        partition = self.current_partition.fullname
+        history = partition_history(path, partition, self.scaling_history_runs)
+        _, values = history.get((self.current_environ.name, self.display_name, perf_var), (None, []))
+        if len(values) >= self.scaling_history_min_runs:
+            self.reference[f"{partition}:{perf_var}"] = (
+                round(statistics.median(values), 2),
+                -self.scaling_efficiency_drop,
+                None,
+                "%",
+            )
+
+    @run_after("init")
+    def depend_on_base(self):
+        """Make every point of the ladder depend on its first one"""
+        if self.scaling_nodes != self.scaling_base_nodes:
+            self.depends_on(self.scaling_base_name())
+
+    @run_before("run", always_last=True)
+    def set_scaling_nodes(self):
+        """Run on the number of nodes of the point"""
+        self.num_tasks = self.scaling_nodes * self.num_tasks_per_node
+
+
+class StrongScalingMixin(ScalingLadderMixin):
+    """Mixin deriving the strong scaling of a test over a ladder of node counts"""
+
+    #: Performance variable giving the time per step of the test
+    scaling_time_var = variable(str, value="steptime")
+
+    @run_before("performance")
+    def set_scaling_perf_variables(self):
+        """Derive the speedup, efficiency and serial fraction from the time per step of the first point"""
+        time_per_step = self.perf_variables[self.scaling_time_var]
+        processors = self.scaling_factor
+        if processors == 1:
+            speedup = sn.defer(1.0)
+        else:
+            speedup = self.scaling_base_value(self.scaling_time_var) / time_per_step
+            self.perf_variables["serial_fraction"] = sn.make_performance_function(
+                100 * karp_flatt(speedup, processors), "%"
+            )
+
+        self.perf_variables["speedup"] = sn.make_performance_function(speedup, "x")
+        self.perf_variables["efficiency"] = sn.make_performance_function(100 * speedup / processors, "%")
+        self.set_efficiency_reference("efficiency")
+
+
+class WeakScalingMixin(ScalingLadderMixin):
+    """Mixin deriving the weak scaling of a test whose input grows with the number of nodes"""
+
+    #: Performance variable compared between the points of the ladder
+    weak_scaling_var = variable(str, value="steptime")
+
+    #: Whether weak_scaling_var is a rate rather than a time
+    weak_scaling_higher_is_better = variable(bool, value=False)
+
+    @run_before("performance")
+    def set_weak_scaling_perf_variables(self):
+        """Derive the weak scaling efficiency from the value of the first point"""
+        value = self.perf_variables[self.weak_scaling_var]
+        if self.scaling_factor == 1:
+            efficiency = sn.defer(100.0)
+        elif self.weak_scaling_higher_is_better:
+            efficiency = 100 * value / self.scaling_base_value(self.weak_scaling_var)
+        else:
+            efficiency = 100 * self.scaling_base_value(self.weak_scaling_var) / value
+
+        self.perf_variables["weak_efficiency"] = sn.make_performance_function(efficiency, "%")
+        self.set_efficiency_reference("weak_efficiency")
@@ -0,0 +1,122 @@
+"""
+Straggler nodes of a multi-node run of Distributed STREAM
+
+Distributed STREAM prints, after the results of the whole allocation, the
+bandwidth of every node:
+
+    Node nid001000 Triad:     219400.1:      0.026253:      221312.5:      0.026026:      210048.3:      0.027421
+
+The bandwidth of each node is scored against the median of the allocation
+with the modified z-score of Iglewicz and Hoaglin,
+
+    z = 0.6745 (b - median) / MAD
+
+where MAD is the median absolute deviation from the median. A node is slow if
+its score is below -STRAGGLER_SCORE and its bandwidth is more than
+STRAGGLER_DROP below the median, so the small spread of a healthy allocation
+is not reported. The slow nodes of the output of a run are listed with:
+
+    python -m epcc_reframe.stragglers rfm_job.out --kernel Triad
+"""
+
+import argparse
+import json
+import math
+import re
+import statistics
+import sys
+
+# File of the stage directory the report of a screen is written to
+STRAGGLER_REPORT = "rfm_stragglers.json"
+
+# Modified z-score below which a node is an outlier
+STRAGGLER_SCORE = 3.5
+
+# Relative drop of the bandwidth below the median of the allocation below which a node is not slow
+STRAGGLER_DROP = 0.05
+
+# Average bandwidth of a kernel on one node, in the output of Distributed STREAM
+_NODE_LINE = re.compile(r"^Node (?P<host>\S+) (?P<kernel>Copy|Scale|Add|Triad):\s+(?P<value>\S+):", re.MULTILINE)
+
+
+def parse_node_results(path: str, kernel: str = "Triad") -> dict[str, float]:
+    """Return the average bandwidth of a kernel on each node in the output of Distributed STREAM"""
+    with open(path, encoding="utf-8", errors="replace") as fp:
+        return {
+            match["host"]: float(match["value"])
+            for match in _NODE_LINE.finditer(fp.read())
+            if match["kernel"] == kernel
+        }
+
+
+def outlier_scores(results: dict[str, float]) -> dict[str, float]:
+    """
+    Return the modified z-score of the bandwidth of each node against the median of all of them. If more
+    than half of the nodes have the median bandwidth, the others score -inf or inf.
+    """
+    if not results:
+        return {}
+
+    median = statistics.median(results.values())
+    mad = statistics.median(abs(value - median) for value in results.values())
+    if mad == 0:
+        return {
+            host: math.copysign(math.inf, value - median) if value != median else 0.0 for host, value in results.items()
+        }
+
+    return {host: 0.6745 * (value - median) / mad for host, value in results.items()}
+
+
+def slow_nodes(results: dict[str, float], score: float = STRAGGLER_SCORE, drop: float = STRAGGLER_DROP) -> list[str]:
+    """Return the nodes whose bandwidth is an outlier more than drop below the median, the slowest first"""
+    if not results:
+        return []
+
+    median = statistics.median(results.values())
+    scores = outlier_scores(results)
+    slow = [host for host, value in results.items() if scores[host] < -score and value < (1 - drop) * median]
+    return sorted(slow, key=results.get)
+
+
+def write_report(
+    path: str, results: dict[str, float], kernel: str, score: float = STRAGGLER_SCORE, drop: float = STRAGGLER_DROP
+) -> list[str]:
+    """Write the bandwidth and score of every node and the list of slow nodes as JSON, and return the slow nodes"""
+    scores = outlier_scores(results)
+    slow = slow_nodes(results, score, drop)
+    report = {
+        "kernel": kernel,
+        "median": statistics.median(results.values()) if results else None,
+        "score": score,
+        "drop": drop,
+        "slow": [{"host": host, "bandwidth": results[host], "score": scores[host]} for host in slow],
+        "nodes": {host: {"bandwidth": results[host], "score": scores[host]} for host in sorted(results)},
+    }
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, indent=2)
+
+    return slow
+
+
+def main(argv=None):
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="output of a run of Distributed STREAM")
+    parser.add_argument("--kernel", choices=["Copy", "Scale", "Add", "Triad"], default="Triad", help="kernel compared")
+    parser.add_argument("--score", type=float, default=STRAGGLER_SCORE, help="modified z-score of an outlier")
+    parser.add_argument("--drop", type=float, default=STRAGGLER_DROP, help="relative drop below the median")
+    args = parser.parse_args(argv)
+
+    results = parse_node_results(args.output, args.kernel)
+    if not results:
+        print(f"error: no node results in {args.output}", file=sys.stderr)
+        return 1
+
+    for host in slow_nodes(results, args.score, args.drop):
+        print(host)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Cached index of the tests for fast listing and selection
+
+Listing or selecting tests with reframe loads every test file, importing its
+modules, building its parameter spaces and instantiating every variant, which
+takes seconds even to list a handful of tests. The index keeps the name,
+class, parameters, tags, valid systems and environments and size of the tests
+of every file, from reframe --describe, and only describes a file again when
+it or another Python file of its directory (where its base classes are) has
+changed since. Files are compared by size and modification time, then by
+sha256. There is one index per configuration and system, rebuilt if the
+configuration, the epcc_reframe package or ReFrame change, under
+EPCC_REFRAME_INDEX (by default ~/.reframe/index).
+
+Listing with -l and selecting by name (-n, -x) and tag (-t, -T) as reframe
+does only reads the index; any other command is passed on to reframe:
+
+    python -m epcc_reframe.testindex -C configuration/archer2.py -c tests -R -l -t production
+    python -m epcc_reframe.testindex -C configuration/archer2.py -c tests -R -l -n Stream -x Dask
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+
+# Environment variable giving the directory of the indexes
+INDEX_ENV = "EPCC_REFRAME_INDEX"
+
+# Directory of the indexes if INDEX_ENV is not set
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".reframe", "index")
+
+# Directory containing the epcc_reframe package, whose modules are imported by the tests
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fields of the description of a test kept in the index
+INDEX_FIELDS = (
+    "display_name",
+    "unique_name",
+    "short_name",
+    "hashcode",
+    "@class",
+    "@file",
+    "tags",
+    "maintainers",
+    "valid_systems",
+    "valid_prog_environs",
+    "num_tasks",
+    "num_tasks_per_node",
+    "time_limit",
+)
+
+# Parameter of a display name, e.g. " %nodes=4"
+_PARAMETER = re.compile(r" %(?P<name>[\w.]+)=(?P<value>\S+)")
+
+
+def _sha256(path: str) -> str:
+    """Return the sha256 hex digest of a file"""
+    with open(path, "rb") as fp:
+        return hashlib.sha256(fp.read()).hexdigest()
+
+
+def test_files(paths: list[str], recursive: bool = False) -> list[str]:
+    """Return the Python files reframe loads from check paths, as absolute paths"""
+    files = []
+    for path in map(os.path.abspath, paths):
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+
+        if not os.path.isdir(path):
+            continue
+
+        for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+            if recursive and entry.is_dir():
+                files += test_files([entry.path], recursive)
+            elif entry.is_file() and entry.name.endswith(".py") and not entry.name.startswith("."):
+                files.append(entry.path)
+
+    return files
+
+
+def parse_describe(output: str) -> list[dict]:
+    """Return the test descriptions of reframe --describe, skipping anything the test files printed before"""
+    match = re.search(r"^\[", output, re.MULTILINE)
+    if match is None:
+        raise ValueError("no test description in the output of reframe")
+
+    return json.JSONDecoder().raw_decode(output[match.start() :])[0]
+
+
+class TestIndex:
+    """Index of the tests of a configuration and system, stored as JSON"""
+
+    def __init__(self, config: str, system: str = None, index_dir: str = None):
+        self.config = os.path.abspath(config)
+        self.system = system
+        index_dir = index_dir or os.environ.get(INDEX_ENV, DEFAULT_INDEX_DIR)
+        name = hashlib.sha256(f"{self.config}:{system}".encode()).hexdigest()[:16]
+        self.path = os.path.join(index_dir, f"{(system or 'default').replace(':', '_')}-{name}.json")
+        self.files = {}
+        self.tests = {}
+        self._load()
+
+    def _fingerprint(self) -> str:
+        """Return the digest of what the description of every test depends on"""
+        reframe_init = importlib.util.find_spec("reframe").origin
+        package = sorted(os.path.join(PACKAGE_DIR, name) for name in os.listdir(PACKAGE_DIR) if name.endswith(".py"))
+        return hashlib.sha256(
+            " ".join(self._file_sha(path) for path in [self.config, reframe_init, *package]).encode()
+        ).hexdigest()
+
+    def _load(self):
+        """Read the index, discarding it if it is for another version of its dependencies"""
+        self.fingerprint = self._fingerprint()
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                index = json.load(fp)
+        except (OSError, ValueError):
+            return
+
+        if index.get("fingerprint") == self.fingerprint:
+            self.files, self.tests = index["files"], index["tests"]
+
+    def save(self):
+        """Write the index, replacing the previous one atomically"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as fp:
+            json.dump({"fingerprint": self.fingerprint, "files": self.files, "tests": self.tests}, fp)
+
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def _file_sha(self, path: str) -> str:
+        """Return the sha256 of a file, reusing the indexed one if its size and modification time are unchanged"""
+        stat = os.stat(path)
+        known = self.files.get(path)
+        if known is None or known["size"] != stat.st_size or known["mtime_ns"] != stat.st_mtime_ns:
+            known = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _sha256(path)}
+            self.files[path] = known
+
+        return known["sha256"]
+
+    def _dir_digest(self, path: str) -> str:
+        """Return the digest of the Python files of the directory of a test file"""
+        dirname = os.path.dirname(path)
+        siblings = sorted(name for name in os.listdir(dirname) if name.endswith(".py") and not name.startswith("."))
+        return hashlib.sha256(
+            " ".join(f"{name}:{self._file_sha(os.path.join(dirname, name))}" for name in siblings).encode()
+        ).hexdigest()
+
+    def _describe(self, files: list[str]) -> list[dict]:
+        """Return the descriptions of the tests of files by reframe"""
+        cmd = ["reframe", "-C", self.config, *(["--system", self.system] if self.system else [])]
+        for path in files:
+            cmd += ["-c", path]
+
+        completed = subprocess.run([*cmd, "--describe"], capture_output=True, text=True, check=False)
+        if completed.returncode != 0:
+            errors = re.findall(r"ERROR: (.*?)(?:\x1b\[0m)?$", completed.stdout + completed.stderr, re.MULTILINE)
+            raise ValueError(errors[0] if errors else f"reframe exited with status {completed.returncode}")
+
+        return parse_describe(completed.stdout)
+
+    def update(self, files: list[str]) -> list[str]:
+        """Describe the files that changed since they were indexed; returns those that failed to load"""
+        digests = {path: self._dir_digest(path) for path in files}
+        stale = [path for path in files if self.tests.get(path, {}).get("digest") != digests[path]]
+        if not stale:
+            return []
+
+        # A file failing to load stops reframe, so they are then described one by one
+        try:
+            batch = self._describe(stale)
+            described = {path: ([test for test in batch if test.get("@file") == path], None) for path in stale}
+        except (OSError, ValueError):
+            described = {}
+            for path in stale:
+                try:
+                    described[path] = (self._describe([path]), None)
+                except (OSError, ValueError) as err:
+                    described[path] = ([], str(err))
+
+        for path, (tests, error) in described.items():
+            self.tests[path] = {
+                "digest": digests[path],
+                "error": error,
+                "tests": [
+                    {**{key: test.get(key) for key in INDEX_FIELDS}, "parameters": _parameters(test)} for test in tests
+                ],
+            }
+
+        self.save()
+        return [path for path, (_, error) in described.items() if error]
+
+    def select(self, files: list[str], names=(), exclude_names=(), tags=(), exclude_tags=()) -> list[dict]:
+        """Return the indexed tests of files selected by name and tag patterns as reframe does"""
+        tests = [test for path in files for test in self.tests.get(path, {}).get("tests", [])]
+        for name in exclude_names:
+            tests = [test for test in tests if not _has_name(test, name)]
+
+        if names:
+            tests = [test for test in tests if any(_has_name(test, name) for name in names)]
+
+        for tag in exclude_tags:
+            tests = [test for test in tests if not any(re.search(tag, value) for value in test["tags"])]
+
+        for tag in tags:
+            tests = [test for test in tests if any(re.search(tag, value) for value in test["tags"])]
+
+        return tests
+
+
+def _has_name(test: dict, pattern: str) -> bool:
+    """Return whether a test matches a name pattern of reframe -n"""
+    if "@" in pattern:
+        return pattern.replace("@", "_") == test["unique_name"]
+
+    if pattern.startswith("/"):
+        return pattern[1:] == test["hashcode"]
+
+    return re.search(pattern, test["display_name"].replace(" ", "")) is not None
+
+
+def _parameters(test: dict) -> dict[str, str]:
+    """Return the parameters of a test from its display name"""
+    return {match["name"]: match["value"] for match in _PARAMETER.finditer(test["display_name"])}
+
+
+def main(argv=None):
+    """Command line interface; commands the index cannot answer are run by reframe"""
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0], allow_abbrev=False)
+    parser.add_argument("-C", "--config", required=True, help="ReFrame configuration file")
+    parser.add_argument("--system", help="system or system:partition, by default the current system")
+    parser.add_argument("-c", "--checkpath", action="append", default=[], help="test file or directory")
+    parser.add_argument("-R", "--recursive", action="store_true", help="search directories recursively")
+    parser.add_argument("-l", "--list", action="store_true", help="list the selected tests")
+    parser.add_argument("-n", "--name", action="append", default=[], help="select tests by name")
+    parser.add_argument("-x", "--exclude", action="append", default=[], help="exclude tests by name")
+    parser.add_argument("-t", "--tag", action="append", default=[], help="select tests by tag")
+    parser.add_argument("-T", "--exclude-tag", action="append", default=[], help="exclude tests by tag")
+    args, others = parser.parse_known_args(argv)
+    if others or not args.list or not args.checkpath:
+        os.execvp("reframe", ["reframe", *argv])
+
+    index = TestIndex(args.config, args.system)
+    files = test_files(args.checkpath, args.recursive)
+    for path in index.update(files):
+        print(f"WARNING: could not load {path}: {index.tests[path]['error']}", file=sys.stderr)
+
+    try:
+        tests = index.select(files, args.name, args.exclude, args.tag, args.exclude_tag)
+    except re.error as err:
+        print(f"error: invalid pattern: {err}", file=sys.stderr)
+        return 1
+
+    print("[List of matched checks]")
+    for test in tests:
+        print(f"- {test['display_name']} /{test['hashcode']}")
+
+    print(f"Found {len(tests)} check(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Network topology of the nodes of a Slurm cluster
+
+The topology is read from a Slurm topology.conf file, where each leaf switch
+lists its nodes and each switch above lists the switches below it:
+
+    SwitchName=sw0 Nodes=nid[001000-001015]
+    SwitchName=sw1 Nodes=nid[001016-001031]
+    SwitchName=grp0 Switches=sw[0-1]
+
+The parent of a leaf switch is its group, e.g. a dragonfly group. Two ranks
+are at one of the DISTANCE_CLASSES, the smallest component they share: the
+same NUMA domain, the same node, the same switch, the same group or only the
+system. The file is EPCC_REFRAME_TOPOLOGY, by default the topology.conf of
+Slurm. A pair of nodes at a given distance is picked from the idle nodes of a
+partition:
+
+    python -m epcc_reframe.topology tests/synth/mpi_osu/topology.conf --distance group --nodes nid[001000-001031]
+"""
+
+import argparse
+import random
+import re
+import subprocess
+import sys
+
+# Environment variable giving the topology file
+TOPOLOGY_ENV = "EPCC_REFRAME_TOPOLOGY"
+
+# Topology file if TOPOLOGY_ENV is not set
+DEFAULT_TOPOLOGY_FILE = "/etc/slurm/topology.conf"
+
+# Distance classes between two ranks, from the nearest, named after the smallest component they share
+DISTANCE_CLASSES = ("numa", "node", "switch", "group", "system")
+
+# Bracketed range of a hostlist, e.g. "nid[001000-001003,001010]"
+_HOSTLIST_RANGE = re.compile(r"^(?P<prefix>[^\[]*)\[(?P<ranges>[^\]]+)\](?P<suffix>.*)$")
+
+
+def _split_hostlist(hostlist: str) -> list[str]:
+    """Split a hostlist on the commas outside brackets"""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(hostlist):
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(hostlist[start:i])
+            start = i + 1
+
+    parts.append(hostlist[start:])
+    return [part for part in parts if part]
+
+
+def expand_hostlist(hostlist: str) -> list[str]:
+    """Return the names of a Slurm hostlist, e.g. nid[001000-001002,001010] or login[1-2],dvn01"""
+    names = []
+    for part in _split_hostlist(hostlist.strip()):
+        match = _HOSTLIST_RANGE.match(part)
+        if match is None:
+            names.append(part)
+            continue
+
+        for item in match["ranges"].split(","):
+            first, _, last = item.partition("-")
+            for number in range(int(first), int(last or first) + 1):
+                # Zero padding is given by the width of the first number of the range
+                names += expand_hostlist(f"{match['prefix']}{number:0{len(first)}d}{match['suffix']}")
+
+    return names
+
+
+class Topology:
+    """Leaf switch and group of every node"""
+
+    def __init__(self, switches: dict[str, str], groups: dict[str, str]):
+        #: Leaf switch of each node
+        self.switches = switches
+
+        #: Group, the parent switch, of each leaf switch
+        self.groups = groups
+
+    @classmethod
+    def from_file(cls, path: str) -> "Topology":
+        """Read a Slurm topology.conf file"""
+        switches, groups = {}, {}
+        with open(path, encoding="utf-8") as fp:
+            for line in fp:
+                fields = dict(field.split("=", 1) for field in line.split("#", 1)[0].split() if "=" in field)
+                if "SwitchName" not in fields:
+                    continue
+
+                for node in expand_hostlist(fields.get("Nodes", "")):
+                    switches[node] = fields["SwitchName"]
+
+                for switch in expand_hostlist(fields.get("Switches", "")):
+                    groups.setdefault(switch, fields["SwitchName"])
+
+        return cls(switches, groups)
+
+    def group(self, node: str) -> str:
+        """Return the group of a node, its leaf switch if it has no parent"""
+        return self.groups.get(self.switches[node], self.switches[node])
+
+    def distance(self, node_a: str, node_b: str) -> str:
+        """Return the distance class of two distinct nodes"""
+        if node_a == node_b:
+            return "node"
+
+        if self.switches[node_a] == self.switches[node_b]:
+            return "switch"
+
+        if self.group(node_a) == self.group(node_b):
+            return "group"
+
+        return "system"
+
+    def pair(self, nodes: list[str], distance: str, rng: random.Random = None) -> tuple[str, str]:
+        """Return a random pair of nodes at a distance of switch, group or system, or None if there is none"""
+        rng = rng or random.Random()
+        by_switch, by_group = {}, {}
+        for node in nodes:
+            if node in self.switches:
+                by_switch.setdefault(self.switches[node], []).append(node)
+                by_group.setdefault(self.group(node), {}).setdefault(self.switches[node], []).append(node)
+
+        if distance == "switch":
+            candidates = [sorted(members) for members in by_switch.values() if len(members) > 1]
+            return tuple(rng.sample(rng.choice(candidates), 2)) if candidates else None
+
+        if distance == "group":
+            candidates = [switches for switches in by_group.values() if len(switches) > 1]
+            if not candidates:
+                return None
+
+            switch_a, switch_b = rng.sample(sorted(rng.choice(candidates)), 2)
+            return rng.choice(by_switch[switch_a]), rng.choice(by_switch[switch_b])
+
+        if distance == "system":
+            if len(by_group) < 2:
+                return None
+
+            group_a, group_b = rng.sample(sorted(by_group), 2)
+            return (
+                rng.choice([node for members in by_group[group_a].values() for node in members]),
+                rng.choice([node for members in by_group[group_b].values() for node in members]),
+            )
+
+        raise ValueError(f"no pair of nodes at a distance of {distance!r}")
+
+
+def idle_nodes(partition: str = None) -> list[str]:
+    """Return the idle nodes of a Slurm partition, or none if sinfo fails"""
+    cmd = ["sinfo", "-h", "-N", "-t", "idle", "-o", "%N", *(["-p", partition] if partition else [])]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return []
+
+    return sorted(set(completed.stdout.split()))
+
+
+def main(argv=None):
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("topology", help="Slurm topology.conf file")
+    parser.add_argument("--distance", choices=DISTANCE_CLASSES[2:], default="system", help="distance of the pair")
+    parser.add_argument("--nodes", help="hostlist of the nodes to choose from, by default the idle nodes")
+    args = parser.parse_args(argv)
+
+    topology = Topology.from_file(args.topology)
+    nodes = expand_hostlist(args.nodes) if args.nodes else idle_nodes()
+    pair = topology.pair(nodes, args.distance)
+    if pair is None:
+        print(f"error: no pair of nodes at a distance of {args.distance}", file=sys.stderr)
+        return 1
+
+    print(",".join(pair))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
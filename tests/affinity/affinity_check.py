@@ -5,8 +5,10 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.packing import PackedJobMixin
 
-class AffinityTestBase(rfm.RegressionTest):
+
+class AffinityTestBase(rfm.RegressionTest, PackedJobMixin):
     """Base class for the affinity tests"""
 
     valid_systems = ["archer2:compute", "cirrus:compute"]
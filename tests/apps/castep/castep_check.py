@@ -4,8 +4,11 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.extraction import extractlast
+from epcc_reframe.impact import ImpactMixin
 
-class CASTEPBaseCheck(rfm.RunOnlyRegressionTest):
+
+class CASTEPBaseCheck(rfm.RunOnlyRegressionTest, ImpactMixin):
     """Base class for the CASTEP checks"""
 
     tags = {"applications", "performance"}
@@ -35,7 +38,7 @@ class CASTEPBaseCheck(rfm.RunOnlyRegressionTest):
     @performance_function("eV", perf_key="energy")
     def extract_energy(self):
         """Extract value of system energy for performance check"""
-        return sn.extractsingle(r"Final energy, E\s+=\s+(?P<energy>\S+)", self.keep_files[0], "energy", float, item=-1)
+        return extractlast(r"Final energy, E\s+=\s+(?P<energy>\S+)", self.keep_files[0], "energy", float)
 
     @performance_function("s", perf_key="runtime")
     def extract_runtime(self):
@@ -5,8 +5,10 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.impact import ImpactMixin
 
-class CP2KBaseCheck(rfm.RunOnlyRegressionTest):
+
+class CP2KBaseCheck(rfm.RunOnlyRegressionTest, ImpactMixin):
     """ReFrame CP2K test base class"""
 
     # Which modules to load in test
@@ -4,8 +4,12 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.extraction import extractlast
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
 
-class GromacsBaseCheck(rfm.RunOnlyRegressionTest):
+
+class GromacsBaseCheck(rfm.RunOnlyRegressionTest, HistoryReferenceMixin, ImpactMixin):
     """ReFrame base class for GROMACS tests"""
 
     valid_prog_environs = ["PrgEnv-gnu", "gcc", "nvidia-mpi"]
@@ -19,6 +23,9 @@ class GromacsBaseCheck(rfm.RunOnlyRegressionTest):
     use_multithreading = False
     tags = {"applications", "performance"}
 
+    # Only the performance is taken from the history, the energy is checked against its static reference
+    history_perf_vars = ["performance"]
+
     @sanity_function
     def assert_finished(self):
         """Sanity check that simulation finished successfully"""
@@ -27,7 +34,7 @@ class GromacsBaseCheck(rfm.RunOnlyRegressionTest):
     @performance_function("kJ/mol", perf_key="energy")
     def extract_energy(self):
         """Extract value of system energy for performance check"""
-        return sn.extractsingle(
+        return extractlast(
             r"\s+Potential\s+Kinetic En\.\s+Total Energy"
             r"\s+Conserved En\.\s+Temperature\n"
             r"(\s+\S+){2}\s+(?P<energy>\S+)(\s+\S+){2}\n"
@@ -35,13 +42,12 @@ class GromacsBaseCheck(rfm.RunOnlyRegressionTest):
             self.keep_files[0],
             "energy",
             float,
-            item=-1,
         )
 
     @performance_function("ns/day", perf_key="performance")
     def extract_perf(self):
         """Extract value of system energy for performance check"""
-        return sn.extractsingle(
+        return extractlast(
             r"Performance:\s+(?P<perf>\S+)",
             self.keep_files[0],
             "perf",
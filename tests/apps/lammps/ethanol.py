@@ -3,10 +3,11 @@
 import os
 
 import reframe as rfm
-import reframe.utility.sanity as sn
 
 from lammps_base import BuildLAMMPS, LAMMPSBase
 
+from epcc_reframe.extraction import extractlast
+
 
 class LAMMPSBaseEthanol(LAMMPSBase):
     """ReFrame LAMMPS Ethanol test base class"""
@@ -40,12 +41,11 @@ class LAMMPSBaseEthanol(LAMMPSBase):
     @performance_function("kJ/mol", perf_key="energy")
     def extract_energy(self):
         """Extract value of system energy for performance check"""
-        return sn.extractsingle(
+        return extractlast(
             r"\s+11000\s+\S+\s+\S+\s+(?P<energy>\S+)",
             self.keep_files[0],
             "energy",
             float,
-            item=-1,
         )
 
 
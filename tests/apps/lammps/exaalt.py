@@ -3,10 +3,12 @@
 import os
 
 import reframe as rfm
-import reframe.utility.sanity as sn
 
 from lammps_base import BuildLAMMPS, LAMMPSBase
 
+from epcc_reframe.extraction import extractlast
+from epcc_reframe.scaling import StrongScalingMixin, WeakScalingMixin, scale_grid
+
 
 class LAMMPSBaseExaalt(LAMMPSBase):
     """ReFrame LAMMPS Base class for Exaalt tests"""
@@ -49,14 +51,20 @@ class LAMMPSBaseExaalt(LAMMPSBase):
     @performance_function("kJ/mol", perf_key="energy")
     def extract_energy(self):
         """Extract value of system energy for performance check"""
-        return sn.extractsingle(
+        return extractlast(
             r"^\s+100\s+\S+\s+\S+\s+\S+\s+(?P<energy>\S+)\s+\S+\s+$",
             self.keep_files[0],
             "energy",
             float,
-            item=-1,
         )
 
+    @performance_function("s", perf_key="steptime")
+    def extract_steptime(self):
+        """Extract the time per step of the run"""
+        return extractlast(
+            r"Loop time of (?P<time>\S+) on \d+ procs for \d+ steps", self.keep_files[0], "time", float
+        ) / extractlast(r"Loop time of \S+ on \d+ procs for (?P<steps>\d+) steps", self.keep_files[0], "steps", int)
+
 
 @rfm.simple_test
 class LAMMPSExaaltSmall(LAMMPSBaseExaalt):
@@ -95,3 +103,58 @@ class LAMMPSExaaltRef(LAMMPSBaseExaalt):
 
     n_nodes = 1024
     time_limit = "30m"
+
+
+@rfm.simple_test
+class LAMMPSExaaltSmallScaling(LAMMPSExaaltSmall, StrongScalingMixin):
+    """ReFrame LAMMPS strong scaling of the small NERSC-10 Exaalt benchmark"""
+
+    descr = "Strong scaling of the small NERSC-10 Exaalt LAMMPS benchmark"
+    tags = {"applications", "performance", "scaling"}
+
+    scaling_nodes = parameter([4, 8, 16, 32])
+    time_limit = "1h"
+
+    reference = {
+        "archer2:compute": {
+            "energy": (-8.7467248, -0.001, 0.001, "kJ/mol"),
+        },
+    }
+
+    @run_after("init")
+    def set_scaling_n_nodes(self):
+        """sets the number of nodes of the point of the ladder"""
+        self.n_nodes = self.scaling_nodes
+
+
+@rfm.simple_test
+class LAMMPSExaaltWeakScaling(LAMMPSBaseExaalt, WeakScalingMixin):
+    """ReFrame LAMMPS weak scaling of the NERSC-10 Exaalt benchmark"""
+
+    descr = "Weak scaling of the NERSC-10 Exaalt LAMMPS benchmark at the size per node of the small test"
+    tags = {"applications", "performance", "scaling"}
+
+    scaling_nodes = parameter([1, 2, 4, 8, 16, 32, 64])
+    time_limit = "30m"
+
+    # Set for each point of the ladder
+    n_nodes = 1
+
+    # Grid of the first point of the ladder, that of LAMMPSExaaltSmall per node
+    base_grid = variable(list, value=[128, 128, 64])
+
+    reference = {}
+
+    @run_after("init")
+    def set_weak_scaling_input(self):
+        """sets the number of nodes and grows the grid with it"""
+        self.n_nodes = self.scaling_nodes
+        nx, ny, nz = scale_grid(self.base_grid, round(self.scaling_factor))
+        self.executable_opts = [
+            "-in in.snap.test",
+            "-var snapdir 2J8_W.SNAP",
+            f"-var nx {nx}",
+            f"-var ny {ny}",
+            f"-var nz {nz}",
+            "-var nsteps 100",
+        ]
@@ -5,21 +5,33 @@ import os
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.buildcache import BuildCacheMixin
+from epcc_reframe.extraction import extractlast
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.mirror import ArtifactMirrorMixin
 
-class BuildLAMMPS(rfm.CompileOnlyRegressionTest):
+LAMMPS_VERSION = "stable_29Aug2024_update2"
+
+
+class BuildLAMMPS(rfm.CompileOnlyRegressionTest, BuildCacheMixin, ArtifactMirrorMixin):
     """Compile LAMMPS"""
 
     build_system = "CMake"
     modules = ["cpe", "cray-fftw", "cmake", "eigen"]
     sourcesdir = "https://github.com/lammps/lammps.git"
     sourcepath = "src"
-    prebuild_cmds = ["git checkout stable_29Aug2024_update2"]
+    prebuild_cmds = [f"git checkout {LAMMPS_VERSION}"]
     local = True
     build_locally = False
+    build_cache_revision = LAMMPS_VERSION
+    # liblammps.so is found through the absolute path of the build directory
+    build_cache_relocatable = False
 
     @run_before("compile")
     def prepare_build(self):
         """Prepare build"""
+        self.sourcesdir = self.git_url(self.sourcesdir)
         self.build_system.max_concurrency = 8
         self.build_system.builddir = f"{self.stagedir}/lammps_build"
         #  Equivalent to:
@@ -47,7 +59,7 @@ class BuildLAMMPS(rfm.CompileOnlyRegressionTest):
         return sn.path_exists(os.path.join(build_dir, "lmp"))
 
 
-class LAMMPSBase(rfm.RunOnlyRegressionTest):
+class LAMMPSBase(rfm.RunOnlyRegressionTest, HistoryReferenceMixin, ImpactMixin):
     """ReFrame base class for LAMMPS tests"""
 
     valid_prog_environs = ["PrgEnv-cray", "intel", "nvidia-mpi", "rocm-PrgEnv-cray"]
@@ -60,6 +72,9 @@ class LAMMPSBase(rfm.RunOnlyRegressionTest):
     strict_check = True
     tags = {"applications", "performance"}
 
+    # Only the performance is taken from the history, the energy of some tests is checked against its static reference
+    history_perf_vars = ["performance"]
+
     @sanity_function
     def assert_finished(self):
         """Sanity check that simulation finished successfully"""
@@ -68,10 +83,9 @@ class LAMMPSBase(rfm.RunOnlyRegressionTest):
     @performance_function("ns/day", perf_key="performance")
     def extract_perf(self):
         """Extract performance value to compare with reference value"""
-        return sn.extractsingle(
+        return extractlast(
             r"Performance:\s+(?P<perf>\S+)",
             self.keep_files[0],
             "perf",
             float,
-            -1,
         )
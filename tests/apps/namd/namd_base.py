@@ -3,8 +3,12 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.extraction import extractlast
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
 
-class NAMDBase(rfm.RunOnlyRegressionTest):
+
+class NAMDBase(rfm.RunOnlyRegressionTest, HistoryReferenceMixin, ImpactMixin):
     """ReFrame base class for NAMD tests"""
 
     valid_prog_environs = ["intel", "nvidia-mpi", "PrgEnv-cray"]
@@ -15,6 +19,9 @@ class NAMDBase(rfm.RunOnlyRegressionTest):
     strict_check = True
     tags = {"applications", "performance"}
 
+    # Only the performance is taken from the history, the energy is checked against its static reference
+    history_perf_vars = ["performance"]
+
     qos = variable(str, value="standard")
 
     input_file = variable(str)
@@ -57,23 +64,21 @@ class NAMDBase(rfm.RunOnlyRegressionTest):
     @performance_function("kcal/mol", perf_key="energy")
     def extract_energy(self):
         """Extract value of system energy for performance check"""
-        return sn.extractsingle(
+        return extractlast(
             r"ENERGY:(\s+\S+\s+){10}\s+(?P<total_energy>\S+)\s+",
             self.stdout,
             "total_energy",
             float,
-            item=-1,
         )
 
     @performance_function("ns/day", perf_key="performance")
     def extract_perf(self):
         """Extract performance value to compare with reference value"""
-        return 1 / sn.extractsingle(
+        return 1 / extractlast(
             r"Info: Benchmark time: \S+ CPUs \S+ s/step (?P<perf>\S+) days/ns",
             self.stdout,
             "perf",
             float,
-            item=-1,
         )
 
 
@@ -10,8 +10,10 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.impact import ImpactMixin
 
-class TestModuleNektarplusplusBase(rfm.RunOnlyRegressionTest):
+
+class TestModuleNektarplusplusBase(rfm.RunOnlyRegressionTest, ImpactMixin):
     """Nektarplusplus Test Base"""
 
     descr = "Test Nektarplusplus Base"
@@ -11,33 +11,46 @@ import os
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.buildcache import BuildCacheMixin
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.mirror import ArtifactMirrorMixin
+from epcc_reframe.scaling import StrongScalingMixin
 
 NEKTAR_VERSION = "5.5.0"
 NEKTAR_LABEL = "nektar"
 NEKTAR_ARCHIVE = f"{NEKTAR_LABEL}-v{NEKTAR_VERSION}.tar.gz"
 NEKTAR_NAME = f"{NEKTAR_LABEL}-{NEKTAR_VERSION}"
+NEKTAR_URL = f"https://gitlab.nektar.info/nektar/nektar/-/archive/v{NEKTAR_VERSION}/{NEKTAR_ARCHIVE}"
 
 
-class FetchNektarplusplus(rfm.RunOnlyRegressionTest):
+class FetchNektarplusplus(rfm.RunOnlyRegressionTest, ArtifactMirrorMixin):
     """Test access to nektarplusplus source code"""
 
     descr = "Fetch Nektarplusplus"
     version = variable(str, value=NEKTAR_VERSION)
-    executable = "wget"
-    executable_opts = [f"https://gitlab.nektar.info/nektar/nektar/-/archive/v{NEKTAR_VERSION}/{NEKTAR_ARCHIVE}"]
+
+    # Checksum of the archive, which is generated by GitLab rather than released as a
+    # file; without it the mirror records the checksum of the first download
+    sha256 = variable(str, type(None), value=None)
+
     local = True
     valid_systems = ["archer2:login"]
     valid_prog_environs = ["PrgEnv-gnu"]
 
     tags = {"fetch"}
 
+    @run_before("run")
+    def set_executable(self):
+        """Download the tarball, through the artifact mirror if there is one"""
+        self.executable = self.fetch_cmd(NEKTAR_URL, self.sha256)
+
     @sanity_function
     def validate_download(self):
         """Validate download of source code sucessful"""
         return sn.assert_eq(self.job.exitcode, 0)
 
 
-class CompileNektarplusplus(rfm.CompileOnlyRegressionTest):
+class CompileNektarplusplus(rfm.CompileOnlyRegressionTest, BuildCacheMixin):
     """Test compilation of nektarplusplus"""
 
     descr = "Build Nektarplusplus"
@@ -52,6 +65,8 @@ class CompileNektarplusplus(rfm.CompileOnlyRegressionTest):
     env_vars = {"CRAY_ADD_RPATH": "yes"}
 
     build_prefix = ""
+    # The solvers find the Nektar++ libraries through the absolute path of the build directory
+    build_cache_relocatable = False
 
     @run_before("compile")
     def prepare_build(self):
@@ -60,6 +75,7 @@ class CompileNektarplusplus(rfm.CompileOnlyRegressionTest):
         self.build_prefix = f"{NEKTAR_NAME}"
 
         fullpath = os.path.join(self.fetch_nektarpp.stagedir, tarball)
+        self.build_cache_inputs = [fullpath]
 
         self.prebuild_cmds = [
             f"cp {fullpath} {self.stagedir}",
@@ -77,7 +93,7 @@ class CompileNektarplusplus(rfm.CompileOnlyRegressionTest):
         return sn.path_isfile(f"{NEKTAR_NAME}/build/nektar/bin/IncNavierStokesSolver")
 
 
-class TestNektarplusplusBase(rfm.RunOnlyRegressionTest):
+class TestNektarplusplusBase(rfm.RunOnlyRegressionTest, ImpactMixin):
     """Nektarplusplus Test"""
 
     descr = "Test Nektarplusplus"
@@ -179,3 +195,18 @@ class TestNektarpluslusMultiNode(TestNektarplusplusBase):
     executable_opts = ["TGV128_mesh.xml TGV128_conditions.xml"]
 
     reference = {"archer2:compute": {"Computationtime": (1570, -0.1, 0.1, "seconds")}}
+
+
+@rfm.simple_test
+class TestNektarpluslusMultiNodeScaling(TestNektarpluslusMultiNode, StrongScalingMixin):
+    """Nektarplusplus Test Multi Node strong scaling"""
+
+    descr = "Test Nektarplusplus Multi Node strong scaling"
+
+    tags = {"performance", "applications", "scaling"}
+
+    scaling_nodes = parameter([1, 2, 4, 8])
+    # The total computation time is proportional to the time per step
+    scaling_time_var = "Computationtime"
+
+    reference = {}
@@ -5,8 +5,10 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.impact import ImpactMixin
 
-class OpenSBLIBaseCheck(rfm.RunOnlyRegressionTest):
+
+class OpenSBLIBaseCheck(rfm.RunOnlyRegressionTest, ImpactMixin):
     """Base class for SBLI test"""
 
     executable = "./OpenSBLI_mpi_openmp"
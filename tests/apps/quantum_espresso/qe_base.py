@@ -3,8 +3,11 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.extraction import OutputParserMixin
+from epcc_reframe.impact import ImpactMixin
 
-class QEBaseEnvironment(rfm.RunOnlyRegressionTest):
+
+class QEBaseEnvironment(rfm.RunOnlyRegressionTest, OutputParserMixin, ImpactMixin):
     """Definition of functions used for all QE ReFrame tests"""
 
     # Set the version of QE, i.e. 6.8, 7.1, 7.3.1
@@ -52,8 +55,7 @@ class QEBaseEnvironment(rfm.RunOnlyRegressionTest):
 
         return float(days) * 86400 + float(hours) * 3600 + float(minutes) * 60 + float(seconds)
 
-    @performance_function("s")
-    def extract_report_time(self, name: str = None, kind: str = None) -> float:
+    def extract_report_time(self, name: str = None, kind: str = None):
         """Extract timings from pw.x stdout
         Args:
             name (str, optional): Name of the timing to extract.
@@ -61,11 +63,11 @@ class QEBaseEnvironment(rfm.RunOnlyRegressionTest):
         Raises:
             ValueError: If the kind is not 'cpu' or 'wall'
         Returns:
-            float: The timing in seconds
+            Performance function of the timing in seconds
         """
 
         if kind is None:
-            return 0
+            return sn.make_performance_function(sn.defer(0), "s")
         kind = kind.lower()
         if kind == "cpu":
             tag = 1
@@ -76,8 +78,9 @@ class QEBaseEnvironment(rfm.RunOnlyRegressionTest):
 
         # Possible formats
         #       PWSCF        :   4d 6h19m CPU  10d14h38m WALL
+        # All timings are read from stdout in a single pass, see OutputParserMixin.
 
         execute_time = self.convert_timings(
-            sn.extractsingle(rf"{name}\s+:\s+(.+)\s+CPU\s+(.+)\s+WALL", self.stdout, tag, str).evaluate()
+            self.extract_output(rf"{name}\s+:\s+(.+)\s+CPU\s+(.+)\s+WALL", self.stdout, tag, str)
         )
-        return execute_time
+        return sn.make_performance_function(execute_time, "s")
@@ -4,8 +4,10 @@ import reframe as rfm
 import reframe.utility.sanity as sn
 from qe_base import QEBaseEnvironment
 
+from epcc_reframe.buildcache import BuildCacheMixin
 
-class QESourceBuild(rfm.CompileOnlyRegressionTest):
+
+class QESourceBuild(rfm.CompileOnlyRegressionTest, BuildCacheMixin):
     """Build QE from source, mimicking the ARCHER2 module version"""
 
     build_system = "CMake"
@@ -10,9 +10,15 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.mirror import ArtifactMirrorMixin
+from epcc_reframe.scaling import StrongScalingMixin
+
+INCOMPACT3D_URL = "https://github.com/xcompact3d/Incompact3d.git"
+
 
 @rfm.simple_test
-class XCompact3DLargeTest(rfm.RegressionTest):
+class XCompact3DLargeTest(rfm.RegressionTest, ArtifactMirrorMixin, ImpactMixin):
     """XCompact 3D Large Test"""
 
     valid_systems = ["archer2:compute"]
@@ -29,11 +35,6 @@ class XCompact3DLargeTest(rfm.RegressionTest):
 
     time_limit = "1h"
     build_system = "CMake"
-    build_system.ftn = "ftn"
-    prebuild_cmds = [
-        "git clone https://github.com/xcompact3d/Incompact3d.git",
-        "cd Incompact3d",
-    ]
     builddir = "Incompact3d"
     executable = "Incompact3d/bin/xcompact3d"
     executable_opts = ["large.i3d"]
@@ -41,6 +42,19 @@ class XCompact3DLargeTest(rfm.RegressionTest):
 
     reference = {"archer2:compute": {"steptime": (6.3, -0.2, 0.2, "seconds")}}
 
+    @run_before("compile")
+    def set_compiler(self):
+        """Build with the Cray Fortran compiler wrapper"""
+        self.build_system.ftn = "ftn"
+
+    @run_before("compile")
+    def set_prebuild_cmds(self):
+        """Clone the sources, from the artifact mirror if there is one"""
+        self.prebuild_cmds = [
+            f"git clone {self.git_url(INCOMPACT3D_URL)} Incompact3d",
+            "cd Incompact3d",
+        ]
+
     @sanity_function
     def assert_finished(self):
         """Sanity check that simulation finished successfully"""
@@ -55,3 +69,13 @@ class XCompact3DLargeTest(rfm.RegressionTest):
             "steptime",
             float,
         )
+
+
+@rfm.simple_test
+class XCompact3DLargeScalingTest(XCompact3DLargeTest, StrongScalingMixin):
+    """XCompact 3D Large Test strong scaling"""
+
+    scaling_nodes = parameter([256, 512, 1024])
+    scaling_time_var = "performance"
+
+    reference = {}
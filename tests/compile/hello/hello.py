@@ -3,6 +3,8 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.packing import PackedJobMixin
+
 
 class HelloTestBase(rfm.RegressionTest):
     """Base class for hello world tests"""
@@ -24,7 +26,7 @@ class HelloTestBase(rfm.RegressionTest):
 
 
 @rfm.simple_test
-class HelloTestCPU(HelloTestBase):
+class HelloTestCPU(HelloTestBase, PackedJobMixin):
     """CPU systems test class"""
 
     valid_systems = ["-gpu"]
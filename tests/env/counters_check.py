@@ -9,9 +9,11 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.packing import PackedJobMixin
+
 
 @rfm.simple_test
-class CrayCountersEnergyTest(rfm.RunOnlyRegressionTest):
+class CrayCountersEnergyTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the Node Energy counter is reporting"""
 
     descr = "Checks whether the node energy pm counter is accessible and reporting"
@@ -29,7 +31,7 @@ class CrayCountersEnergyTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CrayCountersPowerTest(rfm.RunOnlyRegressionTest):
+class CrayCountersPowerTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the Node Power counter is reporting"""
 
     descr = "Checks whether the node power pm counter is accessible and reporting"
@@ -47,7 +49,7 @@ class CrayCountersPowerTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CrayCountersCPUEnergyTest(rfm.RunOnlyRegressionTest):
+class CrayCountersCPUEnergyTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the CPU Energy counter is reporting"""
 
     descr = "Checks whether the cpu energy pm counter is accessible and reporting"
@@ -65,7 +67,7 @@ class CrayCountersCPUEnergyTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CrayCountersCPUPowerTest(rfm.RunOnlyRegressionTest):
+class CrayCountersCPUPowerTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the CPU Power counter is reporting"""
 
     descr = "Checks whether the cpu power pm counter is accessible and reporting"
@@ -83,7 +85,7 @@ class CrayCountersCPUPowerTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CrayCountersMemoryEnergyTest(rfm.RunOnlyRegressionTest):
+class CrayCountersMemoryEnergyTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the Memory Energy counter is reporting"""
 
     descr = "Checks whether the memory energy pm counter is accessible and reporting"
@@ -101,7 +103,7 @@ class CrayCountersMemoryEnergyTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CrayCountersMemPowerTest(rfm.RunOnlyRegressionTest):
+class CrayCountersMemPowerTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the Memory Power counter is reporting"""
 
     descr = "Checks whether the memory power pm counter is accessible and reporting"
@@ -119,7 +121,7 @@ class CrayCountersMemPowerTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CrayCountersCPU0TempTest(rfm.RunOnlyRegressionTest):
+class CrayCountersCPU0TempTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the CPU 0 Temperature counter is reporting"""
 
     descr = "Checks whether the cpu 0 temperature pm counter is accessible and reporting"
@@ -137,7 +139,7 @@ class CrayCountersCPU0TempTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CrayCountersCPU1TempTest(rfm.RunOnlyRegressionTest):
+class CrayCountersCPU1TempTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that the CPU 1 Temperature counter is reporting"""
 
     descr = "Checks whether the cpu 1 temperature pm counter is accessible and reporting"
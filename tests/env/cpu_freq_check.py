@@ -9,9 +9,11 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.packing import PackedJobMixin
+
 
 @rfm.simple_test
-class CPUFreqTest(rfm.RunOnlyRegressionTest):
+class CPUFreqTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that CPU frequency is set to 2GHz by default"""
 
     descr = "Checks whether SLURM_CPU_FREQ_REQ is set to 2GHz by default"
@@ -30,7 +32,7 @@ class CPUFreqTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class CPUHighFreqTest(rfm.RunOnlyRegressionTest):
+class CPUHighFreqTest(rfm.RunOnlyRegressionTest, PackedJobMixin):
     """Checks that CPU frequency is set to 2.25GHz"""
 
     descr = "Checks whether SLURM_CPU_FREQ_REQ can be set to 2.25GHz is set by slurm"
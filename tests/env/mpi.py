@@ -9,9 +9,11 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.packing import PackedJobMixin
+
 
 @rfm.simple_test
-class MpiInitTest(rfm.RegressionTest):
+class MpiInitTest(rfm.RegressionTest, PackedJobMixin):
     """This test checks the value returned by calling MPI_Init_thread.
 
     Output should look the same for every prgenv
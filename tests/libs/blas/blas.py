@@ -3,8 +3,11 @@
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
 
-class BLASBase(rfm.RegressionTest):
+
+class BLASBase(rfm.RegressionTest, ImpactMixin):
     """Base class for BLAS tests"""
 
     maintainers = ["e.broadway@epcc.ed.ac.uk"]
@@ -113,3 +116,114 @@ class CirrusBlasTest(BLASBase):
             self.prebuild_cmds = ["module load intel-20.4/cmkl"]
         else:
             self.prebuild_cmds = []
+
+
+class DGEMMBase(rfm.RegressionTest, HistoryReferenceMixin, ImpactMixin):
+    """
+    Base class for DGEMM tests, over a sweep of matrix sizes on a single core or on every core of a node. The
+    node mode runs one single threaded DGEMM per core, so its performance is limited by the all-core frequency.
+    """
+
+    maintainers = ["e.broadway@epcc.ed.ac.uk"]
+    build_system = "Make"
+    # Smallest and largest matrix sizes of the sweep and the repetitions of the largest size
+    executable_opts = ["256", "4096", "3"]
+    extra_resources = {"qos": {"qos": "standard"}}
+    use_multithreading = False
+    tags = {"performance", "functionality", "short"}
+
+    mode = parameter(["core", "node"])
+
+    # Theoretical double precision peak of a core in Gflops/s, 16 flops per cycle from two 256-bit FMA units
+    #   ARCHER2: AMD EPYC 7742 at 2.25 GHz
+    #   Cirrus: Intel Xeon E5-2695 v4 at 2.1 GHz
+    peak_per_core = variable(
+        dict,
+        value={"archer2:compute": 36.0, "archer2:login": 36.0, "cirrus:compute": 33.6, "cirrus:login": 33.6},
+    )
+
+    @run_after("init")
+    def restrict_node_mode(self):
+        """Only run on every core of compute nodes"""
+        if self.mode == "node":
+            self.valid_systems = [system if ":" in system else f"{system}:compute" for system in self.valid_systems]
+
+    @run_after("setup")
+    def change_make_exe(self):
+        """Rename files according to variant"""
+        self.build_system.makefile = f"Makefile.dgemm.{self.variant}"
+        self.executable = f"./dgemm_{self.variant}.x"
+
+    @run_before("run")
+    def set_sweep(self):
+        """Run on one core or every core and add the performance of each size and the fraction of peak"""
+        cores = (self.current_partition.processor.num_cpus or 1) if self.mode == "node" else 1
+        self.num_tasks = cores
+        self.num_tasks_per_node = cores
+        self.num_cpus_per_task = 1
+
+        partition = self.current_partition.fullname
+        smallest, largest = int(self.executable_opts[0]), int(self.executable_opts[1])
+        gflops = {}
+        for size in (smallest << i for i in range((largest // smallest).bit_length())):
+            gflops[size] = sn.sum(sn.extractall(rf"^DGEMM {size} =\s+(?P<gflops>\S+)", self.stdout, "gflops", float))
+            self.perf_variables[f"dgemm_{size}"] = sn.make_performance_function(gflops[size], "Gflops/s")
+
+        peak = self.peak_per_core.get(partition)
+        if peak:
+            self.perf_variables["peak_fraction"] = sn.make_performance_function(
+                100 * gflops[largest] / (peak * cores), "%"
+            )
+            # Floor until there is enough history, a DGEMM of half the peak is a wrong library or frequency
+            self.reference[f"{partition}:peak_fraction"] = (100, -0.5, None, "%")
+
+    @sanity_function
+    def assert_finished(self):
+        """Checks that every task ran the largest size"""
+        return sn.assert_eq(sn.count(sn.findall(rf"^DGEMM {self.executable_opts[1]} =", self.stdout)), self.num_tasks)
+
+
+@rfm.simple_test
+class ARCHER2DgemmTest(DGEMMBase):
+    """ARCHER2 DGEMM test class"""
+
+    variant = parameter(["libsci", "mkl"])
+
+    valid_systems = ["archer2"]
+    valid_prog_environs = ["PrgEnv-gnu", "PrgEnv-aocc", "PrgEnv-cray"]
+    env_vars = {"SLURM_CPU_FREQ_REQ": "2250000"}
+
+    @run_after("setup")
+    def load_module(self):
+        """load correct module"""
+        if self.variant == "mkl":
+            self.modules = ["mkl"]
+            self.prebuild_cmds = ["module load mkl"]
+        else:
+            self.prebuild_cmds = []
+
+
+@rfm.simple_test
+class CirrusDgemmTest(DGEMMBase):
+    """Cirrus DGEMM test class"""
+
+    variant = parameter(["mkl"])
+
+    valid_systems = ["cirrus"]
+    valid_prog_environs = ["gcc", "intel"]
+
+    @run_after("setup")
+    def change_make_exe(self):
+        """Select the makefile of the compiler"""
+        compiler = "gnu" if self.current_environ.name == "gcc" else "intel"
+        self.build_system.makefile = f"Makefile.dgemm.{self.variant}.{compiler}.cirrus"
+        self.executable = f"./dgemm_{self.variant}.x"
+
+    @run_after("setup")
+    def load_module(self):
+        """load correct module"""
+        if self.variant == "mkl":
+            self.modules = ["intel-20.4/cmkl"]
+            self.prebuild_cmds = ["module load intel-20.4/cmkl"]
+        else:
+            self.prebuild_cmds = []
@@ -0,0 +1,85 @@
+!
+! DGEMM simple benchmark
+!    Runs of DGEMM with square matrices over a sweep of sizes, doubling from
+!    the smallest to the largest size. Outputs performance in Gflop/s for
+!    each size. The number of repetitions is given for the largest size and
+!    scaled for the others, so that every size does the same number of flops.
+!
+! Usage:
+!    dgemm_benchmark.x <smallest size> <largest size> <repetitions>
+!
+! Based on the DGEMV benchmark by A. Turner, EPCC
+!
+program dgemm_benchmark
+   use, intrinsic :: iso_fortran_env
+   implicit none
+
+   integer, parameter :: dp = REAL64
+
+   integer(4) :: i, j
+   integer(8) :: crate, cstart, cend, irun, nrun
+   real(kind=dp) :: etime, flops
+   character(100) :: arg
+
+   integer(4) :: n, nmin, nmax, nrunmax
+   real(kind=dp) :: alpha, beta
+   real(kind=dp), dimension(:,:), allocatable :: a, b, c
+
+   ! Read in parameters
+   call get_command_argument(1, arg)
+   read(arg,*) nmin
+   call get_command_argument(2, arg)
+   read(arg,*) nmax
+   call get_command_argument(3, arg)
+   read(arg,*) nrunmax
+
+   ! Initialise values
+   alpha = 1.0_dp
+   beta = 0.0_dp
+
+   ! Initialise clock
+   call system_clock(count_rate=crate)
+
+   n = nmin
+   do while (n <= nmax)
+      ! Allocate and assign arrays
+      allocate(a(n,n))
+      allocate(b(n,n))
+      allocate(c(n,n))
+      do j = 1, n
+         do i = 1, n
+            a(i,j) = 1.0_dp / real(i + j, dp)
+            b(i,j) = real(i - j, dp) / real(n, dp)
+            c(i,j) = 0.0_dp
+         end do
+      end do
+
+      nrun = max(1_8, int(nrunmax, 8) * (int(nmax, 8) / int(n, 8))**3)
+
+      ! Warm up
+      call dgemm('N', 'N', n, n, n, alpha, a, n, b, n, beta, c, n)
+
+      ! Run the benchmark
+      call system_clock(cstart)
+      do irun = 1, nrun
+         call dgemm('N', 'N', n, n, n, alpha, a, n, b, n, beta, c, n)
+      end do
+      call system_clock(cend)
+
+      ! Compute execution time
+      etime = real(cend - cstart, dp) / real(crate, dp)
+
+      ! Compute Gflops
+      flops = 2.0_dp * real(n, dp)**3
+      flops = real(nrun, dp) * flops / (etime * 1000.0_dp**3)
+
+      write(*,'(a, i0, a, e13.5)') "DGEMM ", n, " = ", flops
+
+      deallocate(a)
+      deallocate(b)
+      deallocate(c)
+
+      n = 2 * n
+   end do
+
+end program dgemm_benchmark
@@ -4,7 +4,6 @@
 import copy
 
 import reframe as rfm
-import reframe.utility.sanity as sn
 
 from cosmo_base import CosmoFlowBaseCheck
 
@@ -54,6 +53,15 @@ class CosmoFlowGPUServiceBenchmark(CosmoFlowBaseCheck):
 
     valid_prog_environs = ["*"]
     valid_systems = ["eidf:gpu-service"]
+    mlperf_metrics = [
+        "Throughput",
+        "Epoch Length",
+        "Delta Loss",
+        "Communication Time",
+        "Total IO Time",
+        "Avg GPU Power Draw",
+        "Avg GPU Utilization",
+    ]
     env_vars = {"KUBECONFIG": "/kubernetes/config"}
     job_name = "mlperf-cosmoflow"
 
@@ -94,26 +102,3 @@ class CosmoFlowGPUServiceBenchmark(CosmoFlowBaseCheck):
         pod_info["spec"]["volumes"][0]["persistentVolumeClaim"]["claimName"] = "cosmoflow-pvc"
 
         self.k8s_config = pod_info
-
-    @performance_function("W", perf_key="Avg GPU Power Draw:")
-    def extract_gpu_power_draw(self):
-        """Extracts gpu power draw"""
-        return sn.extractsingle(r"Avg GPU Power Draw: (.*)", self.stdout, tag=1, conv=float)
-
-    @performance_function("%", perf_key="Avg GPU Utilization:")
-    def extract_gpu_util(self):
-        """Extracts gpu utilization percentage"""
-        return sn.extractsingle(r"Avg GPU Utilization: (.*)", self.stdout, tag=1, conv=float)
-
-    @run_before("performance")
-    def set_perf_variables(self):
-        """Sets performance variables"""
-        self.perf_variables = {
-            "Throughput": self.extract_throughput(),
-            "Epoch Length": self.extract_epoch_length(),
-            "Delta Loss": self.extract_delta_loss(),
-            "Communication Time": self.extract_communication(),
-            "Avg GPU Power Draw": self.extract_gpu_power_draw(),
-            "Avg GPU Utilization": self.extract_gpu_util(),
-            "Total IO Time": self.extract_IO(),
-        }
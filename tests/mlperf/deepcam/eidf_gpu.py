@@ -5,7 +5,6 @@
 import copy
 
 import reframe as rfm
-import reframe.utility.sanity as sn
 
 from deepcam_base import DeepCamBaseCheck
 
@@ -55,6 +54,7 @@ class DeepCAMGPUServiceBenchmark(DeepCamBaseCheck):
 
     valid_prog_environs = ["*"]
     valid_systems = ["eidf:gpu-service"]
+    mlperf_metrics = ["Throughput", "Epoch Length", "Communication Time", "Total IO Time", "Avg GPU Power Draw"]
 
     num_gpus = parameter([4])
     lbs = 1
@@ -99,18 +99,3 @@ class DeepCAMGPUServiceBenchmark(DeepCamBaseCheck):
         pod_info["spec"]["volumes"][0]["persistentVolumeClaim"]["claimName"] = pvc
 
         self.k8s_config = pod_info
-
-    @performance_function("W", perf_key="Avg GPU Power Draw:")
-    def extract_gpu_power_draw(self):
-        """Extracts gpu power draw"""
-        return sn.extractsingle(r"Avg GPU Power Draw: (.*)", self.stdout, tag=1, conv=float)
-
-    @run_before("performance")
-    def set_perf_variables(self):
-        self.perf_variables = {
-            "Throughput": self.extract_throughput(),
-            "Epoch Length": self.extract_epoch_length(),
-            "Communication Time": self.extract_communication(),
-            "Avg GPU Power Draw": self.extract_gpu_power_draw(),
-            "Total IO Time": self.extract_IO(),
-        }
@@ -2,9 +2,7 @@
 
 """Resnet50 tests for EIDF system"""
 
-
 import reframe as rfm
-import reframe.utility.sanity as sn
 import yaml
 
 from resnet_base import ResNet50BaseCheck
@@ -16,6 +14,14 @@ class ResNetGPUServiceBenchmark(ResNet50BaseCheck):
 
     valid_prog_environs = ["*"]
     valid_systems = ["eidf:gpu-service"]
+    mlperf_metrics = [
+        "Throughput",
+        "Epoch Length",
+        "Delta Loss",
+        "Communication Time",
+        "Total IO Time",
+        "Avg GPU Power Draw",
+    ]
     num_gpus = parameter([4])
     lbs = parameter([8])
 
@@ -54,19 +60,3 @@ class ResNetGPUServiceBenchmark(ResNet50BaseCheck):
 
         self.file = f"pod-{jobname}.yaml"
         self.k8s_config = pod_info
-
-    @performance_function("W", perf_key="Avg GPU Power Draw:")
-    def extract_gpu_power_draw(self):
-        """Extracts gpu power draw"""
-        return sn.extractsingle(r"Avg GPU Power Draw: (.*)", self.stdout, tag=1, conv=float)
-
-    @run_before("performance")
-    def set_perf_variables(self):
-        self.perf_variables = {
-            "Throughput": self.extract_throughput(),
-            "Epoch Length": self.extract_epoch_length(),
-            "Delta Loss": self.extract_delta_loss(),
-            "Communication Time": self.extract_communication(),
-            "Avg GPU Power Draw": self.extract_gpu_power_draw(),
-            "Total IO Time": self.extract_IO(),
-        }
@@ -18,9 +18,11 @@ import os
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.extraction import OutputParserMixin
+
 
 @rfm.simple_test
-class BenchioMPIIOUCXBase(rfm.RegressionTest):
+class BenchioMPIIOUCXBase(rfm.RegressionTest, OutputParserMixin):
     """BenchioMPIIOUCX test class"""
 
     valid_systems = ["archer2:compute"]
@@ -50,22 +52,22 @@ class BenchioMPIIOUCXBase(rfm.RegressionTest):
         """Sanity checks"""
         return sn.assert_found(r"Finished", self.stdout)
 
-    @performance_function("GiB/s")
     def extract_write_bw(self, thetype="mpiio", striping="fullstriped"):
         """Extract writing speed performance value"""
-        return sn.extractsingle(
+        return self.extract_perf(
             r"Writing to " + striping + "/" + thetype + r"\.dat\W*\n\W*time\W*=\W*\d+.\d*\W*,\W*rate\W*=\W*(\d+.\d*)",
             self.stdout,
+            "GiB/s",
             1,
             float,
         )
 
-    @performance_function("s")
     def extract_write_time(self, thetype="mpiio", striping="fullstriped"):
         """Extract writing time performance value"""
-        return sn.extractsingle(
+        return self.extract_perf(
             r"Writing to " + striping + "/" + thetype + r"\.dat\W*\n\W*time\W*=\W*(\d+.\d*)\W*,\W*rate\W*=\W*\d+.\d*",
             self.stdout,
+            "s",
             1,
             float,
         )
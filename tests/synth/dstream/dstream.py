@@ -9,13 +9,22 @@ by Adrian Jackson, EPCC. The modification removed the dependence on the MXML
 library to provide a simpler test program
 """
 
+import os
+
 import reframe as rfm
 import reframe.utility.sanity as sn
+from reframe.core.backends import getlauncher
+
+from epcc_reframe.extraction import extractlast
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.scaling import WeakScalingMixin
+from epcc_reframe.stragglers import STRAGGLER_REPORT, parse_node_results, write_report
 
 
 @rfm.simple_test
-class StreamTest(rfm.RegressionTest):
-    """Stream test class"""
+class StreamTest(rfm.RegressionTest, HistoryReferenceMixin, ImpactMixin):
+    """Stream test class, references are taken from the last runs when there is enough history"""
 
     valid_systems = ["archer2:compute", "cirrus:compute"]
     valid_prog_environs = ["*"]
@@ -59,22 +68,22 @@ class StreamTest(rfm.RegressionTest):
     @performance_function("MB/s", perf_key="Copy")
     def extract_copy(self):
         """Extract copy performance value"""
-        return sn.extractsingle(r"Node Copy:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float, item=-1)
+        return extractlast(r"Node Copy:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float)
 
     @performance_function("MB/s", perf_key="Scale")
     def extract_scale(self):
         """Extract scale performance value"""
-        return sn.extractsingle(r"Node Scale:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float, item=-1)
+        return extractlast(r"Node Scale:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float)
 
     @performance_function("MB/s", perf_key="Add")
     def extract_add(self):
         """Extract add performance value"""
-        return sn.extractsingle(r"Node Add:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float, item=-1)
+        return extractlast(r"Node Add:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float)
 
     @performance_function("MB/s", perf_key="Triad")
     def extract_triad(self):
         """Extract triad performance value"""
-        return sn.extractsingle(r"Node Triad:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float, item=-1)
+        return extractlast(r"Node Triad:(\s+\S+:){2}\s+(?P<val>\S+):", self.stdout, "val", float)
 
     @sanity_function
     def assert_benchio(self):
@@ -93,3 +102,192 @@ class StreamTest(rfm.RegressionTest):
         args = self.args.get(self.current_partition.fullname, ["24000000", "10000"])
         self.extra_resources = {"qos": {"qos": "standard"}}
         self.executable_opts = args
+
+
+@rfm.simple_test
+class StreamWeakScalingTest(StreamTest, WeakScalingMixin):
+    """
+    Weak scaling of the Stream test. The array size argument is the number of elements per node, split
+    between its processes, so the total size of the arrays grows with the number of nodes.
+    """
+
+    tags = {"performance", "scaling"}
+
+    scaling_nodes = parameter([1, 2, 4, 8, 16])
+    weak_scaling_var = "Triad"
+    weak_scaling_higher_is_better = True
+
+
+@rfm.simple_test
+class StreamNodeScreenTest(StreamTest):
+    """
+    Stream across a full allocation as a node health screen. The Triad bandwidth of every node is scored against
+    the median of the allocation and the slow nodes, if any, fail the test and are listed in its report.
+    """
+
+    tags = {"performance", "health", "largescale"}
+    keep_files = [STRAGGLER_REPORT]
+
+    # Nodes of the allocation
+    screen_nodes = variable(dict, value={"archer2:compute": 1024, "cirrus:compute": 16})
+
+    args = {
+        "archer2:compute": ["24000000", "100"],
+        "cirrus:compute": ["4500000", "100"],
+    }
+
+    @run_before("run")
+    def set_screen_nodes(self):
+        """Run on every node of the allocation"""
+        self.num_tasks = self.screen_nodes.get(self.current_partition.fullname, 1) * self.num_tasks_per_node
+        self.time_limit = "30m"
+
+    @sanity_function
+    def assert_every_node(self):
+        """Sanity checks, with the Triad bandwidth of every node of the allocation"""
+        return sn.all(
+            [
+                self.assert_benchio(),
+                sn.assert_eq(
+                    sn.count(sn.findall(r"^Node \S+ Triad:", self.stdout)),
+                    self.screen_nodes.get(self.current_partition.fullname, 1),
+                ),
+            ]
+        )
+
+    @run_before("performance")
+    def report_stragglers(self):
+        """Score the nodes, write the report and count the slow nodes"""
+        if self.is_dry_run():
+            return
+
+        # The sanity check ensures there is a result for every node
+        results = parse_node_results(os.path.join(self.stagedir, sn.evaluate(self.stdout)), "Triad")
+        slow = write_report(os.path.join(self.stagedir, STRAGGLER_REPORT), results, "Triad")
+        partition = self.current_partition.fullname
+        self.perf_variables["Triad_min"] = sn.make_performance_function(sn.defer(min(results.values())), "MB/s")
+        self.perf_variables["slow_nodes"] = sn.make_performance_function(sn.defer(len(slow)), "nodes")
+        self.reference[f"{partition}:slow_nodes"] = (0, None, 0, "nodes")
+
+
+@rfm.simple_test
+class StreamSweepTest(rfm.RegressionTest, HistoryReferenceMixin):
+    """
+    Stream sweep over the layouts of the tasks and threads of a node, one srun step per layout, reporting the
+    Triad bandwidth of each layout:
+      - numa: the cores of each NUMA domain in turn, i.e. the bandwidth per NUMA domain;
+      - saturation: 1, 2, 4, ... tasks per NUMA domain on every domain, the saturation curve;
+      - ccx: 1, 2, ... tasks per core complex (CCX, cores sharing an L3 cache) on every CCX;
+      - threads: one task per NUMA domain or socket, with OpenMP threads on half its cores, bound close or spread.
+    NUMA domains and CCXs are assumed to be blocks of consecutive cores.
+    """
+
+    valid_systems = ["archer2:compute", "cirrus:compute"]
+    valid_prog_environs = ["*"]
+    build_system = "Make"
+    executable = "echo"
+    executable_opts = ["Sweep finished"]
+    use_multithreading = False
+    time_limit = "1h"
+    extra_resources = {"qos": {"qos": "standard"}}
+
+    sweep = parameter(["numa", "saturation", "ccx", "threads"])
+
+    # NUMA domains per node
+    numa_domains = variable(dict, value={"archer2:compute": 8, "cirrus:compute": 2})
+
+    # Cores per core complex, for processors with several L3 caches per NUMA domain
+    cores_per_ccx = variable(dict, value={"archer2:compute": 4})
+
+    # Number of elements of the arrays of a node and repetitions of each step
+    args = variable(dict, value={"archer2:compute": ["24000000", "100"], "cirrus:compute": ["4500000", "100"]})
+
+    # Labels of the steps of the sweep
+    sweep_labels = variable(list, value=[])
+
+    maintainers = ["a.turner@epcc.ed.ac.uk"]
+    tags = {"performance", "numa"}
+
+    def sweep_steps(self) -> list[tuple[str, list[str], dict]]:
+        """Return the label, srun options and environment variables of each step of the sweep"""
+        partition = self.current_partition.fullname
+        cores = self.current_partition.processor.num_cpus
+        domains = self.numa_domains.get(partition, 1)
+        per_domain = cores // domains
+        if self.sweep == "numa":
+            steps = []
+            for domain in range(domains):
+                cpus = range(domain * per_domain, (domain + 1) * per_domain)
+                steps.append(
+                    (
+                        f"numa{domain}",
+                        [f"--ntasks={per_domain}", f"--cpu-bind=map_cpu:{','.join(map(str, cpus))}"],
+                        {"OMP_NUM_THREADS": "1"},
+                    )
+                )
+
+            return steps
+
+        if self.sweep in ("saturation", "ccx"):
+            block = per_domain if self.sweep == "saturation" else self.cores_per_ccx.get(partition)
+            if not block:
+                return []
+
+            steps = []
+            for tasks in (1 << i for i in range(block.bit_length())):
+                cpus = [start + i for start in range(0, cores, block) for i in range(tasks)]
+                steps.append(
+                    (
+                        f"{tasks}_per_{'numa' if self.sweep == 'saturation' else 'ccx'}",
+                        [f"--ntasks={len(cpus)}", f"--cpu-bind=map_cpu:{','.join(map(str, cpus))}"],
+                        {"OMP_NUM_THREADS": "1"},
+                    )
+                )
+
+            return steps
+
+        steps = []
+        for unit, tasks in (("numa", domains), ("socket", self.current_partition.processor.num_sockets or 1)):
+            for bind in ("close", "spread"):
+                steps.append(
+                    (
+                        f"{unit}_{bind}",
+                        [f"--ntasks={tasks}", f"--cpus-per-task={cores // tasks}", "--cpu-bind=cores"],
+                        {
+                            "OMP_NUM_THREADS": str(cores // tasks // 2),
+                            "OMP_PLACES": "cores",
+                            "OMP_PROC_BIND": bind,
+                        },
+                    )
+                )
+
+        return steps
+
+    @run_before("run")
+    def set_sweep_steps(self):
+        """Run each step of the sweep with its own srun, labelling its output"""
+        steps = self.sweep_steps()
+        self.skip_if(not steps, f"no {self.sweep} sweep on {self.current_partition.fullname}")
+        args = " ".join(self.args.get(self.current_partition.fullname, ["24000000", "100"]))
+        # The job allocates every core of the node, the steps launch their own tasks on them
+        self.num_tasks = self.num_tasks_per_node = self.current_partition.processor.num_cpus
+        self.job.launcher = getlauncher("local")()
+        self.sweep_labels = [label for label, _, _ in steps]
+        for label, options, env_vars in steps:
+            env = " ".join(f"{name}={value}" for name, value in env_vars.items())
+            self.prerun_cmds.append(
+                f"{env} srun --nodes=1 {' '.join(options)} ./distributed_streams {args} | sed 's/^/{label} /'"
+            )
+
+        # Set before the performance stage, where the references are taken from the history
+        self.perf_variables = {
+            f"Triad_{label}": sn.make_performance_function(
+                extractlast(rf"^{label} Node Triad:(\s+\S+:){{2}}\s+(?P<val>\S+):", self.stdout, "val", float), "MB/s"
+            )
+            for label in self.sweep_labels
+        }
+
+    @sanity_function
+    def assert_sweep(self):
+        """Sanity checks"""
+        return sn.assert_eq(sn.count(sn.findall(r"^\S+ Node Triad", self.stdout)), len(self.sweep_labels))
@@ -67,4 +67,5 @@ void initialise_benchmark_results(benchmark_results *b_results, int repeats);
 void free_benchmark_results(benchmark_results *b_results);
 void collect_individual_result(performance_result indivi, performance_result *result, performance_result *node_result, char *max_name, char *name, benchmark_results *all_node_results, benchmark_type benchmark, communicator world_comm, communicator node_comm, communicator root_comm, int repeats);
 void print_results(aggregate_results a_results, aggregate_results node_results, communicator world_comm, int array_size, communicator node_comm);
+void print_node_results(benchmark_results *all_node_results, communicator root_comm, int array_size, communicator node_comm);
 void save_results(char *filename, benchmark_results *all_node_results, int array_size, communicator world_comm, communicator node_comm, communicator root_comm);
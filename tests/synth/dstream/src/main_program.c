@@ -90,6 +90,7 @@ int main(int argc, char **argv){
   collect_results(b_results, &a_results, &node_results, all_node_results, world_comm, node_comm, root_comm, repeats);
   if(world_comm.rank == ROOT){
     print_results(a_results, node_results, world_comm, array_size, node_comm);
+    print_node_results(all_node_results, root_comm, array_size, node_comm);
 #pragma omp parallel default(shared)
   {
     omp_threads = omp_get_num_threads();
@@ -404,3 +405,37 @@ void print_results(aggregate_results a_results, aggregate_results node_results,
 
 }
 
+// Print out the results of every node, so that slow nodes can be identified.
+// Like print_results this will only be called from the root process, which
+// gathered the results of the nodes in collect_results. Nodes are assumed to
+// run the same number of processes as the node of the root process.
+void print_node_results(benchmark_results *all_node_results, communicator root_comm, int array_size, communicator node_comm){
+
+  int k;
+  double copy_size = 2 * sizeof(STREAM_TYPE) * array_size * node_comm.size;
+  double scale_size = 2 * sizeof(STREAM_TYPE) * array_size * node_comm.size;
+  double add_size = 3 * sizeof(STREAM_TYPE) * array_size * node_comm.size;
+  double triad_size = 3 * sizeof(STREAM_TYPE) * array_size * node_comm.size;
+
+  for(k=0; k<root_comm.size; k++){
+    printf("Node %s Copy:  %12.1f:   %11.6f:  %12.1f:   %11.6f:   %12.1f:   %11.6f\n", all_node_results[k].name,
+	   1.0E-06 * copy_size/all_node_results[k].Copy.avg, all_node_results[k].Copy.avg,
+	   1.0E-06 * copy_size/all_node_results[k].Copy.min, all_node_results[k].Copy.min,
+	   1.0E-06 * copy_size/all_node_results[k].Copy.max, all_node_results[k].Copy.max);
+    printf("Node %s Scale: %12.1f:   %11.6f:  %12.1f:   %11.6f:   %12.1f:   %11.6f\n", all_node_results[k].name,
+	   1.0E-06 * scale_size/all_node_results[k].Scale.avg, all_node_results[k].Scale.avg,
+	   1.0E-06 * scale_size/all_node_results[k].Scale.min, all_node_results[k].Scale.min,
+	   1.0E-06 * scale_size/all_node_results[k].Scale.max, all_node_results[k].Scale.max);
+    printf("Node %s Add:   %12.1f:   %11.6f:  %12.1f:   %11.6f:   %12.1f:   %11.6f\n", all_node_results[k].name,
+	   1.0E-06 * add_size/all_node_results[k].Add.avg, all_node_results[k].Add.avg,
+	   1.0E-06 * add_size/all_node_results[k].Add.min, all_node_results[k].Add.min,
+	   1.0E-06 * add_size/all_node_results[k].Add.max, all_node_results[k].Add.max);
+    printf("Node %s Triad: %12.1f:   %11.6f:  %12.1f:   %11.6f:   %12.1f:   %11.6f\n", all_node_results[k].name,
+	   1.0E-06 * triad_size/all_node_results[k].Triad.avg, all_node_results[k].Triad.avg,
+	   1.0E-06 * triad_size/all_node_results[k].Triad.min, all_node_results[k].Triad.min,
+	   1.0E-06 * triad_size/all_node_results[k].Triad.max, all_node_results[k].Triad.max);
+  }
+
+  return;
+
+}
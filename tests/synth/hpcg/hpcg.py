@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+HPCG benchmark
+
+The High Performance Conjugate Gradients benchmark, run with one MPI process
+per core over a range of node counts. Each process has a local grid of
+nx x ny x nz points, so the problem grows with the number of nodes. The
+benchmark phase is shorter than the 1800 seconds of an official result,
+which is enough to track the performance of the system across upgrades.
+Results are read from the HPCG-Benchmark_3.1_*.txt file written in the stage
+directory: the GFLOP/s rating and the time spent in each phase of the
+benchmark, the dot products (DDOT), vector updates (WAXPBY), sparse
+matrix-vector products (SpMV) and multigrid preconditioner (MG).
+"""
+
+import os
+
+import reframe as rfm
+import reframe.utility.sanity as sn
+
+from epcc_reframe.buildcache import BuildCacheMixin
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.mirror import ArtifactMirrorMixin
+
+HPCG_URL = "https://www.hpcg-benchmark.org/downloads/hpcg-3.1.tar.gz"
+
+# Checksum of the HPCG release tarball
+HPCG_SHA256 = "33a434e716b79e59e745f77ff72639c32623e7f928eeb7977655ffcaade0f4a4"
+
+# Phases of the benchmark timed in the results file
+HPCG_PHASES = ["DDOT", "WAXPBY", "SpMV", "MG"]
+
+
+class HPCGDownload(rfm.RunOnlyRegressionTest, ArtifactMirrorMixin):
+    """Download test"""
+
+    descr = "HPCG download sources"
+    valid_prog_environs = [
+        "PrgEnv-gnu",
+        "PrgEnv-cray",
+        "PrgEnv-aocc",
+        "gcc",
+        "intel",
+    ]
+    local = True
+
+    @run_before("run")
+    def set_executable(self):
+        """Download the sources, through the artifact mirror if there is one"""
+        self.executable = self.fetch_cmd(HPCG_URL, HPCG_SHA256)
+
+    @sanity_function
+    def validate_download(self):
+        """Sanity Check"""
+        return sn.assert_not_found("error", self.stderr)
+
+
+class HPCGBuild(rfm.CompileOnlyRegressionTest, BuildCacheMixin):
+    """Build Test"""
+
+    descr = "HPCG build test, MPI only"
+    valid_systems = ["archer2:compute", "cirrus:compute"]
+    valid_prog_environs = [
+        "PrgEnv-gnu",
+        "PrgEnv-cray",
+        "PrgEnv-aocc",
+        "gcc",
+        "intel",
+    ]
+    build_system = "Make"
+    build_prefix = None
+
+    hpcg_source = fixture(HPCGDownload, scope="session")
+
+    @run_before("compile")
+    def set_build_system_attrs(self):
+        """Build in the source tree with the MPI setup file, the compiler is the one of the environment"""
+        tarball = "hpcg-3.1.tar.gz"
+        self.build_prefix = tarball[:-7]
+        fullpath = os.path.join(self.hpcg_source.stagedir, tarball)
+        self.build_cache_inputs = [fullpath]
+        self.prebuild_cmds += [
+            f"cp {fullpath} {self.stagedir}",
+            f"tar xzf {tarball}",
+            f"cd {self.build_prefix}",
+        ]
+        self.build_system.options = ["arch=Linux_MPI"]
+        self.build_system.max_concurrency = 8
+
+    @sanity_function
+    def validate_build(self):
+        """Sanity check"""
+        return sn.assert_not_found("error", self.stderr)
+
+
+@rfm.simple_test
+class HPCGTest(rfm.RunOnlyRegressionTest, HistoryReferenceMixin, ImpactMixin):
+    """HPCG on full nodes over a range of node counts, references are taken from the last runs"""
+
+    valid_systems = ["archer2:compute", "cirrus:compute"]
+    valid_prog_environs = [
+        "PrgEnv-gnu",
+        "PrgEnv-cray",
+        "PrgEnv-aocc",
+        "gcc",
+        "intel",
+    ]
+    sourcesdir = None
+    use_multithreading = False
+    env_vars = {"OMP_NUM_THREADS": "1"}
+    extra_resources = {"qos": {"qos": "standard"}}
+    time_limit = "30m"
+    maintainers = ["a.turner@epcc.ed.ac.uk"]
+    tags = {"performance", "scaling"}
+
+    num_nodes = parameter(1 << i for i in range(11))
+    hpcg_binaries = fixture(HPCGBuild, scope="environment")
+
+    # Local grid of each process and duration of the benchmark phase in seconds
+    hpcg_opts = variable(
+        dict,
+        value={
+            "archer2:compute": ["--nx=104", "--ny=104", "--nz=104", "--rt=60"],
+            "cirrus:compute": ["--nx=104", "--ny=104", "--nz=104", "--rt=60"],
+        },
+    )
+
+    # Largest number of nodes of a job of the QoS used
+    max_nodes = variable(
+        dict,
+        value={
+            "archer2:compute": 1024,
+            "cirrus:compute": 16,
+        },
+    )
+
+    @run_after("init")
+    def set_largescale_tag(self):
+        """Tag the largest jobs"""
+        if self.num_nodes > 256:
+            self.tags |= {"largescale"}
+
+    @run_after("setup")
+    def set_num_tasks(self):
+        """Run one task per core of every node"""
+        self.skip_if(
+            self.num_nodes > self.max_nodes.get(self.current_partition.fullname, 1),
+            f"{self.num_nodes} nodes is beyond the scale of {self.current_partition.fullname}",
+        )
+        self.num_tasks_per_node = self.current_partition.processor.num_cpus or 1
+        self.num_tasks = self.num_nodes * self.num_tasks_per_node
+        self.num_cpus_per_task = 1
+
+    @require_deps
+    def set_executable(self):
+        """Set Executable"""
+        self.executable = os.path.join(self.hpcg_binaries.stagedir, self.hpcg_binaries.build_prefix, "bin", "xhpcg")
+        self.executable_opts = self.hpcg_opts.get(self.current_partition.fullname, ["--rt=60"])
+
+    @run_before("run")
+    def set_phase_perf_variables(self):
+        """Add the time of each phase of the benchmark"""
+        for phase in HPCG_PHASES:
+            self.perf_variables[f"time_{phase}"] = sn.make_performance_function(
+                sn.extractsingle(rf"^Benchmark Time Summary::{phase}=(?P<val>\S+)", self.results_file(), "val", float),
+                "s",
+            )
+
+    def results_file(self) -> sn.deferrable:
+        """Return the results file written by the benchmark"""
+        return sn.getitem(sn.glob(os.path.join(self.stagedir, "HPCG-Benchmark*.txt")), 0)
+
+    @sanity_function
+    def assert_valid(self):
+        """Sanity checks"""
+        return sn.assert_found(r"HPCG result is VALID", self.results_file())
+
+    @performance_function("Gflops/s")
+    def gflops(self):
+        """Extract the GFLOP/s rating"""
+        return sn.extractsingle(
+            r"HPCG result is VALID with a GFLOP/s rating of=(?P<val>\S+)", self.results_file(), "val", float
+        )
+
+    @performance_function("Gflops/s")
+    def gflops_per_node(self):
+        """GFLOP/s rating per node"""
+        return self.gflops() / self.num_nodes
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+HPL benchmark
+
+The High Performance Linpack dense LU solve, run with one MPI process per
+core over a range of node counts, using the BLAS linked by the compiler
+wrappers (LibSci on ARCHER2). The matrix fills hpl_memory_fraction of the
+memory of the nodes, so the problem grows with the number of nodes, and the
+process grid is the most square one. HPL is built with detailed timing, so
+along with the Gflops/s of the solve the test reports the time spent in each
+phase of the factorisation: the recursive panel factorisation (rfact), with
+its panel factorisation (pfact) and pivot search (mxswp), the trailing
+matrix update (update), with its row swaps (laswp), and the upper triangular
+solve (uptrsv).
+"""
+
+import math
+import os
+import re
+
+import reframe as rfm
+import reframe.utility.sanity as sn
+
+from epcc_reframe.buildcache import BuildCacheMixin
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.mirror import ArtifactMirrorMixin
+
+HPL_URL = "https://www.netlib.org/benchmark/hpl/hpl-2.3.tar.gz"
+
+# Checksum of the HPL release tarball
+HPL_SHA256 = "32c5c17d22330e6f2337b681aded51637fb6008d3f0eb7c277b163fadd612830"
+
+# Label of each phase of the factorisation in the detailed timing of HPL
+HPL_PHASES = {
+    "rfact": "rfact",
+    "pfact": "pfact",
+    "mxswp": "mxswp",
+    "update": "update",
+    "laswp": "laswp",
+    "uptrsv": "up tr sv",
+}
+
+# Input file of HPL, with a single problem size, block size and process grid
+HPL_DAT = """HPLinpack benchmark input file
+Innovative Computing Laboratory, University of Tennessee
+HPL.out      output file name (if any)
+6            device out (6=stdout,7=stderr,file)
+1            # of problems sizes (N)
+{n}          Ns
+1            # of NBs
+{nb}         NBs
+0            PMAP process mapping (0=Row-,1=Column-major)
+1            # of process grids (P x Q)
+{p}          Ps
+{q}          Qs
+16.0         threshold
+1            # of panel fact
+2            PFACTs (0=left, 1=Crout, 2=Right)
+1            # of recursive stopping criterium
+4            NBMINs (>= 1)
+1            # of panels in recursion
+2            NDIVs
+1            # of recursive panel fact.
+1            RFACTs (0=left, 1=Crout, 2=Right)
+1            # of broadcast
+1            BCASTs (0=1rg,1=1rM,2=2rg,3=2rM,4=Lng,5=LnM)
+1            # of lookahead depth
+1            DEPTHs (>=0)
+2            SWAP (0=bin-exch,1=long,2=mix)
+64           swapping threshold
+0            L1 in (0=transposed,1=no-transposed) form
+0            U  in (0=transposed,1=no-transposed) form
+1            Equilibration (0=no,1=yes)
+8            memory alignment in double (> 0)
+"""
+
+
+def process_grid(num_tasks: int) -> tuple[int, int]:
+    """Return the most square P x Q grid of num_tasks processes with P <= Q"""
+    p = next(p for p in range(math.isqrt(num_tasks), 0, -1) if num_tasks % p == 0)
+    return p, num_tasks // p
+
+
+def problem_size(memory: float, block_size: int) -> int:
+    """Return the order of the largest matrix of doubles fitting in memory bytes, a multiple of the block size"""
+    return int(math.sqrt(memory / 8) // block_size) * block_size
+
+
+class HPLDownload(rfm.RunOnlyRegressionTest, ArtifactMirrorMixin):
+    """Download test"""
+
+    descr = "HPL download sources"
+    valid_prog_environs = ["PrgEnv-gnu", "PrgEnv-cray", "PrgEnv-aocc"]
+    local = True
+
+    @run_before("run")
+    def set_executable(self):
+        """Download the sources, through the artifact mirror if there is one"""
+        self.executable = self.fetch_cmd(HPL_URL, HPL_SHA256)
+
+    @sanity_function
+    def validate_download(self):
+        """Sanity Check"""
+        return sn.assert_not_found("error", self.stderr)
+
+
+class HPLBuild(rfm.CompileOnlyRegressionTest, BuildCacheMixin):
+    """Build Test"""
+
+    descr = "HPL build test, with detailed timing"
+    valid_systems = ["archer2:compute"]
+    valid_prog_environs = ["PrgEnv-gnu", "PrgEnv-cray", "PrgEnv-aocc"]
+    build_system = "Autotools"
+    build_prefix = None
+
+    hpl_source = fixture(HPLDownload, scope="session")
+
+    @run_before("compile")
+    def set_build_system_attrs(self):
+        """Configure with detailed timing, MPI and BLAS come from the compiler wrappers"""
+        tarball = "hpl-2.3.tar.gz"
+        self.build_prefix = tarball[:-7]
+        fullpath = os.path.join(self.hpl_source.stagedir, tarball)
+        self.build_cache_inputs = [fullpath]
+        self.prebuild_cmds += [
+            f"cp {fullpath} {self.stagedir}",
+            f"tar xzf {tarball}",
+            f"cd {self.build_prefix}",
+        ]
+        self.build_system.config_opts = ["CFLAGS='-O3 -DHPL_DETAILED_TIMING'"]
+        self.build_system.max_concurrency = 8
+
+    @sanity_function
+    def validate_build(self):
+        """Sanity check"""
+        return sn.assert_not_found("error", self.stderr)
+
+
+@rfm.simple_test
+class HPLTest(rfm.RunOnlyRegressionTest, HistoryReferenceMixin, ImpactMixin):
+    """HPL on full nodes over a range of node counts, references are taken from the last runs"""
+
+    valid_systems = ["archer2:compute"]
+    valid_prog_environs = ["PrgEnv-gnu", "PrgEnv-cray", "PrgEnv-aocc"]
+    sourcesdir = None
+    use_multithreading = False
+    env_vars = {"OMP_NUM_THREADS": "1"}
+    extra_resources = {"qos": {"qos": "standard"}}
+    time_limit = "1h"
+    maintainers = ["a.turner@epcc.ed.ac.uk"]
+    tags = {"performance", "scaling"}
+
+    num_nodes = parameter(1 << i for i in range(9))
+    hpl_binaries = fixture(HPLBuild, scope="environment")
+
+    # Block size of the matrix distribution
+    hpl_block_size = variable(int, value=192)
+
+    # Fraction of the memory of the nodes filled by the matrix
+    hpl_memory_fraction = variable(float, value=0.25)
+
+    # Memory of a node in bytes
+    node_memory = variable(dict, value={"archer2:compute": 256 * 1000**3})
+
+    # Largest number of nodes of a job of the QoS used
+    max_nodes = variable(dict, value={"archer2:compute": 1024})
+
+    @run_after("setup")
+    def set_num_tasks(self):
+        """Run one task per core of every node"""
+        self.skip_if(
+            self.num_nodes > self.max_nodes.get(self.current_partition.fullname, 1),
+            f"{self.num_nodes} nodes is beyond the scale of {self.current_partition.fullname}",
+        )
+        self.num_tasks_per_node = self.current_partition.processor.num_cpus or 1
+        self.num_tasks = self.num_nodes * self.num_tasks_per_node
+        self.num_cpus_per_task = 1
+
+    @require_deps
+    def set_executable(self):
+        """Set Executable"""
+        self.executable = os.path.join(self.hpl_binaries.stagedir, self.hpl_binaries.build_prefix, "testing", "xhpl")
+
+    @run_before("run")
+    def write_input(self):
+        """Write HPL.dat for the number of nodes and add the time of each phase of the factorisation"""
+        memory = self.hpl_memory_fraction * self.num_nodes * self.node_memory[self.current_partition.fullname]
+        p, q = process_grid(self.num_tasks)
+        with open(os.path.join(self.stagedir, "HPL.dat"), "w", encoding="utf-8") as fp:
+            fp.write(HPL_DAT.format(n=problem_size(memory, self.hpl_block_size), nb=self.hpl_block_size, p=p, q=q))
+
+        for name, label in HPL_PHASES.items():
+            self.perf_variables[f"time_{name}"] = sn.make_performance_function(
+                sn.extractsingle(
+                    rf"Max aggregated wall time {re.escape(label)}[ .]*:\s+(?P<val>\S+)", self.stdout, "val", float
+                ),
+                "s",
+            )
+
+    @sanity_function
+    def assert_passed(self):
+        """Sanity checks"""
+        return sn.all([sn.assert_found(r"PASSED", self.stdout), sn.assert_not_found(r"FAILED", self.stdout)])
+
+    @performance_function("Gflops/s")
+    def gflops(self):
+        """Extract the performance of the solve"""
+        return sn.extractsingle(r"^W\S+\s+\d+\s+\d+\s+\d+\s+\d+\s+\S+\s+(?P<val>\S+)", self.stdout, "val", float)
+
+    @performance_function("Gflops/s")
+    def gflops_per_node(self):
+        """Performance of the solve per node"""
+        return self.gflops() / self.num_nodes
+
+    @performance_function("s")
+    def time(self):
+        """Extract the time of the solve"""
+        return sn.extractsingle(r"^W\S+\s+\d+\s+\d+\s+\d+\s+\d+\s+(?P<val>\S+)", self.stdout, "val", float)
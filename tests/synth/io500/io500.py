@@ -13,9 +13,14 @@ import reframe.utility.sanity as sn
 from reframe.core.backends import getlauncher
 from reframe.utility import osext
 
+from epcc_reframe.buildcache import BuildCacheMixin
+from epcc_reframe.extraction import OutputParserMixin
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.mirror import ArtifactMirrorMixin
+
 
 #  @rfm.simple_test
-class IO500Build(rfm.CompileOnlyRegressionTest):
+class IO500Build(rfm.CompileOnlyRegressionTest, BuildCacheMixin, ArtifactMirrorMixin):
     """Clone and build the IO500 source code."""
 
     descr = "Clone and build the IO500 benchmark."
@@ -28,6 +33,7 @@ class IO500Build(rfm.CompileOnlyRegressionTest):
     @run_before("compile")
     def set_build_command(self):
         """setup build system"""
+        self.sourcesdir = self.git_url(self.sourcesdir)
         self.build_system.commands = ["./prepare.sh"]
 
     @sanity_function
@@ -37,7 +43,7 @@ class IO500Build(rfm.CompileOnlyRegressionTest):
 
 
 # Base class for the IO500 Benchmark runs.
-class IO500Benchmark(rfm.RunOnlyRegressionTest):
+class IO500Benchmark(rfm.RunOnlyRegressionTest, OutputParserMixin, ImpactMixin):
     """Base IO500 benchmark class."""
 
     descr = "Run the IO500 benchmark."
@@ -117,45 +123,31 @@ class IO500Benchmark(rfm.RunOnlyRegressionTest):
         """Sanity check"""
         return sn.assert_found(r"Bandwidth", self.stdout)
 
-    # Extract kIOPS performance for a single test.
-    @performance_function("kIOPS")
+    # Extract kIOPS performance for a single test. All the results are read
+    # from stdout in a single pass, see OutputParserMixin.
     def extract_test_iops(self, kind="ior-easy-write"):
         """Extract IOPS performance value"""
-        return sn.extractsingle(
-            r"\[RESULT\]\s+" + kind + r"\s+(\d+\.?\d*)\s+",
-            self.stdout,
-            1,
-            float,
-        )
+        return self.extract_perf(r"\[RESULT\]\s+" + kind + r"\s+(\d+\.?\d*)\s+", self.stdout, "kIOPS", 1, float)
 
     # Extract bandwidth performance for a single test.
-    @performance_function("GiB/s")
     def extract_test_bw(self, kind="mdtest-easy-write"):
         """Extract bandwidth performance value"""
-        return sn.extractsingle(
-            r"\[RESULT\]\s+" + kind + r"\s+(\d+\.?\d*)\s+",
-            self.stdout,
-            1,
-            float,
-        )
+        return self.extract_perf(r"\[RESULT\]\s+" + kind + r"\s+(\d+\.?\d*)\s+", self.stdout, "GiB/s", 1, float)
 
     # Extract the final bandwidth score
-    @performance_function("GiB/s")
     def extract_score_bw(self):
         """Extract score for bandwidth performance value"""
-        return sn.extractsingle(r"\[SCORE\s\]\s+Bandwidth\s+(\d+\.?\d*)\s+", self.stdout, 1, float)
+        return self.extract_perf(r"\[SCORE\s\]\s+Bandwidth\s+(\d+\.?\d*)\s+", self.stdout, "GiB/s", 1, float)
 
     # Extract the final IOPS score
-    @performance_function("kIOPS")
     def extract_score_iops(self):
         """Extract score for iops performance value"""
-        return sn.extractsingle(r"\[SCORE\s\].+IOPS\s+(\d+\.?\d*)\s+", self.stdout, 1, float)
+        return self.extract_perf(r"\[SCORE\s\].+IOPS\s+(\d+\.?\d*)\s+", self.stdout, "kIOPS", 1, float)
 
     # Extract the overall IO500 score.
-    @performance_function("")
     def extract_score_total(self):
         """Extract overall score performance value"""
-        return sn.extractsingle(r"\[SCORE\s\].+TOTAL\s+(\d+\.?\d*)\s+", self.stdout, 1, float)
+        return self.extract_perf(r"\[SCORE\s\].+TOTAL\s+(\d+\.?\d*)\s+", self.stdout, "", 1, float)
 
     # Set the performance metrics we want to recover.
     @run_before("performance")
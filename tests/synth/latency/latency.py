@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Cache and memory latency
+
+Test that measures the latency of loads with a pointer chase over a sweep of
+working set sizes, from within the L1 cache of a core to main memory. Each
+load depends on the previous one and the chain is a random cycle of cache
+lines, so the time per load is the latency of the level of the memory
+hierarchy the working set fits in. The latency of main memory on the other
+socket of the node is measured by a second run with its memory bound to the
+first NUMA domain of that socket.
+"""
+
+import reframe as rfm
+import reframe.utility.sanity as sn
+
+from epcc_reframe.history import HistoryReferenceMixin
+from epcc_reframe.impact import ImpactMixin
+
+
+@rfm.simple_test
+class PointerChaseTest(rfm.RegressionTest, HistoryReferenceMixin, ImpactMixin):
+    """Pointer chase test class, references are taken from the last runs when there is enough history"""
+
+    valid_systems = ["archer2:compute", "cirrus:compute"]
+    valid_prog_environs = ["*"]
+    build_system = "Make"
+    executable = "pointer_chase"
+    use_multithreading = False
+    exclusive_access = True
+    num_tasks = 1
+    num_tasks_per_node = 1
+    time_limit = "20m"
+    extra_resources = {"qos": {"qos": "standard"}}
+
+    # These are the arguments to pointer_chase
+    #   arg1: smallest working set size in bytes
+    #   arg2: largest working set size in bytes, well beyond the last level cache
+    #   arg3: the number of loads timed for each size
+    args = variable(
+        dict,
+        value={
+            "archer2:compute": ["4096", "1073741824", "20000000"],
+            "cirrus:compute": ["4096", "1073741824", "20000000"],
+        },
+    )
+
+    # Working set size in bytes representative of each level of the memory hierarchy,
+    # half the size of the caches of a core
+    #   ARCHER2: 32 KiB L1, 512 KiB L2, 16 MiB L3 shared by a CCX of 4 cores
+    #   Cirrus: 32 KiB L1, 256 KiB L2, 45 MiB L3 shared by the socket
+    levels = variable(
+        dict,
+        value={
+            "archer2:compute": {"L1": 16384, "L2": 262144, "L3": 8388608, "DRAM": 1073741824},
+            "cirrus:compute": {"L1": 16384, "L2": 131072, "L3": 16777216, "DRAM": 1073741824},
+        },
+    )
+
+    # NUMA domains per node
+    numa_domains = variable(dict, value={"archer2:compute": 8, "cirrus:compute": 2})
+
+    maintainers = ["a.turner@epcc.ed.ac.uk"]
+    tags = {"performance", "short", "latency"}
+
+    def latency(self, size: int, prefix: str = "") -> sn.deferrable:
+        """Return the latency of a working set size, in the output lines starting with prefix"""
+        return sn.extractsingle(rf"^{prefix}Size:\s+{size}\s+(?P<val>\S+)", self.stdout, "val", float)
+
+    @run_before("run")
+    def set_sweep(self):
+        """Bind the sweep and its memory to the first core, and measure the latency of the other socket"""
+        partition = self.current_partition.fullname
+        levels = self.levels[partition]
+        self.executable_opts = self.args[partition]
+        self.job.launcher.options += ["--cpu-bind=map_cpu:0", "--mem-bind=map_mem:0"]
+
+        for level, size in levels.items():
+            self.perf_variables[f"latency_{level}"] = sn.make_performance_function(self.latency(size), "ns")
+
+        sockets = self.current_partition.processor.num_sockets or 1
+        if sockets > 1:
+            remote = self.numa_domains.get(partition, sockets) // sockets
+            self.postrun_cmds = [
+                f"srun --ntasks=1 --cpu-bind=map_cpu:0 --mem-bind=map_mem:{remote} ./{self.executable} "
+                f"{levels['DRAM']} {levels['DRAM']} {self.executable_opts[2]} | sed 's/^/remote /'"
+            ]
+            remote_latency = self.latency(levels["DRAM"], "remote ")
+            self.perf_variables["latency_DRAM_remote"] = sn.make_performance_function(remote_latency, "ns")
+            self.perf_variables["cross_socket_penalty"] = sn.make_performance_function(
+                remote_latency / self.latency(levels["DRAM"]), "x"
+            )
+
+    @sanity_function
+    def assert_pointer_chase(self):
+        """Sanity checks"""
+        return sn.assert_found(r"^Size:", self.stdout)
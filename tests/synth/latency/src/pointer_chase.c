@@ -0,0 +1,134 @@
+#define _GNU_SOURCE
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+#include <time.h>
+#include <sys/mman.h>
+
+// Size of a cache line. Each element of the chain fills a line so every load
+// touches a different line.
+#ifndef LINE_SIZE
+#define LINE_SIZE 64
+#endif
+
+// Alignment of the chain, the size of a huge page, so that transparent huge
+// pages can back it and TLB misses do not dominate the latency of DRAM.
+#define HUGE_PAGE_SIZE (2 * 1024 * 1024)
+
+typedef struct line {
+  struct line *next;
+  char pad[LINE_SIZE - sizeof(struct line *)];
+} line;
+
+// xorshift64 generator, so that every run builds the same chain
+static uint64_t random_state = 88172645463325252ULL;
+
+static uint64_t next_random(void){
+  random_state ^= random_state << 13;
+  random_state ^= random_state >> 7;
+  random_state ^= random_state << 17;
+  return random_state;
+}
+
+static double now(void){
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return ts.tv_sec + 1.0E-09 * ts.tv_nsec;
+}
+
+// Return the average latency in nanoseconds of a load from a chain of lines
+// spanning size bytes. The lines are linked in a single random cycle
+// (Sattolo's algorithm), defeating the hardware prefetchers, and the chain is
+// walked once before it is timed so that it starts from the caches it fits in.
+double chase(size_t size, long steps){
+
+  size_t num_lines = size / LINE_SIZE;
+  size_t *order;
+  size_t i, j, tmp;
+  line *lines;
+  line *p;
+  long k;
+  double start, elapsed;
+
+  if(posix_memalign((void **)&lines, HUGE_PAGE_SIZE, num_lines * sizeof(line)) != 0){
+    fprintf(stderr, "Failed to allocate %zu bytes.\n", size);
+    exit(1);
+  }
+#ifdef MADV_HUGEPAGE
+  madvise(lines, num_lines * sizeof(line), MADV_HUGEPAGE);
+#endif
+
+  order = malloc(num_lines * sizeof(size_t));
+  for(i=0; i<num_lines; i++){
+    order[i] = i;
+  }
+  for(i=num_lines-1; i>0; i--){
+    j = next_random() % i;
+    tmp = order[i];
+    order[i] = order[j];
+    order[j] = tmp;
+  }
+  for(i=0; i<num_lines; i++){
+    lines[order[i]].next = &lines[order[(i + 1) % num_lines]];
+  }
+  free(order);
+
+  p = &lines[0];
+  for(i=0; i<num_lines; i++){
+    p = p->next;
+  }
+
+  start = now();
+  for(k=0; k<steps; k++){
+    p = p->next;
+  }
+  elapsed = now() - start;
+
+  // Use the end of the chain so the walk cannot be optimised away
+  if(p == NULL){
+    printf("Broken chain\n");
+  }
+
+  free(lines);
+
+  return 1.0E09 * elapsed / steps;
+
+}
+
+// Measure the latency of loads over a sweep of working set sizes, the powers
+// of two from the minimum to the maximum size and the sizes half way between
+// them. Each size is walked for at least the given number of steps and twice
+// its number of lines.
+int main(int argc, char **argv){
+
+  size_t min_size, max_size, size;
+  long steps, size_steps;
+
+  if(argc != 4){
+    printf("Expecting parameters specifying the minimum and maximum working set sizes in bytes and the number of loads timed for each size to be provided at runtime.\n");
+    return 1;
+  }
+
+  min_size = strtoull(argv[1], NULL, 10);
+  max_size = strtoull(argv[2], NULL, 10);
+  steps = strtol(argv[3], NULL, 10);
+  if(min_size < 2 * LINE_SIZE || max_size < min_size || steps <= 0){
+    printf("Expecting sizes of at least %d bytes with the minimum not above the maximum and a positive number of loads.\n", 2 * LINE_SIZE);
+    return 1;
+  }
+
+  printf("Pointer chase with %d byte lines, %ld loads per size\n", LINE_SIZE, steps);
+  printf("Working set           Latency\n");
+  printf("   (bytes)               (ns)\n");
+  for(size=min_size; size<=max_size; size*=2){
+    size_steps = steps > 2 * (long)(size / LINE_SIZE) ? steps : 2 * (long)(size / LINE_SIZE);
+    printf("Size: %12zu   %10.3f\n", size, chase(size, size_steps));
+    if(size + size / 2 <= max_size){
+      size_steps = steps > 3 * (long)(size / LINE_SIZE) ? steps : 3 * (long)(size / LINE_SIZE);
+      printf("Size: %12zu   %10.3f\n", size + size / 2, chase(size + size / 2, size_steps));
+    }
+  }
+
+  return 0;
+
+}
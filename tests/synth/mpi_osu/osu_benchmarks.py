@@ -7,13 +7,29 @@ MPI OSU benchmarks
 #   SPDX-License-Identifier: BSD-3-Clause
 """
 
+import json
 import os
+import random
 
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.buildcache import BuildCacheMixin
+from epcc_reframe.impact import ImpactMixin
+from epcc_reframe.mirror import ArtifactMirrorMixin
+from epcc_reframe.osu import OSUCurveMixin
+from epcc_reframe.topology import DEFAULT_TOPOLOGY_FILE, DISTANCE_CLASSES, TOPOLOGY_ENV, Topology, idle_nodes
 
-class OSUDownload(rfm.RunOnlyRegressionTest):
+OSU_URL = "https://mvapich.cse.ohio-state.edu/download/mvapich/osu-micro-benchmarks-5.6.2.tar.gz"
+
+# Checksum of the OSU release tarball
+OSU_SHA256 = "2ecb90abd85398786823c0716d92448d7094657d3f017c65d270ffe39afc7b95"
+
+# File of the stage directory recording the pair of nodes of a placement test, with their switches and groups
+PLACEMENT_FILE = "rfm_placement.json"
+
+
+class OSUDownload(rfm.RunOnlyRegressionTest, ArtifactMirrorMixin):
     """Download test"""
 
     descr = "OSU benchmarks download sources"
@@ -24,17 +40,20 @@ class OSUDownload(rfm.RunOnlyRegressionTest):
         "gcc",
         "intel",
     ]
-    executable = "wget"
-    executable_opts = ["http://mvapich.cse.ohio-state.edu/download/mvapich/osu-micro-benchmarks-5.6.2.tar.gz"]
     local = True
 
+    @run_before("run")
+    def set_executable(self):
+        """Download the sources, through the artifact mirror if there is one"""
+        self.executable = self.fetch_cmd(OSU_URL, OSU_SHA256)
+
     @sanity_function
     def validate_download(self):
         """Sanity Check"""
         return sn.assert_not_found("error", self.stderr)
 
 
-class OSUBuild(rfm.CompileOnlyRegressionTest):
+class OSUBuild(rfm.CompileOnlyRegressionTest, BuildCacheMixin):
     """Build Test"""
 
     descr = "OSU benchmarks build test (currently fails with  Cray)"
@@ -57,6 +76,7 @@ class OSUBuild(rfm.CompileOnlyRegressionTest):
         tarball = "osu-micro-benchmarks-5.6.2.tar.gz"
         self.build_prefix = tarball[:-7]
         fullpath = os.path.join(self.osu_benchmarks.stagedir, tarball)
+        self.build_cache_inputs = [fullpath]
         self.prebuild_cmds += [
             f"cp {fullpath} {self.stagedir}",
             f"tar xzf {tarball}",
@@ -70,8 +90,8 @@ class OSUBuild(rfm.CompileOnlyRegressionTest):
         return sn.assert_not_found("error", self.stderr)
 
 
-class OSUBenchmarkTestBase(rfm.RunOnlyRegressionTest):
-    """Base class of OSU benchmarks runtime tests"""
+class OSUBenchmarkTestBase(rfm.RunOnlyRegressionTest, OSUCurveMixin, ImpactMixin):
+    """Base class of OSU benchmarks runtime tests, reporting the value at every message size"""
 
     valid_systems = ["archer2:compute", "cirrus:compute"]
     valid_prog_environs = [
@@ -123,6 +143,7 @@ class OSUBandwidthTest(OSUBenchmarkTestBase):
 
     descr = "OSU bandwidth test"
     osu_binaries = fixture(OSUBuild, scope="environment")
+    osu_curve_var = "bandwidth"
 
     @require_deps
     def set_executable(self):
@@ -161,9 +182,228 @@ class OSUAllreduceTest(OSUBenchmarkTestBase):
         self.executable = os.path.join(
             self.osu_binaries.stagedir, self.osu_binaries.build_prefix, "mpi", "collective", "osu_allreduce"
         )
-        self.executable_opts = ["-m", "8", "-x", "1000", "-i", "20000"]
+        self.executable_opts = ["-x", "1000", "-i", "20000"]
+
+    @performance_function("us")
+    def latency(self):
+        """Extract performance value"""
+        return sn.extractsingle(r"^8\s+(\S+)", self.stdout, 1, float)
+
+
+class OSUNodeScalingTestBase(OSUBenchmarkTestBase):
+    """Base class of OSU benchmarks run on full nodes over a range of node counts"""
+
+    num_nodes = parameter(1 << i for i in range(1, 11))
+    osu_binaries = fixture(OSUBuild, scope="environment")
+    tags = {"performance", "scaling"}
+    time_limit = "30m"
+
+    # Benchmark to run, relative to the mpi directory of the build
+    osu_benchmark = variable(str)
+
+    # Warm-up and timed iterations of each message size, divided by the number of nodes over
+    # iterations_full_nodes beyond it, down to min_iterations
+    warmup_iterations = variable(int, value=100)
+    iterations = variable(int, value=1000)
+    iterations_full_nodes = variable(int, value=64)
+    min_iterations = variable(int, value=10)
+
+    # Largest number of nodes of a job of the QoS used
+    max_nodes = variable(
+        dict,
+        value={
+            "archer2:compute": 1024,
+            "cirrus:compute": 16,
+        },
+    )
+
+    @run_after("init")
+    def set_largescale_tag(self):
+        """Tag the largest jobs, which get more time"""
+        if self.num_nodes > 256:
+            self.tags |= {"largescale"}
+            self.time_limit = "1h"
+
+    @run_after("setup")
+    def set_num_tasks(self):
+        """Run one task per core of every node"""
+        self.skip_if(
+            self.num_nodes > self.max_nodes.get(self.current_partition.fullname, 1),
+            f"{self.num_nodes} nodes is beyond the scale of {self.current_partition.fullname}",
+        )
+        self.num_tasks_per_node = self.current_partition.processor.num_cpus or 1
+        self.num_tasks = self.num_nodes * self.num_tasks_per_node
+
+    @require_deps
+    def set_executable(self):
+        """Set Executable"""
+        self.executable = os.path.join(
+            self.osu_binaries.stagedir, self.osu_binaries.build_prefix, "mpi", *self.osu_benchmark.split("/")
+        )
+        scale = max(1, self.num_nodes // self.iterations_full_nodes)
+        self.executable_opts = [
+            "-x",
+            str(max(self.min_iterations, self.warmup_iterations // scale)),
+            "-i",
+            str(max(self.min_iterations, self.iterations // scale)),
+        ]
+
+
+class OSUNodeScalingLatencyTestBase(OSUNodeScalingTestBase):
+    """Base class of OSU latency benchmarks run over a range of node counts"""
+
+    @performance_function("us")
+    def latency(self):
+        """Extract performance value"""
+        return sn.extractsingle(r"^8\s+(\S+)", self.stdout, 1, float)
+
+
+@rfm.simple_test
+class OSUAlltoallTest(OSUNodeScalingLatencyTestBase):
+    """All to all test"""
+
+    descr = "OSU Alltoall test"
+    osu_benchmark = "collective/osu_alltoall"
+
+
+@rfm.simple_test
+class OSUAllgatherTest(OSUNodeScalingLatencyTestBase):
+    """All gather test"""
+
+    descr = "OSU Allgather test"
+    osu_benchmark = "collective/osu_allgather"
+
+
+@rfm.simple_test
+class OSUBcastTest(OSUNodeScalingLatencyTestBase):
+    """Broadcast test"""
+
+    descr = "OSU Bcast test"
+    osu_benchmark = "collective/osu_bcast"
+
+
+@rfm.simple_test
+class OSUReduceScatterTest(OSUNodeScalingLatencyTestBase):
+    """Reduce scatter test"""
+
+    descr = "OSU Reduce_scatter test"
+    osu_benchmark = "collective/osu_reduce_scatter"
+
+
+@rfm.simple_test
+class OSUMultiLatencyTest(OSUNodeScalingLatencyTestBase):
+    """Multi-pair latency test, pairing the tasks of the first half of the nodes with those of the second"""
+
+    descr = "OSU multiple pair latency test"
+    osu_benchmark = "pt2pt/osu_multi_lat"
+
+
+@rfm.simple_test
+class OSUMultiBandwidthTest(OSUNodeScalingTestBase):
+    """Multi-pair bandwidth and message rate test, pairing the tasks of the first half of the nodes with the second"""
+
+    descr = "OSU multiple bandwidth / message rate test"
+    osu_benchmark = "pt2pt/osu_mbw_mr"
+    osu_curve_var = "bandwidth"
+
+    @performance_function("MB/s")
+    def bandwidth(self):
+        """Extract performance value"""
+        return sn.extractsingle(r"^4194304\s+(\S+)", self.stdout, 1, float)
+
+    @performance_function("messages/s")
+    def message_rate(self):
+        """Extract performance value"""
+        return sn.extractsingle(r"^8\s+\S+\s+(\S+)", self.stdout, 1, float)
+
+
+class OSUPlacementTestBase(OSUBenchmarkTestBase):
+    """
+    Base class of OSU point-to-point benchmarks between two ranks at a distance in the topology: in the same
+    NUMA domain, on different sockets of a node, or on a pair of idle nodes on the same switch, in the same
+    group or in different groups of the topology file
+    """
+
+    distance = parameter(DISTANCE_CLASSES)
+    osu_binaries = fixture(OSUBuild, scope="environment")
+    tags = {"performance", "topology"}
+
+    # Benchmark to run, relative to the mpi directory of the build
+    osu_benchmark = variable(str)
+
+    # Slurm topology.conf file of the system
+    topology_file = variable(str, value=os.environ.get(TOPOLOGY_ENV, DEFAULT_TOPOLOGY_FILE))
+
+    # Seed of the choice of the pair of idle nodes, so that runs on the same idle nodes use the same link;
+    # a different pair is chosen by each run if None
+    placement_seed = variable(int, type(None), value=None)
+
+    @run_after("setup")
+    def place_ranks(self):
+        """Bind the ranks to cores of one node, or run them on a pair of nodes at the distance"""
+        if self.distance in ("numa", "node"):
+            processor = self.current_partition.processor
+            other_cpu = 1 if self.distance == "numa" else processor.num_cpus_per_socket
+            self.skip_if(
+                not other_cpu, f"the number of cores per socket of {self.current_partition.fullname} is unknown"
+            )
+            self.num_tasks_per_node = 2
+            self.job.launcher.options += [f"--cpu-bind=map_cpu:0,{other_cpu}"]
+            return
+
+        self.skip_if(not os.path.exists(self.topology_file), f"topology file {self.topology_file} not found")
+        partition = next(
+            (opt.split("=", 1)[1] for opt in self.current_partition.access if opt.startswith("--partition=")), None
+        )
+        topology = Topology.from_file(self.topology_file)
+        pair = topology.pair(idle_nodes(partition), self.distance, random.Random(self.placement_seed))
+        self.skip_if(pair is None, f"no pair of idle nodes at a distance of {self.distance}")
+        self.job.options += [f"--nodelist={','.join(pair)}"]
+
+        # The pair is recorded, so that a slow link can be traced to its nodes and switches
+        placement = {
+            "distance": self.distance,
+            "nodes": [
+                {"node": node, "switch": topology.switches[node], "group": topology.group(node)} for node in pair
+            ],
+        }
+        with open(os.path.join(self.stagedir, PLACEMENT_FILE), "w", encoding="utf-8") as fp:
+            json.dump(placement, fp, indent=2)
+
+        self.keep_files += [PLACEMENT_FILE]
+        self.logger.info(f"{self.display_name}: placed on {' and '.join(pair)}")
+
+    @require_deps
+    def set_executable(self):
+        """Set Executable"""
+        self.executable = os.path.join(
+            self.osu_binaries.stagedir, self.osu_binaries.build_prefix, "mpi", *self.osu_benchmark.split("/")
+        )
+        self.executable_opts = ["-x", "100", "-i", "1000"]
+
+
+@rfm.simple_test
+class OSUPlacementLatencyTest(OSUPlacementTestBase):
+    """Latency test between two ranks at a distance in the topology"""
+
+    descr = "OSU latency test per topology distance"
+    osu_benchmark = "pt2pt/osu_latency"
 
     @performance_function("us")
     def latency(self):
         """Extract performance value"""
         return sn.extractsingle(r"^8\s+(\S+)", self.stdout, 1, float)
+
+
+@rfm.simple_test
+class OSUPlacementBandwidthTest(OSUPlacementTestBase):
+    """Bandwidth test between two ranks at a distance in the topology"""
+
+    descr = "OSU bandwidth test per topology distance"
+    osu_benchmark = "pt2pt/osu_bw"
+    osu_curve_var = "bandwidth"
+
+    @performance_function("MB/s")
+    def bandwidth(self):
+        """Extract performance value"""
+        return sn.extractsingle(r"^4194304\s+(\S+)", self.stdout, 1, float)
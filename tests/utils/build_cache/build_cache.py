@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests of the build cache
+
+A sequence of small builds sharing a fresh cache directory, checking that
+  - the first build is a miss, compiles and is stored in the cache;
+  - the same build is then a hit, restored without compiling;
+  - a build with different options is a miss;
+  - eviction by size removes the entries.
+"""
+
+import os
+import shutil
+import sys
+
+import reframe as rfm
+import reframe.utility.sanity as sn
+
+import epcc_reframe
+from epcc_reframe.buildcache import BuildCache, BuildCacheMixin
+
+CACHE_NAME = "build_cache_test"
+
+
+def cache_dir(stagedir: str) -> str:
+    """Cache directory shared by the tests of the partition and environment of stagedir"""
+    return os.path.join(os.path.dirname(stagedir), CACHE_NAME)
+
+
+class BuildCacheTestBase(rfm.CompileOnlyRegressionTest, BuildCacheMixin):
+    """Build of a hello world program, cached in a directory next to the stage directory"""
+
+    valid_systems = ["archer2:login", "cirrus:login"]
+    valid_prog_environs = ["PrgEnv-gnu", "gcc"]
+    build_system = "SingleSource"
+    sourcepath = "hello.c"
+    executable = "hello"
+    build_cache_name = CACHE_NAME
+
+    maintainers = ["a.turner@epcc.ed.ac.uk"]
+    tags = {"build_cache", "functionality"}
+
+    @run_before("compile")
+    def set_cache_dir(self):
+        """Use a cache directory shared by the tests of this partition and environment"""
+        self.build_cache_dir = cache_dir(self.stagedir)
+
+    def assert_restored(self, hit: bool):
+        """Assert that the build was restored from the cache, or compiled if hit is False"""
+        return sn.all(
+            [
+                sn.assert_eq(self.build_cache_hit, hit),
+                sn.assert_eq(sn.count(sn.extractall(r"Restored from build cache", self.stdout)), int(hit)),
+                sn.assert_true(sn.path_isfile(os.path.join(self.stagedir, self.executable))),
+            ]
+        )
+
+
+@rfm.simple_test
+class BuildCacheMissTest(BuildCacheTestBase):
+    """First build into an empty cache"""
+
+    descr = "Build cache miss"
+
+    @run_before("compile")
+    def clear_cache(self):
+        """Start from an empty cache"""
+        shutil.rmtree(cache_dir(self.stagedir), ignore_errors=True)
+
+    @sanity_function
+    def assert_miss(self):
+        """The build is compiled"""
+        return self.assert_restored(False)
+
+
+@rfm.simple_test
+class BuildCacheHitTest(BuildCacheTestBase):
+    """Same build as BuildCacheMissTest, restored from the cache"""
+
+    descr = "Build cache hit"
+
+    @run_after("init")
+    def set_dependencies(self):
+        """Run after the miss test has stored its build"""
+        self.depends_on("BuildCacheMissTest")
+
+    @sanity_function
+    def assert_hit(self):
+        """The build is restored with the key of the first build"""
+        return sn.all(
+            [
+                self.assert_restored(True),
+                sn.assert_eq(self.build_cache_key, self.getdep("BuildCacheMissTest").build_cache_key),
+            ]
+        )
+
+
+@rfm.simple_test
+class BuildCacheOptionsMissTest(BuildCacheTestBase):
+    """Build with different compiler options, which has a different key"""
+
+    descr = "Build cache miss on changed build options"
+
+    @run_after("init")
+    def set_dependencies(self):
+        """Run after the hit test"""
+        self.depends_on("BuildCacheHitTest")
+
+    @run_before("compile")
+    def set_build_options(self):
+        """Change the build options"""
+        self.build_system.cflags = ["-O1"]
+
+    @sanity_function
+    def assert_miss(self):
+        """The build is compiled and stored under a new key"""
+        return sn.all(
+            [
+                self.assert_restored(False),
+                sn.assert_ne(self.build_cache_key, self.getdep("BuildCacheHitTest").build_cache_key),
+            ]
+        )
+
+
+@rfm.simple_test
+class BuildCacheEvictTest(rfm.RunOnlyRegressionTest):
+    """Evict all entries of the cache by size"""
+
+    descr = "Build cache eviction"
+    valid_systems = ["archer2:login", "cirrus:login"]
+    valid_prog_environs = ["PrgEnv-gnu", "gcc"]
+    sourcesdir = None
+    executable = sys.executable
+
+    maintainers = ["a.turner@epcc.ed.ac.uk"]
+    tags = {"build_cache", "functionality"}
+
+    @run_after("init")
+    def set_dependencies(self):
+        """Run after both builds are stored"""
+        self.depends_on("BuildCacheOptionsMissTest")
+
+    @run_before("run")
+    def set_executable_opts(self):
+        """Evict everything beyond 0 bytes"""
+        self.env_vars["PYTHONPATH"] = os.path.dirname(os.path.dirname(epcc_reframe.__file__))
+        self.executable_opts = [
+            "-m",
+            "epcc_reframe.buildcache",
+            "evict",
+            cache_dir(self.stagedir),
+            "--max-size-gib",
+            "0",
+        ]
+
+    @sanity_function
+    def assert_evicted(self):
+        """Both entries are evicted and the cache is empty"""
+        return sn.all(
+            [
+                sn.assert_eq(sn.count(sn.extractall(rf"evicted \S+ {CACHE_NAME}", self.stdout)), 2),
+                sn.assert_eq(sn.len(BuildCache(cache_dir(self.stagedir)).entries()), 0),
+            ]
+        )
@@ -10,18 +10,25 @@ import os
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.mirror import ArtifactMirrorMixin
 
-class PullOSUContainer(rfm.RunOnlyRegressionTest):
+
+class PullOSUContainer(rfm.RunOnlyRegressionTest, ArtifactMirrorMixin):
     """Pull a container containing an osu benchmark"""
 
     descr = "Pill a osu benchmark container from github "
     valid_systems = ["archer2:login"]
     valid_prog_environs = ["PrgEnv-gnu"]
-    executable = "singularity"
     image_name = "archer2_osu"
-    executable_opts = ["pull", f"docker://ghcr.io/epcced/epcc-reframe/{image_name}"]
     local = True
 
+    @run_before("run")
+    def set_executable(self):
+        """Pull the image, through the artifact mirror if there is one"""
+        self.executable = self.pull_cmd(
+            f"docker://ghcr.io/epcced/epcc-reframe/{self.image_name}:latest", f"{self.image_name}_latest.sif"
+        )
+
     @sanity_function
     def validate_download(self):
         """Sanity Check"""
@@ -14,9 +14,11 @@ check the resulting placement at the moment.
 import reframe as rfm
 import reframe.utility.sanity as sn
 
+from epcc_reframe.hetjob import HetGroup, HetJobMixin
+
 
 @rfm.simple_test
-class SharedCommWorldTest(rfm.RunOnlyRegressionTest):
+class SharedCommWorldTest(rfm.RunOnlyRegressionTest, HetJobMixin):
     """
     SLURM hetjob with 3 nodes (no OpenMP) as per first example
     https://docs.archer2.ac.uk/user-guide/scheduler/#heterogeneous-jobs
@@ -27,17 +29,12 @@ class SharedCommWorldTest(rfm.RunOnlyRegressionTest):
     valid_systems = ["archer2:compute"]
     valid_prog_environs = ["*"]
     modules = ["xthi"]
+    executable = "xthi"
 
-    # Utter, utter kludge
     # 1 + 2 nodes; 8 + 2x4 MPI tasks
-    hetgroup0 = "--het-group=0 --nodes=1 --ntasks=8 --ntasks-per-node=8 xthi"
-    hetgroup1 = "--het-group=1 --nodes=2 --ntasks=8 --ntasks-per-node=4 xthi"
-    executable = hetgroup0 + " : " + hetgroup1
+    het_groups = [HetGroup(nodes=1, tasks_per_node=8), HetGroup(nodes=2, tasks_per_node=4)]
 
     time_limit = "2m"
-    # Kludge three nodes because we can't set the number of nodes explicitly
-    num_tasks = 3
-    num_tasks_per_node = 1
     env_vars = {"OMP_PLACES": "cores"}
     extra_resources = {"qos": {"qos": "standard"}}
 
@@ -48,7 +45,7 @@ class SharedCommWorldTest(rfm.RunOnlyRegressionTest):
 
 
 @rfm.simple_test
-class SharedCommWorldWithOpenMPTest(rfm.RunOnlyRegressionTest):
+class SharedCommWorldWithOpenMPTest(rfm.RunOnlyRegressionTest, HetJobMixin):
     """
     SLURM hetjob with shared MPI_COMM_WORLD and OpenMP as per
     the mixed MPI/OpenMP example at
@@ -59,21 +56,16 @@ class SharedCommWorldWithOpenMPTest(rfm.RunOnlyRegressionTest):
     valid_systems = ["archer2:compute"]
     valid_prog_environs = ["*"]
     modules = ["xthi"]
+    executable = "xthi"
 
-    # Two nodes with 8 MPI tasks per node
-    shared_args = " --nodes=1 --ntasks=8 --tasks-per-node=8 --cpus-per-task=16"
-    openmp0 = " --export=all,OMP_NUM_THREADS=16"
-    openmp1 = " --export=all,OMP_NUM_THREADS=1"
-    hetgroup0 = "--het-group=0" + shared_args + openmp0 + " xthi"
-    hetgroup1 = "--het-group=1" + shared_args + openmp1 + " xthi"
-    executable = hetgroup0 + " : " + hetgroup1
+    # Two nodes with 8 MPI tasks per node, 16 OpenMP threads on the first one
+    het_groups = [
+        HetGroup(nodes=1, tasks_per_node=8, cpus_per_task=16, env_vars={"OMP_NUM_THREADS": "16"}),
+        HetGroup(nodes=1, tasks_per_node=8, cpus_per_task=16, env_vars={"OMP_NUM_THREADS": "1"}),
+    ]
 
     time_limit = "2m"
 
-    # Kludge two nodes because we can't set the number of nodes explicitly
-    num_tasks = 2
-    num_tasks_per_node = 1
-
     env_vars = {"OMP_PLACES": "cores"}
     extra_resources = {"qos": {"qos": "standard"}}
 